@@ -1,9 +1,9 @@
-import subprocess
-import requests
 import time
 import csv
 import os
+import sys
 import argparse
+from pathlib import Path
 
 # CLI arguments
 parser = argparse.ArgumentParser(
@@ -12,107 +12,183 @@ parser.add_argument("--gateway", required=True,
                     help="Name of the gateway container (e.g. haproxy, traefik, tyk)")
 parser.add_argument("--iterations", type=int, default=30,
                     help="Number of experiment iterations per signal")
+parser.add_argument("--probes", type=int, default=8,
+                    help="Number of concurrent, staggered availability probes")
+parser.add_argument("--probe-interval", type=float, default=8,
+                    help="Interval between two requests of one probe in ms (sampling period: interval / probes)")
+parser.add_argument("--wait-timeout", type=float, default=60,
+                    help="Seconds to wait for each container event and for the gateway to go down or come back "
+                         "up before the iteration is recorded as failed")
+parser.add_argument("--resources", default=None,
+                    help="Sample the resource use of the compose project's containers into this CSV file")
+parser.add_argument("--store", default=None,
+                    help="Also append the results to the result store at this path (requires pyarrow)")
+parser.add_argument("--run", default=None,
+                    help="Run id in the result store (default: current timestamp)")
 args = parser.parse_args()
 
+# the availability prober is shared with the other scenarios
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common.docker_engine import DockerEngine, DockerError, EventStream  # noqa: E402
+from common.prober import EdgeProber  # noqa: E402
+
 # Experiment parameters
 ITERATIONS = args.iterations
 SLEEP_BETWEEN_RUNS = 2  # seconds between iterations
-TARGET_URL = "http://localhost:8080"
+TARGET_URL = f"http://localhost:{os.getenv('GATEWAY_PORT', '8080')}/"
 RESULTS_DIR = "../results"
 RESULTS_FILE = os.path.join(RESULTS_DIR, f"measurements_{args.gateway}.csv")
 SIGNALS = ["SIGTERM", "SIGKILL"]
-CHECK_INTERVAL = 0.05  # seconds between pings determine density/accuracy of results
+CONTAINER_PORT = 80  # port the gateways listen on inside their containers
+WAIT_TIMEOUT = args.wait_timeout
+HEADER = [
+    "iteration",
+    "gateway",
+    "signal",
+    "down_ts_ms",
+    "up_ts_ms",
+    "downtime_ms",
+    "down_error",
+    "up_error",
+    "down_uncertainty_ms",
+    "up_uncertainty_ms",
+    "kill_ts_ms",
+    "exited_ts_ms",
+    "start_request_ts_ms",
+    "started_ts_ms",
+    "port_open_ts_ms",
+    "first_response_ts_ms",
+    "exit_ms",
+    "container_start_ms",
+    "listener_bind_ms",
+    "first_response_ms",
+    "upstream_ready_ms",
+    "failure"
+]
 
 # Create results directory
 os.makedirs(RESULTS_DIR, exist_ok=True)
 
 
-def now_ms():
-    """Return current time in milliseconds."""
-    return int(time.time() * 1000)
+def event_ms(event):
+    """Daemon timestamp of a Docker event in milliseconds since the epoch."""
+    return round(event.time_ns / 1e6, 3)
 
 
-def docker_cmd(args_list):
-    """Run a docker command and return result"""
-    result = subprocess.run(["docker"] + args_list,
-                            capture_output=True, text=True)
-    if result.returncode != 0:
-        print(f"[WARN] Docker command failed: {' '.join(args_list)}")
-        print(result.stderr.strip())
-    return result
+def duration_ms(start_ms, end_ms):
+    """Duration of a phase, None if one of its edges was not observed."""
+    if start_ms is None or end_ms is None:
+        return None
+    return round(end_ms - start_ms, 3)
 
 
-def ping(iteration: int):
-    """Return True if gateway responds with HTTP 200."""
-    try:
-        r = requests.get(TARGET_URL + "?iteration=" +
-                         str(iteration), timeout=1)
-        return r.status_code == 200
-    except Exception:
-        return False
+class IterationFailed(Exception):
+    """A container event or probe edge of an iteration was not observed within WAIT_TIMEOUT."""
 
 
-def wait_until_down(iteration: int):
-    """Wait until gateway is no longer reachable (no responses)."""
-    while ping(iteration):
-        time.sleep(CHECK_INTERVAL)
-    return now_ms()
+def expect(result, what):
+    """Result of a wait, raises IterationFailed if it timed out (None or False)."""
+    if not result:
+        raise IterationFailed(what)
+    return result
 
 
-def wait_until_up(iteration: int):
-    """Wait until gateway responds again."""
-    while not ping(iteration):
-        time.sleep(CHECK_INTERVAL)
-    return now_ms()
+def ensure_running(engine, gateway):
+    """Start the gateway again after a failed iteration, so that the next one starts from a running container."""
+    try:
+        if not engine.running(gateway):
+            engine.start(gateway)
+    except DockerError as e:
+        print(f"[WARN] Could not restart gateway container '{gateway}': {e}")
 
 
-def wait_until_exited(gateway):
-    """Wait until the gateway container has exited."""
-    while True:
-        result = subprocess.run(["docker", "inspect", "-f", "{{.State.Running}}", gateway],
-                                capture_output=True, text=True)
-        if "false" in result.stdout:
-            return now_ms()
-        time.sleep(CHECK_INTERVAL)
+def container_ip(engine, gateway):
+    """Address of the container in its first network (None if it has none)."""
+    networks = engine.inspect(gateway)["NetworkSettings"]["Networks"]
+    return next((n["IPAddress"] for n in networks.values() if n.get("IPAddress")), None)
 
 
-def run_experiment(gateway, signal_type, iterations):
+def run_experiment(engine, events, gateway, signal_type, iterations, sampler=None):
     """Run experiment for a given signal type"""
     print(f"\nStarting experiment: {gateway} / {signal_type}")
     results = []
 
     for i in range(1, iterations + 1):
         print(f"\nIteration {i}/{iterations} ({signal_type})")
-
-        # 1. Kill gateway and record timestamp
-        print(
-            f"[INFO] Sending {signal_type} to gateway container '{gateway}'...")
-        docker_cmd(["kill", f"--signal={signal_type}", gateway])
-
-        # 2. Wait until it's actually down (no responses)
-        down_ts = wait_until_down(i)
-        # Also wait until container has exited
-        wait_until_exited(gateway)
-
-        # 3. Restart gateway
-        print(f"[INFO] Restarting gateway container '{gateway}'...")
-        docker_cmd(["start", gateway])
-
-        print(f"[INFO] Waiting for gateway to come back up...")
-        # 4. Wait until it's back up
-        up_ts = wait_until_up(i)
-        print(f"[INFO] Gateway is back up.")
-
-        # 5. Compute durations
-        downtime = up_ts - down_ts
-
+        if sampler:
+            sampler.mark(f"{signal_type}_{i}")
+
+        prober = EdgeProber(f"{TARGET_URL}?iteration={i}", args.probes, args.probe_interval / 1000)
+        try:
+            with prober:
+                # 1. Kill gateway
+                print(
+                    f"[INFO] Sending {signal_type} to gateway container '{gateway}'...")
+                mark = events.mark()
+                engine.kill(gateway, signal_type)
+                kill_event = expect(events.wait_for("kill", mark, timeout=WAIT_TIMEOUT), "no kill event")
+
+                # 2. Wait until it's actually down (first failed probe)
+                expect(prober.wait_down(WAIT_TIMEOUT), "gateway did not go down")
+                # Also wait until container has exited
+                die_event = expect(events.wait_for("die", mark, timeout=WAIT_TIMEOUT), "container did not exit")
+
+                # 3. Restart gateway
+                print(f"[INFO] Restarting gateway container '{gateway}'...")
+                mark = events.mark()
+                start_request_ms = time.time_ns() / 1e6
+                engine.start(gateway)
+                start_event = expect(events.wait_for("start", mark, timeout=WAIT_TIMEOUT), "no start event")
+                # the published port accepts connections even while the gateway
+                # does not listen, so the listener is probed on the container address
+                ip = container_ip(engine, gateway)
+                if ip:
+                    prober.watch_port(ip, CONTAINER_PORT)
+
+                print(f"[INFO] Waiting for gateway to come back up...")
+                # 4. Wait until it's back up (first successful probe after the outage)
+                expect(prober.wait_up(WAIT_TIMEOUT), "gateway did not come back up")
+                if ip and not prober.wait_port(timeout=1):
+                    print(f"[WARN] Container address {ip} not reachable, listener bind not measured")
+                print(f"[INFO] Gateway is back up.")
+        except (IterationFailed, DockerError) as e:
+            # recorded without measurements, the remaining iterations still run
+            print(f"[WARN] Iteration {i} failed: {e}")
+            results.append([i, gateway, signal_type, *[None] * (len(HEADER) - 4), str(e)])
+            ensure_running(engine, gateway)
+            time.sleep(SLEEP_BETWEEN_RUNS)
+            continue
+
+        # 5. Compute durations from the send times of the edge probes
+        edges = prober.edges()
+        port_open_ms = edges.wall_ms(edges.port_open_ns) if edges.port_open_ns else None
+        first_response_ms = edges.wall_ms(edges.first_response.sent_ns)
+        up_ms = edges.wall_ms(edges.up_ns)
+        timeline = [
+            event_ms(kill_event), event_ms(die_event), round(start_request_ms, 3),
+            event_ms(start_event),
+            round(port_open_ms, 3) if port_open_ms else None, round(first_response_ms, 3),
+            # phases: exit, container start, listener bind, first response, upstream ready
+            duration_ms(event_ms(kill_event), event_ms(die_event)),
+            duration_ms(start_request_ms, event_ms(start_event)),
+            duration_ms(event_ms(start_event), port_open_ms),
+            duration_ms(port_open_ms or event_ms(start_event), first_response_ms),
+            duration_ms(first_response_ms, up_ms),
+        ]
         results.append([
-            i, gateway, signal_type, down_ts, up_ts,
-            downtime
+            i, gateway, signal_type,
+            round(edges.wall_ms(edges.down_ns), 3), round(edges.wall_ms(edges.up_ns), 3),
+            round(edges.downtime_ms, 3),
+            edges.first_fail.error, edges.last_fail.error,
+            round(edges.down_uncertainty_ms, 3) if edges.last_ok else None,
+            round(edges.up_uncertainty_ms, 3),
+            *timeline,
+            "",
         ])
 
         print(
-            f"[OK] Downtime: {downtime} ms"
+            f"[OK] Downtime: {edges.downtime_ms:.3f} ms "
+            f"(down: {edges.first_fail.error}, last error: {edges.last_fail.error})"
         )
 
         time.sleep(SLEEP_BETWEEN_RUNS)
@@ -122,24 +198,37 @@ def run_experiment(gateway, signal_type, iterations):
 
 def main():
     all_results = []
-    for signal in SIGNALS:
-        results = run_experiment(args.gateway, signal, ITERATIONS)
-        all_results.extend(results)
+    engine = DockerEngine()
+    sampler = None
+    if args.resources:
+        from common.resource_sampler import ResourceSampler
+        sampler = ResourceSampler()
+        sampler.start()
+    with EventStream([args.gateway]) as events:
+        for signal in SIGNALS:
+            results = run_experiment(engine, events, args.gateway, signal, ITERATIONS, sampler)
+            all_results.extend(results)
+    engine.close()
+    if sampler:
+        sampler.stop()
+        print(f"[INFO] Resource samples written to {sampler.write_csv(args.resources)}")
 
     with open(RESULTS_FILE, "w", newline="") as f:
         writer = csv.writer(f)
-        writer.writerow([
-            "iteration",
-            "gateway",
-            "signal",
-            "down_ts_ms",
-            "up_ts_ms",
-            "downtime_ms"
-        ])
+        writer.writerow(HEADER)
         writer.writerows(all_results)
 
     print(f"\n✅ Results written to {RESULTS_FILE}")
 
+    if args.store:
+        # imported on demand, the store needs pyarrow
+        from common.result_store import store_rows
+        path = store_rows(args.store, "1-restart-after-shutdown", args.run, args.gateway,
+                          HEADER, all_results,
+                          parameters={"iterations": ITERATIONS, "probes": args.probes,
+                                      "probe_interval_ms": args.probe_interval})
+        print(f"[INFO] Results stored in {path}")
+
 
 if __name__ == "__main__":
     main()
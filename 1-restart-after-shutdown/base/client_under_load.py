@@ -0,0 +1,229 @@
+"""
+Scenario 1 under load: restart or reload the gateway while a constant-rate
+background load is running and count the requests that fail or slow down.
+
+Besides SIGTERM/SIGKILL (followed by a container restart) the gateways' own
+graceful mechanisms are covered:
+  * graceful-reload: HAProxy master-worker reload (SIGUSR2, which hands the
+    listeners to new workers and soft-stops the old ones like -sf),
+    `nginx -s reload`, `caddy reload` and Tyk's /tyk/reload API
+  * graceful-stop: HAProxy soft-stop (SIGUSR1), `nginx -s quit`,
+    `caddy stop`, SIGTERM for Traefik and Tyk, followed by a restart
+  * SIGUSR2 as plain signal (gateways that exit on it are restarted)
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+# CLI arguments
+parser = argparse.ArgumentParser(
+    description="Gateway testing and measurement client for Scenario 1 under load: restarts and reloads during a constant-rate load")
+parser.add_argument("--gateway", required=True,
+                    help="Name of the gateway container (e.g. haproxy, traefik, tyk)")
+parser.add_argument("--iterations", type=int, default=10,
+                    help="Number of experiment iterations per action")
+parser.add_argument("--actions", nargs="+",
+                    default=["SIGTERM", "SIGKILL", "SIGUSR2", "graceful-reload", "graceful-stop"],
+                    help="Actions to perform under load")
+parser.add_argument("--rate", type=float, default=500,
+                    help="Requests per second of the background load")
+parser.add_argument("-c", "--concurrency", type=int, default=32,
+                    help="Maximum number of requests in flight")
+parser.add_argument("--warmup", type=float, default=2,
+                    help="Seconds of load before the action")
+parser.add_argument("--cooldown", type=float, default=3,
+                    help="Seconds of load after the action (and restart) completed")
+parser.add_argument("--slow-ms", type=float, default=100,
+                    help="Successful requests slower than this (from their intended start) count as slow")
+parser.add_argument("--timeout", type=float, default=2,
+                    help="Request timeout in seconds")
+parser.add_argument("--store", default=None,
+                    help="Also append the results to the result store at this path (requires pyarrow)")
+parser.add_argument("--run", default=None,
+                    help="Run id in the result store (default: current timestamp)")
+args = parser.parse_args()
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common.background_load import BackgroundLoad  # noqa: E402
+from common.docker_engine import DockerEngine, EventStream  # noqa: E402
+
+# Experiment parameters
+ITERATIONS = args.iterations
+SLEEP_BETWEEN_RUNS = 2  # seconds between iterations
+TARGET_URL = f"http://localhost:{os.getenv('GATEWAY_PORT', '8080')}/"
+RESULTS_DIR = "../results"
+RESULTS_FILE = os.path.join(RESULTS_DIR, f"under_load_{args.gateway}.csv")
+STOP_TIMEOUT = 30  # seconds to wait for a container to exit after a stopping action
+EXIT_WINDOW = 1  # seconds in which a reload counts as having stopped the container
+TYK_SECRET = "12345"
+
+# (kind, argument) per gateway; kind is exec (command in the container), signal or http (path)
+GRACEFUL_RELOAD = {
+    "haproxy": ("signal", "SIGUSR2"),
+    "nginx": ("exec", ["nginx", "-s", "reload"]),
+    "caddy": ("exec", ["caddy", "reload", "--config", "/etc/caddy/Caddyfile"]),
+    "tyk": ("http", "/tyk/reload"),
+    # Traefik has no reload command, its file provider watches the configuration
+}
+GRACEFUL_STOP = {
+    "haproxy": ("signal", "SIGUSR1"),
+    "nginx": ("exec", ["nginx", "-s", "quit"]),
+    "caddy": ("exec", ["caddy", "stop"]),
+    "traefik": ("signal", "SIGTERM"),
+    "tyk": ("signal", "SIGTERM"),
+}
+STOPPING_ACTIONS = {"SIGTERM", "SIGKILL", "graceful-stop"}
+
+# Create results directory
+os.makedirs(RESULTS_DIR, exist_ok=True)
+
+
+def action_step(gateway, action):
+    """The (kind, argument) pair that performs an action, None if the gateway does not support it."""
+    if action == "graceful-reload":
+        return GRACEFUL_RELOAD.get(gateway)
+    if action == "graceful-stop":
+        return GRACEFUL_STOP.get(gateway)
+    return ("signal", action)
+
+
+def perform(engine, events, gateway, step, stopping):
+    """Perform an action and restart the container if it exited. Returns True if it was restarted."""
+    kind, argument = step
+    mark = events.mark()
+    if kind == "signal":
+        engine.kill(gateway, argument)
+    elif kind == "exec":
+        exit_code, output = engine.exec(gateway, argument)
+        if exit_code != 0:
+            print(f"[WARN] {' '.join(argument)} exited with {exit_code}: {output.strip()}")
+    elif kind == "http":
+        request = urllib.request.Request(TARGET_URL.rstrip("/") + argument,
+                                         headers={"x-tyk-authorization": TYK_SECRET})
+        try:
+            with urllib.request.urlopen(request, timeout=5) as resp:
+                if resp.status != 200:
+                    print(f"[WARN] Reload request failed: {resp.status}")
+        except urllib.error.HTTPError as e:
+            # non-2xx answers are raised by urlopen
+            print(f"[WARN] Reload request failed: {e.code}")
+            return False
+        except urllib.error.URLError as e:
+            print(f"[WARN] Reload request failed: {e.reason}")
+            return False
+
+    if events.wait_for("die", mark, timeout=STOP_TIMEOUT if stopping else EXIT_WINDOW) is None:
+        if stopping:
+            print(f"[WARN] Gateway container '{gateway}' did not exit")
+        return False
+    mark = events.mark()
+    engine.start(gateway)
+    if events.wait_for("start", mark, timeout=STOP_TIMEOUT) is None:
+        print(f"[WARN] Gateway container '{gateway}' did not start again")
+    return True
+
+
+def evaluate(requests):
+    """Failure counts, slow requests and the lost-request window of the requests of one iteration."""
+    failed = [r for r in requests if not r.ok]
+    errors = [r.error for r in failed]
+    slow = [r for r in requests if r.ok and r.latency_ms > args.slow_ms]
+    return {
+        "requests": len(requests),
+        "failed": len(failed),
+        "reset": errors.count("reset"),
+        "refused": errors.count("refused"),
+        "timeout": errors.count("timeout"),
+        "http_errors": sum(1 for e in errors if e.startswith("http_")),
+        "slow": len(slow),
+        "max_latency_ms": round(max((r.latency_ms for r in requests), default=0), 3),
+        # time between the intended starts of the first and the last failed request
+        "lost_window_ms": round((failed[-1].intended_ns - failed[0].intended_ns) / 1e6, 3) if failed else 0,
+    }
+
+
+def run_experiment(engine, events, gateway, action, iterations):
+    """Run experiment for a given action"""
+    step = action_step(gateway, action)
+    if step is None:
+        print(f"\n[INFO] {gateway} does not support {action}, skipping")
+        return []
+    print(f"\nStarting experiment: {gateway} / {action} under {args.rate:g} RPS (c={args.concurrency})")
+    results = []
+
+    for i in range(1, iterations + 1):
+        print(f"\nIteration {i}/{iterations} ({action})")
+        with BackgroundLoad(TARGET_URL, args.rate, args.concurrency, args.timeout) as load:
+            time.sleep(args.warmup)
+            start_ns = time.monotonic_ns()
+            print(f"[INFO] Performing {action} on gateway container '{gateway}'...")
+            restarted = perform(engine, events, gateway, step, action in STOPPING_ACTIONS)
+            time.sleep(args.cooldown)
+            end_ns = time.monotonic_ns()
+
+        metrics = evaluate(sorted(load.window(start_ns, end_ns), key=lambda r: r.intended_ns))
+        results.append([i, gateway, action, restarted, args.rate, args.concurrency, *metrics.values()])
+        print(
+            f"[OK] {metrics['failed']}/{metrics['requests']} failed "
+            f"(reset: {metrics['reset']}, refused: {metrics['refused']}, timeout: {metrics['timeout']}, "
+            f"http: {metrics['http_errors']}), {metrics['slow']} slow, "
+            f"lost window: {metrics['lost_window_ms']} ms"
+        )
+
+        time.sleep(SLEEP_BETWEEN_RUNS)
+
+    return results
+
+
+def main():
+    all_results = []
+    engine = DockerEngine()
+    with EventStream([args.gateway]) as events:
+        for action in args.actions:
+            results = run_experiment(engine, events, args.gateway, action, ITERATIONS)
+            all_results.extend(results)
+    engine.close()
+
+    header = [
+        "iteration",
+        "gateway",
+        "action",
+        "restarted",
+        "rate",
+        "concurrency",
+        "requests",
+        "failed",
+        "reset",
+        "refused",
+        "timeout",
+        "http_errors",
+        "slow",
+        "max_latency_ms",
+        "lost_window_ms"
+    ]
+    with open(RESULTS_FILE, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(all_results)
+
+    print(f"\n✅ Results written to {RESULTS_FILE}")
+
+    if args.store:
+        # imported on demand, the store needs pyarrow
+        from common.result_store import store_rows
+        # own run id, the rows have a different schema than the restart measurements
+        run = (args.run or time.strftime("%Y%m%d_%H%M%S")) + "_under_load"
+        path = store_rows(args.store, "1-restart-after-shutdown", run, args.gateway,
+                          header, all_results, concurrency=args.concurrency,
+                          parameters={"iterations": ITERATIONS, "rate": args.rate,
+                                      "concurrency": args.concurrency, "slow_ms": args.slow_ms})
+        print(f"[INFO] Results stored in {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,21 @@
 #!/bin/bash
 set -e
 
+# RESULT_STORE=<dir> additionally appends all measurements to the shared result store
+STORE_ARGS=""
+if [ -n "$RESULT_STORE" ]; then
+  STORE_ARGS="--store $(realpath "$RESULT_STORE") --run $(date +%Y%m%d_%H%M%S)"
+fi
+
+# RESOURCES=0 disables sampling the cgroup v2 resource use of the containers (common/resource_sampler.py)
+resource_args() {
+  if [ "${RESOURCES:-1}" == "1" ]; then
+    echo "--resources ../results/resources_$1.csv"
+  fi
+}
+
+# UNDER_LOAD=1 additionally restarts/reloads every gateway under a constant background load
+
 for gateway in caddy haproxy nginx traefik tyk; do
   echo ""
   echo "==== Testing $gateway ===="
@@ -10,13 +25,18 @@ for gateway in caddy haproxy nginx traefik tyk; do
   docker compose down -v
 
   echo "Starting new environment..."
-  docker compose up -d
+  docker compose up --build -d
 
   echo "Waiting for containers to be ready..."
   sleep 3
 
   echo "Running client experiment..."
-  python3 ../base/client.py --gateway $gateway --iterations 100
+  python3 ../base/client.py --gateway $gateway --iterations 100 $STORE_ARGS $(resource_args $gateway)
+
+  if [ -n "$UNDER_LOAD" ]; then
+    echo "Running restart experiment under load..."
+    python3 ../base/client_under_load.py --gateway $gateway --iterations 10 $STORE_ARGS
+  fi
 
   echo "Stopping environment..."
   docker compose down -v
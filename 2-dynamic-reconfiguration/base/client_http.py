@@ -3,8 +3,10 @@ import requests
 import time
 import csv
 import os
+import sys
+from pathlib import Path
 # import random
-from utils import now_ms, ensure_results_dir, apply_gateway_config_change
+from utils import now_ms, ensure_results_dir, apply_gateway_config_change, GATEWAY_PORT
 
 
 # CLI arguments
@@ -14,6 +16,16 @@ parser.add_argument("--gateway", required=True,
                     help="Name of the gateway container (e.g. haproxy, traefik, tyk)")
 parser.add_argument("--iterations", type=int, default=30,
                     help="Number of experiment iterations per signal")
+parser.add_argument("--resources", default=None,
+                    help="Sample the resource use of the compose project's containers into this CSV file")
+parser.add_argument("--metrics", default=None,
+                    help="Scrape the gateway's metrics endpoint into this CSV file")
+parser.add_argument("--metrics-interval", type=float, default=0.5,
+                    help="Seconds between two metrics scrapes")
+parser.add_argument("--store", default=None,
+                    help="Also append the results to the result store at this path (requires pyarrow)")
+parser.add_argument("--run", default=None,
+                    help="Run id in the result store (default: current timestamp)")
 args = parser.parse_args()
 
 # Experiment parameters
@@ -23,7 +35,7 @@ CHECK_INTERVAL = 0.05  # seconds between pings determine density/accuracy of res
 SWITCH_DELAY = 3  # seconds until config change
 # total runtime per iteration in seconds (must be greater than SWITCH_DELAY)
 RUN_TIME = 6
-TARGET_URL = "http://localhost:8080"
+TARGET_URL = f"http://localhost:{GATEWAY_PORT}"
 RESULTS_DIR = "../results"
 RESULTS_FILE = os.path.join(
     RESULTS_DIR, f"http_dynamic_switch_{args.gateway}.csv")
@@ -34,9 +46,25 @@ def run_experiment(gateway):
     print(f"Running HTTP dynamic configuration switch for {gateway}")
 
     all_results = []
+    sampler = None
+    if args.resources:
+        from common.resource_sampler import ResourceSampler
+        sampler = ResourceSampler()
+        sampler.start()
+    poller = None
+    if args.metrics:
+        from common.gateway_metrics import MetricsPoller, UnsupportedMetrics
+        try:
+            poller = MetricsPoller(gateway, args.metrics_interval)
+            poller.start()
+        except UnsupportedMetrics as exc:
+            print(f"[INFO] {exc}, not scraping metrics")
 
     for i in range(1, ITERATIONS + 1):
         print(f"\n--- HTTP iteration {i}/{ITERATIONS} ---")
+        for recorder in (sampler, poller):
+            if recorder:
+                recorder.mark(i)
 
         start_ts = now_ms()
         switch_ts = start_ts + int(SWITCH_DELAY * 1000)
@@ -60,8 +88,8 @@ def run_experiment(gateway):
             # Trigger config change
             if not switched and now_ms() >= switch_ts:
                 print("Triggering config change / reload")
-                switch_event_ts = now_ms()
-                apply_gateway_config_change(gateway)
+                # time the reload was triggered, without rewriting the config file
+                switch_event_ts = apply_gateway_config_change(gateway)
                 switched = True
                 # Explicitly log switch event
                 iteration_results.append(
@@ -74,21 +102,38 @@ def run_experiment(gateway):
         # random sleep time to test tyk config change reload interval
         # time.sleep(random.uniform(1, 4))
 
+    if sampler:
+        sampler.stop()
+        print(f"[INFO] Resource samples written to {sampler.write_csv(args.resources)}")
+    if poller:
+        poller.stop()
+        print(f"[INFO] Gateway metrics written to {poller.write_csv(args.metrics)}")
+
 
     # save results
+    header = [
+        "iteration",
+        "timestamp_ms",
+        "response",
+        "success",
+        "phase"
+    ]
     with open(RESULTS_FILE, "w", newline="") as f:
         writer = csv.writer(f)
-        writer.writerow([
-            "iteration",
-            "timestamp_ms",
-            "response",
-            "success",
-            "phase"
-        ])
+        writer.writerow(header)
         writer.writerows(all_results)
 
     print(f"✅ Results saved to {RESULTS_FILE}")
 
+    if args.store:
+        # imported on demand, the store needs pyarrow
+        sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+        from common.result_store import store_rows
+        path = store_rows(args.store, "2-dynamic-reconfiguration", args.run, gateway,
+                          header, all_results, protocol="http",
+                          parameters={"iterations": ITERATIONS, "check_interval": CHECK_INTERVAL})
+        print(f"[INFO] Results stored in {path}")
+
 
 if __name__ == "__main__":
     run_experiment(args.gateway)
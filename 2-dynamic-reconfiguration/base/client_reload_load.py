@@ -0,0 +1,251 @@
+"""
+Scenario 2 reload storm: toggle the routing configuration repeatedly (every
+--interval seconds) while a sustained high-concurrency load is running and
+report per reload window, compared to the load before the first reload:
+p50/p99 latency and their inflation, failed requests and connection resets,
+and the memory use and process count of the gateway container (old workers
+that are still draining show up as additional processes). The container is
+polled on a background thread, so the slow Docker stats calls do not delay
+the reload triggers; every window reports the highest values polled in it.
+"""
+import argparse
+import csv
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from utils import ensure_results_dir, get_gateway, GATEWAY_PORT
+
+# CLI arguments
+parser = argparse.ArgumentParser(
+    description="Gateway testing and measurement client for Scenario 2: repeated reloads under sustained load")
+parser.add_argument("--gateway", required=True,
+                    help="Name of the gateway (e.g. haproxy, traefik, tyk)")
+parser.add_argument("--protocol", default=os.getenv("MODE", "http"), choices=["http", "grpc"],
+                    help="Protocol of the requests (default: $MODE)")
+parser.add_argument("--iterations", type=int, default=5,
+                    help="Number of reload storms")
+parser.add_argument("--reloads", type=int, default=20,
+                    help="Reloads per storm")
+parser.add_argument("--interval", type=float, default=0.5,
+                    help="Seconds between two reloads")
+parser.add_argument("--rate", type=float, default=2000,
+                    help="Requests per second of all streams together")
+parser.add_argument("--streams", type=int, default=64,
+                    help="Number of concurrent request streams, each on its own connection")
+parser.add_argument("--warmup", type=float, default=3,
+                    help="Seconds of load before the first reload (baseline)")
+parser.add_argument("--timeout", type=float, default=2,
+                    help="Request timeout in seconds")
+parser.add_argument("--store", default=None,
+                    help="Also append the results to the result store at this path (requires pyarrow)")
+parser.add_argument("--run", default=None,
+                    help="Run id in the result store (default: current timestamp)")
+args = parser.parse_args()
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common.docker_engine import DockerEngine, DockerError  # noqa: E402
+from common.switchover import SwitchoverLoad  # noqa: E402
+
+# Experiment parameters
+ITERATIONS = args.iterations
+SLEEP_BETWEEN_RUNS = 2  # seconds between iterations
+TARGET_URL = (f"http://localhost:{GATEWAY_PORT}/" if args.protocol == "http"
+              else f"localhost:{GATEWAY_PORT}")
+RESULTS_DIR = "../results"
+RESULTS_FILE = os.path.join(
+    RESULTS_DIR, f"{args.protocol}_reload_load_{args.gateway}.csv")
+RESET_ERRORS = {"reset", "grpc_unavailable"}
+POLL_INTERVAL = 0.1  # seconds between two resource polls of the gateway container
+
+HEADER = [
+    "iteration",
+    "reload",
+    "gateway",
+    "protocol",
+    "window_start_ts_ms",
+    "reload_call_ms",
+    "requests",
+    "errors",
+    "resets",
+    "error_types",
+    "p50_ms",
+    "p99_ms",
+    "p50_inflation",
+    "p99_inflation",
+    "memory_mb",
+    "memory_delta_mb",
+    "processes",
+    "process_delta"
+]
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of sorted values (None if there are none)."""
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+class ResourcePoller:
+    """Polls memory (MB) and process count of a container on a background thread."""
+
+    def __init__(self, container):
+        self.container = container
+        # own connection, the adapter's engine is used for the reload triggers
+        self.engine = DockerEngine()
+        self.samples = []  # (monotonic ns, memory MB, processes)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.engine.close()
+
+    def _run(self):
+        warned = False
+        while not self._stop.is_set():
+            try:
+                memory_mb = round(self.engine.memory_bytes(self.container) / 2**20, 3)
+                processes = self.engine.processes(self.container)
+            except (DockerError, OSError, KeyError) as exc:
+                if not warned:
+                    warned = True
+                    print(f"[WARN] Cannot read the resources of {self.container}: {exc}")
+            else:
+                self.samples.append((time.monotonic_ns(), memory_mb, processes))
+            self._stop.wait(POLL_INTERVAL)
+
+    def window(self, start_ns, end_ns):
+        """Highest memory (MB) and process count polled in [start_ns, end_ns), None if there was no poll."""
+        inside = [s for s in self.samples if start_ns <= s[0] < end_ns]
+        if not inside:
+            return None, None
+        return max(s[1] for s in inside), max(s[2] for s in inside)
+
+
+def delta(value, base):
+    return round(value - base, 3) if value is not None and base is not None else None
+
+
+def window_stats(samples, start_ns, end_ns):
+    """Latency percentiles (ms) and failures of the requests sent in [start_ns, end_ns)."""
+    window = [s for s in samples if start_ns <= s.sent_ns < end_ns]
+    latencies = sorted((s.done_ns - s.sent_ns) / 1e6 for s in window if s.ok)
+    errors = [s.error for s in window if not s.ok]
+    return {
+        "requests": len(window),
+        "errors": len(errors),
+        "resets": sum(1 for e in errors if e in RESET_ERRORS),
+        "error_types": ";".join(sorted(set(errors))),
+        "p50_ms": round(percentile(latencies, 50), 3) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99), 3) if latencies else None,
+    }
+
+
+def run_storm(adapter, gateway, i):
+    """One storm: baseline window, then one window per reload. Returns the rows."""
+    step_ns = int(args.interval * 1e9)
+    triggers = []
+    with SwitchoverLoad(TARGET_URL, args.rate, args.streams, args.timeout, args.protocol) as load, \
+            ResourcePoller(adapter.container) as poller:
+        start_ns = time.monotonic_ns()
+        time.sleep(args.warmup)
+        next_ns = time.monotonic_ns()
+        late = 0
+        for _ in range(args.reloads):
+            now = time.monotonic_ns()
+            if now < next_ns:
+                time.sleep((next_ns - now) / 1e9)
+            elif now - next_ns > step_ns // 10:
+                late += 1
+            # the reload call starts after the config file was rewritten
+            trigger_ns = adapter.apply()
+            call_ms = (time.monotonic_ns() - trigger_ns) / 1e6
+            triggers.append((trigger_ns, call_ms))
+            next_ns += step_ns
+        time.sleep(args.interval)
+        end_ns = time.monotonic_ns()
+    if late:
+        print(f"[WARN] {late} reloads started late, reloading takes longer than the interval")
+
+    # the warmup (without the first second of connection setup) is the baseline
+    windows = [(0, start_ns + int(1e9), triggers[0][0], None)]
+    for k, (trigger_ns, call_ms) in enumerate(triggers, 1):
+        window_end = triggers[k][0] if k < len(triggers) else end_ns
+        windows.append((k, trigger_ns, window_end, call_ms))
+
+    rows = []
+    base = None
+    for reload, window_start, window_end, call_ms in windows:
+        stats = window_stats(load.samples, window_start, window_end)
+        memory_mb, processes = poller.window(window_start, window_end)
+        if base is None:
+            base = stats, memory_mb, processes
+        base_stats, base_memory, base_processes = base
+        inflation = {
+            f"{p}_inflation": round(stats[f"{p}_ms"] / base_stats[f"{p}_ms"], 3)
+            if stats[f"{p}_ms"] and base_stats[f"{p}_ms"] else None
+            for p in ("p50", "p99")
+        }
+        rows.append([
+            i, reload, gateway, args.protocol, round(load.wall_ms(window_start), 3),
+            round(call_ms, 3) if call_ms is not None else None,
+            *stats.values(), *inflation.values(),
+            memory_mb, delta(memory_mb, base_memory), processes, delta(processes, base_processes),
+        ])
+    return rows
+
+
+def run_experiment(gateway):
+    ensure_results_dir(RESULTS_DIR)
+    print(f"Running {args.protocol} reload storm for {gateway}: {args.reloads} reloads every "
+          f"{args.interval:g} s under {args.rate:g} RPS ({args.streams} streams)")
+
+    adapter = get_gateway(gateway, args.protocol)
+    all_results = []
+
+    for i in range(1, ITERATIONS + 1):
+        print(f"\n--- {args.protocol} reload storm {i}/{ITERATIONS} ---")
+        rows = run_storm(adapter, gateway, i)
+        all_results.extend(rows)
+        baseline, *reloads = [dict(zip(HEADER, row)) for row in rows]
+        worst_p99 = max((r["p99_ms"] for r in reloads if r["p99_ms"] is not None), default=None)
+        max_processes = max((r["processes"] for r in reloads if r["processes"] is not None), default=None)
+        print(
+            f"[OK] baseline p99 {baseline['p99_ms']} ms, worst reload window p99 {worst_p99} ms, "
+            f"{sum(r['errors'] for r in reloads)} errors ({sum(r['resets'] for r in reloads)} resets), "
+            f"processes {baseline['processes']} -> {max_processes}"
+        )
+        time.sleep(SLEEP_BETWEEN_RUNS)
+    adapter.close()
+
+    # save results
+    with open(RESULTS_FILE, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        writer.writerows(all_results)
+
+    print(f"✅ Results saved to {RESULTS_FILE}")
+
+    if args.store:
+        # imported on demand, the store needs pyarrow
+        from common.result_store import store_rows
+        # own run id, the rows have a different schema than the sequential switch measurements
+        run = (args.run or time.strftime("%Y%m%d_%H%M%S")) + "_reload_load"
+        path = store_rows(args.store, "2-dynamic-reconfiguration", run, gateway,
+                          HEADER, all_results, protocol=args.protocol, concurrency=args.streams,
+                          parameters={"iterations": ITERATIONS, "reloads": args.reloads,
+                                      "interval": args.interval, "rate": args.rate,
+                                      "streams": args.streams})
+        print(f"[INFO] Results stored in {path}")
+
+
+if __name__ == "__main__":
+    run_experiment(args.gateway)
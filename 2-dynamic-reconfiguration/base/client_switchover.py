@@ -0,0 +1,128 @@
+import argparse
+import time
+import csv
+import os
+import sys
+from pathlib import Path
+from utils import ensure_results_dir, get_gateway, GATEWAY_PORT
+
+# CLI arguments
+parser = argparse.ArgumentParser(
+    description="Gateway testing and measurement client for Scenario 2: switchover under continuous high-rate load")
+parser.add_argument("--gateway", required=True,
+                    help="Name of the gateway container (e.g. haproxy, traefik, tyk)")
+parser.add_argument("--protocol", default=os.getenv("MODE", "http"), choices=["http", "grpc"],
+                    help="Protocol of the requests (default: $MODE)")
+parser.add_argument("--method", default="reload", choices=["reload", "hot-swap"],
+                    help="reload: rewrite the config file and reload, "
+                         "hot-swap: switch the upstream through the gateway's runtime API")
+parser.add_argument("--iterations", type=int, default=30,
+                    help="Number of experiment iterations")
+parser.add_argument("--rate", type=float, default=1000,
+                    help="Requests per second of all streams together")
+parser.add_argument("--streams", type=int, default=8,
+                    help="Number of concurrent request streams, each on its own connection")
+parser.add_argument("--timeout", type=float, default=1,
+                    help="Request timeout in seconds")
+parser.add_argument("--store", default=None,
+                    help="Also append the results to the result store at this path (requires pyarrow)")
+parser.add_argument("--run", default=None,
+                    help="Run id in the result store (default: current timestamp)")
+args = parser.parse_args()
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common.switchover import SwitchoverLoad, evaluate_switch  # noqa: E402
+
+# Experiment parameters
+ITERATIONS = args.iterations
+SLEEP_BETWEEN_RUNS = 2  # seconds between iterations
+SWITCH_DELAY = 3  # seconds until config change
+# total runtime per iteration in seconds (must be greater than SWITCH_DELAY)
+RUN_TIME = 6
+TARGET_URL = (f"http://localhost:{GATEWAY_PORT}/" if args.protocol == "http"
+              else f"localhost:{GATEWAY_PORT}")
+RESULTS_DIR = "../results"
+RESULTS_NAME = "switchover" if args.method == "reload" else "hotswap"
+RESULTS_FILE = os.path.join(
+    RESULTS_DIR, f"{args.protocol}_{RESULTS_NAME}_{args.gateway}.csv")
+
+
+def run_experiment(gateway):
+    adapter = get_gateway(gateway, args.protocol)
+    if args.method == "hot-swap" and not adapter.supports_hot_swap:
+        print(f"[INFO] {gateway} has no runtime API for switching upstreams, skipping hot swap")
+        return
+
+    ensure_results_dir(RESULTS_DIR)
+    print(f"Running {args.protocol} {args.method} switchover for {gateway} at {args.rate:g} RPS "
+          f"({args.streams} streams)")
+
+    all_results = []
+
+    for i in range(1, ITERATIONS + 1):
+        print(f"\n--- {args.protocol} {args.method} switchover iteration {i}/{ITERATIONS} ---")
+
+        with SwitchoverLoad(TARGET_URL, args.rate, args.streams, args.timeout, args.protocol) as load:
+            time.sleep(SWITCH_DELAY)
+            if args.method == "hot-swap":
+                print("[INFO] Switching upstream through the runtime API")
+                switch_ns = adapter.hot_swap()
+            else:
+                print("[INFO] Triggering config change / reload")
+                # measured from the reload trigger, rewriting the config file is not included
+                switch_ns = adapter.apply()
+            time.sleep(RUN_TIME - SWITCH_DELAY)
+
+        metrics = evaluate_switch(load.samples, switch_ns)
+        all_results.append([i, gateway, args.protocol, args.method, round(load.wall_ms(switch_ns), 3),
+                            *metrics.values()])
+        print(
+            f"[OK] {metrics['old_backend']} -> {metrics['new_backend']}: "
+            f"first new {metrics['first_new_ms']} ms, last old {metrics['last_old_ms']} ms, "
+            f"mixed {metrics['mixed_window_ms']} ms, {metrics['errors']}/{metrics['requests']} errors"
+        )
+
+        time.sleep(SLEEP_BETWEEN_RUNS)
+
+    # save results
+    header = [
+        "iteration",
+        "gateway",
+        "protocol",
+        "method",
+        "switch_ts_ms",
+        "old_backend",
+        "new_backend",
+        "first_new_ms",
+        "last_old_ms",
+        "mixed_window_ms",
+        "requests",
+        "errors",
+        "error_types",
+        "in_flight",
+        "in_flight_errors"
+    ]
+    with open(RESULTS_FILE, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(all_results)
+
+    print(f"✅ Results saved to {RESULTS_FILE}")
+
+    if args.store:
+        # imported on demand, the store needs pyarrow
+        from common.result_store import store_rows
+        # own run id, the rows have a different schema than the sequential switch measurements
+        run = (args.run or time.strftime("%Y%m%d_%H%M%S")) + f"_{RESULTS_NAME}"
+        path = store_rows(args.store, "2-dynamic-reconfiguration", run, gateway,
+                          header, all_results, protocol=args.protocol, concurrency=args.streams,
+                          parameters={"iterations": ITERATIONS, "method": args.method,
+                                      "rate": args.rate, "streams": args.streams})
+        print(f"[INFO] Results stored in {path}")
+    # the next runs start from the routing of the config file again
+    adapter.restore()
+    adapter.close()
+
+
+if __name__ == "__main__":
+    run_experiment(args.gateway)
@@ -0,0 +1,356 @@
+"""
+Gateway adapters for the dynamic reconfiguration experiments.
+
+An adapter switches the route of a gateway between echo-a and echo-b
+(switch_route), makes the gateway pick up the change (reload) and can check
+its health and scrape its metrics. Reloads go through in-process API calls
+instead of `docker compose exec`, so no CLI is forked inside the measured
+switch window:
+
+    haproxy  `reload` on the master CLI (-S, ADMIN_PORT, default 9999)
+    nginx    SIGHUP to the master process through the Docker Engine API
+    caddy    POST of the Caddyfile to the admin API /load (ADMIN_PORT, default 2019),
+             `caddy reload` via Docker exec if the admin API is not published
+    traefik  nothing, the file provider watches the dynamic configuration
+    tyk      /tyk/reload?block=true on the gateway's REST API
+
+Gateways that can change the upstream in place also implement hot_swap(),
+which switches between echo-a and echo-b without touching the config file
+and without a reload (restore() returns to the target of the config file):
+
+    haproxy  `set server <backend>/<server> addr <ip> port <port>` on the
+             worker's runtime API (through the master CLI), with the address
+             of the echo container from the Docker Engine API
+    caddy    PATCH of the reverse proxy's upstream in the admin JSON API
+    traefik  PUT of an overriding router to the REST provider (the HTTP
+             provider would poll; the REST provider is pushed to)
+
+Further gateways are plugins: a module that subclasses GatewayAdapter and
+decorates it with @register("envoy") is imported from the comma-separated
+module list in GATEWAY_ADAPTERS (e.g. GATEWAY_ADAPTERS=envoy_adapter).
+"""
+import http.client
+import importlib
+import json
+import os
+import re
+import socket
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common.docker_engine import DockerEngine, DockerError  # noqa: E402
+
+# host ports of the gateway and its admin API (set by the orchestrator when stacks run in parallel)
+GATEWAY_PORT = os.getenv("GATEWAY_PORT", "8080")
+ADMIN_PORT = os.getenv("ADMIN_PORT")
+SCENARIO_DIR = Path(__file__).resolve().parents[1]
+TARGETS = ("echo-a", "echo-b")
+ECHO_PORTS = {"http": 5001, "grpc": 5002}
+
+ADAPTERS = {}
+
+
+def register(name):
+    """Class decorator adding a GatewayAdapter to the registry under the given gateway name."""
+    def decorator(cls):
+        cls.name = name
+        ADAPTERS[name] = cls
+        return cls
+    return decorator
+
+
+def load_plugins():
+    """Import the adapter modules listed in GATEWAY_ADAPTERS."""
+    for module in filter(None, os.getenv("GATEWAY_ADAPTERS", "").split(",")):
+        importlib.import_module(module.strip())
+
+
+def get_adapter(gateway, mode=None):
+    """Adapter instance for a gateway in the given mode (http or grpc, default: $MODE)."""
+    if gateway not in ADAPTERS:
+        load_plugins()
+    if gateway not in ADAPTERS:
+        raise KeyError(f"No adapter for gateway '{gateway}' (known: {', '.join(sorted(ADAPTERS))})")
+    return ADAPTERS[gateway](mode or os.environ["MODE"])
+
+
+def http_call(port, method, path, body=None, headers=None, timeout=5):
+    """HTTP request to localhost:port, returns (status, body)."""
+    conn = http.client.HTTPConnection("localhost", int(port), timeout=timeout)
+    try:
+        conn.request(method, path, body, headers or {})
+        resp = conn.getresponse()
+        return resp.status, resp.read()
+    finally:
+        conn.close()
+
+
+class GatewayAdapter:
+    """Base adapter: config file toggle, Docker based health and resource metrics."""
+
+    name = None
+    container = None  # container name, default: the gateway name
+    config = None  # config file relative to the scenario directory, {mode} is replaced
+    admin_port = None  # default host port of the admin API
+
+    def __init__(self, mode):
+        self.mode = mode
+        self.container = self.container or self.name
+        self.config_path = SCENARIO_DIR / self.config.format(mode=mode) if self.config else None
+        self._engine = None
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            self._engine = DockerEngine()
+        return self._engine
+
+    @property
+    def admin(self):
+        return ADMIN_PORT or self.admin_port
+
+    def close(self):
+        if self._engine is not None:
+            self._engine.close()
+
+    def config_target(self):
+        """The echo service the config file routes to."""
+        return TARGETS[0] if TARGETS[0] in self.config_path.read_text() else TARGETS[1]
+
+    def switch_route(self):
+        """Point the route to the other echo service in the config file. Returns the new target."""
+        text = self.config_path.read_text()
+        old, new = TARGETS if TARGETS[0] in text else reversed(TARGETS)
+        self.config_path.write_text(text.replace(old, new))
+        return new
+
+    def reload(self):
+        """Make the gateway pick up the changed configuration."""
+        raise NotImplementedError
+
+    def apply(self):
+        """
+        Switch the route and reload. Returns the time.monotonic_ns() at which the
+        reload was triggered, so that rewriting the file is not part of the
+        measured switch time.
+        """
+        self.switch_route()
+        trigger_ns = time.monotonic_ns()
+        self.reload()
+        return trigger_ns
+
+    @property
+    def supports_hot_swap(self):
+        return type(self).hot_swap is not GatewayAdapter.hot_swap
+
+    def hot_swap(self):
+        """
+        Switch to the other echo service in place, without a reload. Returns the
+        time.monotonic_ns() at which the change was sent.
+        """
+        raise NotImplementedError(f"{self.name} cannot switch upstreams without a reload")
+
+    def restore(self):
+        """Undo hot swaps: route to the target of the config file again."""
+
+    def next_target(self):
+        """Target of the next hot swap (the first swap leaves the config file's target)."""
+        current = getattr(self, "live_target", None) or self.config_target()
+        self.live_target = TARGETS[1] if current == TARGETS[0] else TARGETS[0]
+        return self.live_target
+
+    def healthy(self):
+        try:
+            return self.engine.running(self.container)
+        except (DockerError, OSError):
+            return False
+
+    def metrics(self):
+        """Memory use and process count of the gateway container (plus gateway specific values)."""
+        return {"memory_bytes": self.engine.memory_bytes(self.container),
+                "processes": self.engine.processes(self.container)}
+
+
+@register("haproxy")
+class HAProxyAdapter(GatewayAdapter):
+    container = "gateway"
+    config = "haproxy/{mode}/haproxy.cfg"
+    admin_port = 9999
+
+    def master_cli(self, command):
+        """Send one command to the master CLI and return its output."""
+        with socket.create_connection(("localhost", int(self.admin)), timeout=10) as sock:
+            sock.sendall(command.encode() + b"\n")
+            chunks = []
+            while chunk := sock.recv(65536):
+                chunks.append(chunk)
+        return b"".join(chunks).decode(errors="replace")
+
+    def reload(self):
+        # the master CLI answers when the new worker started (or failed to)
+        output = self.master_cli("reload")
+        if not output.startswith("Success=1"):
+            print(f"[WARN] HAProxy reload failed: {output.strip()}")
+
+    def set_server(self, target):
+        """Point the backend's server to the address of an echo container (runtime API)."""
+        config = self.config_path.read_text()
+        backend = re.search(r"^backend (\S+)", config, re.MULTILINE).group(1)
+        server = re.search(r"^\s*server (\S+) echo-", config, re.MULTILINE).group(1)
+        networks = self.engine.inspect(f"echo-{self.mode}-{target[-1]}-{self.name}")["NetworkSettings"]["Networks"]
+        ip = next(n["IPAddress"] for n in networks.values() if n.get("IPAddress"))
+        command = f"@1 set server {backend}/{server} addr {ip} port {ECHO_PORTS[self.mode]}"
+        trigger_ns = time.monotonic_ns()
+        output = self.master_cli(command).strip()
+        if output and "changed" not in output:
+            print(f"[WARN] {command} failed: {output}")
+        return trigger_ns
+
+    def hot_swap(self):
+        return self.set_server(self.next_target())
+
+    def restore(self):
+        if getattr(self, "live_target", None):
+            self.set_server(self.config_target())
+            self.live_target = None
+
+    def healthy(self):
+        try:
+            return "worker" in self.master_cli("show proc")
+        except OSError:
+            return False
+
+    def metrics(self):
+        values = super().metrics()
+        # "@1" forwards the command to the current worker
+        for line in self.master_cli("@1 show info").splitlines():
+            key, _, value = line.partition(": ")
+            if value.isdigit():
+                values[key] = int(value)
+        return values
+
+
+@register("nginx")
+class NginxAdapter(GatewayAdapter):
+    config = "nginx/{mode}/nginx.conf"
+
+    def reload(self):
+        self.engine.kill(self.container, "SIGHUP")
+
+
+@register("caddy")
+class CaddyAdapter(GatewayAdapter):
+    config = "caddy/{mode}/Caddyfile"
+    admin_port = 2019
+
+    def reload(self):
+        try:
+            status, body = http_call(self.admin, "POST", "/load", self.config_path.read_bytes(),
+                                     {"Content-Type": "text/caddyfile"}, timeout=10)
+        except OSError:
+            # admin API not published, reload through the Docker Engine API instead
+            exit_code, output = self.engine.exec(
+                self.container, ["caddy", "reload", "--config", "/etc/caddy/Caddyfile"])
+            if exit_code != 0:
+                print(f"[WARN] caddy reload exited with {exit_code}: {output.strip()}")
+            return
+        if status != 200:
+            print(f"[WARN] Caddy /load failed: {status} {body.decode(errors='replace')}")
+
+    def upstream_path(self, node, path="/config/apps/http/servers"):
+        """Admin API path of the first reverse_proxy upstream's dial address in the config tree."""
+        if isinstance(node, dict):
+            if node.get("handler") == "reverse_proxy":
+                return f"{path}/upstreams/0/dial"
+            items = node.items()
+        elif isinstance(node, list):
+            items = enumerate(node)
+        else:
+            return None
+        for key, child in items:
+            found = self.upstream_path(child, f"{path}/{key}")
+            if found:
+                return found
+        return None
+
+    def hot_swap(self):
+        status, body = http_call(self.admin, "GET", "/config/apps/http/servers")
+        path = self.upstream_path(json.loads(body))
+        dial = json.dumps(f"{self.next_target()}:{ECHO_PORTS[self.mode]}")
+        trigger_ns = time.monotonic_ns()
+        status, body = http_call(self.admin, "PATCH", path, dial, {"Content-Type": "application/json"})
+        if status != 200:
+            print(f"[WARN] Caddy upstream change failed: {status} {body.decode(errors='replace')}")
+        return trigger_ns
+
+    def restore(self):
+        if getattr(self, "live_target", None):
+            self.reload()
+            self.live_target = None
+
+    def healthy(self):
+        try:
+            return http_call(self.admin, "GET", "/config/")[0] == 200
+        except OSError:
+            return super().healthy()
+
+
+@register("traefik")
+class TraefikAdapter(GatewayAdapter):
+    config = "traefik/dynamic_conf_{mode}/dynamic_conf.yml"
+    admin_port = 9000
+    schemes = {"http": "http", "grpc": "h2c"}
+
+    def rest_config(self, config):
+        status, body = http_call(self.admin, "PUT", "/api/providers/rest", json.dumps(config),
+                                 {"Content-Type": "application/json"})
+        if status != 200:
+            print(f"[WARN] Traefik REST provider update failed: {status} {body.decode(errors='replace')}")
+
+    def hot_swap(self):
+        # a router with a higher priority than the file provider's router overrides it
+        url = f"{self.schemes[self.mode]}://{self.next_target()}:{ECHO_PORTS[self.mode]}/"
+        config = {"http": {
+            "routers": {"hotswap": {"entryPoints": ["web"], "rule": "PathPrefix(`/`)",
+                                    "priority": 1000, "service": "hotswap"}},
+            "services": {"hotswap": {"loadBalancer": {"servers": [{"url": url}]}}},
+        }}
+        trigger_ns = time.monotonic_ns()
+        self.rest_config(config)
+        return trigger_ns
+
+    def restore(self):
+        if getattr(self, "live_target", None):
+            self.rest_config({})
+            self.live_target = None
+
+    def apply(self):
+        # writing the file is the trigger, the file provider picks it up by itself
+        trigger_ns = time.monotonic_ns()
+        self.switch_route()
+        return trigger_ns
+
+    def reload(self):
+        pass
+
+
+@register("tyk")
+class TykAdapter(GatewayAdapter):
+    config = "tyk/{mode}/apps/echo-service-api.json"
+    secret = "12345"
+
+    def reload(self):
+        # block=true answers when the APIs are loaded instead of when the reload is queued
+        status, body = http_call(GATEWAY_PORT, "GET", "/tyk/reload?block=true",
+                                 headers={"x-tyk-authorization": self.secret}, timeout=10)
+        if status != 200:
+            print(f"[WARN] Tyk reload failed: {status} {body.decode(errors='replace')}")
+
+    def healthy(self):
+        try:
+            status, body = http_call(GATEWAY_PORT, "GET", "/hello")
+            return status == 200 and json.loads(body).get("status") == "pass"
+        except (OSError, ValueError):
+            return False
@@ -1,6 +1,28 @@
 #!/bin/bash
 set -e
 
+# RESULT_STORE=<dir> additionally appends all measurements to the shared result store
+STORE_ARGS=""
+if [ -n "$RESULT_STORE" ]; then
+  STORE_ARGS="--store $(realpath "$RESULT_STORE") --run $(date +%Y%m%d_%H%M%S)"
+fi
+
+# RESOURCES=0 disables sampling the cgroup v2 resource use of the containers during the
+# switch iterations (common/resource_sampler.py), METRICS=0 scraping the gateway's own
+# metrics endpoint (common/gateway_metrics.py)
+instrument_args() {
+  if [ "${RESOURCES:-1}" == "1" ]; then
+    echo "--resources ../results/resources_$1_$2.csv"
+  fi
+  if [ "${METRICS:-1}" == "1" ]; then
+    echo "--metrics ../results/metrics_$1_$2.csv"
+  fi
+}
+
+# SWITCHOVER=0 skips the switchover measurement under continuous load (client_switchover.py),
+# RELOAD_STORM=0 the repeated reloads under sustained load (client_reload_load.py),
+# HOTSWAP=0 the switchover through the runtime API without a reload (client_switchover.py --method hot-swap)
+
 for gw in haproxy nginx traefik tyk; do
   cd $gw
 
@@ -19,7 +41,16 @@ for gw in haproxy nginx traefik tyk; do
   sleep 5
 
   echo "Running client experiment..."
-  python3 ../base/client_http.py --gateway $gw --iterations 100
+  python3 ../base/client_http.py --gateway $gw --iterations 100 $STORE_ARGS $(instrument_args http $gw)
+  if [ "${SWITCHOVER:-1}" == "1" ]; then
+    python3 ../base/client_switchover.py --gateway $gw --protocol http --iterations 100 $STORE_ARGS
+  fi
+  if [ "${RELOAD_STORM:-1}" == "1" ]; then
+    python3 ../base/client_reload_load.py --gateway $gw --protocol http $STORE_ARGS
+  fi
+  if [ "${HOTSWAP:-1}" == "1" ]; then
+    python3 ../base/client_switchover.py --gateway $gw --protocol http --method hot-swap --iterations 100 $STORE_ARGS
+  fi
 
   echo "Stopping environment..."
   docker compose down -v
@@ -40,7 +71,16 @@ for gw in haproxy nginx traefik tyk; do
   sleep 5
 
   echo "Running client experiment..."
-  python3 ../base/client_grpc.py --gateway $gw --iterations 100
+  python3 ../base/client_grpc.py --gateway $gw --iterations 100 $STORE_ARGS $(instrument_args grpc $gw)
+  if [ "${SWITCHOVER:-1}" == "1" ]; then
+    python3 ../base/client_switchover.py --gateway $gw --protocol grpc --iterations 100 $STORE_ARGS
+  fi
+  if [ "${RELOAD_STORM:-1}" == "1" ]; then
+    python3 ../base/client_reload_load.py --gateway $gw --protocol grpc $STORE_ARGS
+  fi
+  if [ "${HOTSWAP:-1}" == "1" ]; then
+    python3 ../base/client_switchover.py --gateway $gw --protocol grpc --method hot-swap --iterations 100 $STORE_ARGS
+  fi
 
   echo "Stopping environment..."
   docker compose down -v
@@ -0,0 +1,291 @@
+"""
+Streaming statistics for the load test results, importable from the notebooks.
+
+Every results CSV (one per gateway, number of requests and concurrency) is read
+in chunks with compact dtypes and reduced to count, mean, std, min, max,
+status codes and an HDR histogram of the response times. Percentiles and
+boxplot statistics are taken from the histogram, so the raw rows never have to
+be held in memory at once. The reduced summaries are cached in .cache/,
+keyed by a hash of the file content, so re-running a notebook only parses
+files that changed.
+"""
+import hashlib
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common.gateway_metrics import merge_timeline  # noqa: E402
+from common.hdr_histogram import HdrHistogram  # noqa: E402
+
+CACHE_DIR = Path(__file__).resolve().parent / ".cache"
+CACHE_VERSION = 1
+CHUNK_SIZE = 250_000
+DTYPES = {
+    "response-time": "float32",
+    "DNS+dialup": "float32",
+    "DNS": "float32",
+    "Request-write": "float32",
+    "Response-delay": "float32",
+    "Response-read": "float32",
+    "status-code": "int16",
+    "offset": "float32",
+}
+
+
+def file_hash(path: Path):
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def parse_file_name(path: Path):
+    # file name for example: haproxy_http_5000_10.csv (gateway_protocol_numberOfRequests_concurrency)
+    gateway, protocol, number_of_requests, concurrency = path.stem.split("_")
+    return {
+        "gateway": gateway,
+        "protocol": protocol,
+        "numberOfRequests": number_of_requests,
+        "concurrency": concurrency,
+    }
+
+
+def summarize_file(path: Path, chunksize=CHUNK_SIZE):
+    """Reduce one results CSV to its summary in a single streaming pass (response time in ms)."""
+    hist = HdrHistogram()
+    count = 0
+    mean = 0.0
+    m2 = 0.0
+    statuses = {}
+    duration = 0.0
+    for chunk in pd.read_csv(path, dtype=DTYPES, chunksize=chunksize,
+                             usecols=["response-time", "status-code", "offset"]):
+        rt = chunk["response-time"].to_numpy(dtype=np.float64) * 1000
+        if not len(rt):
+            continue
+        # merge the chunk's mean and variance (Chan et al.)
+        n = len(rt)
+        chunk_mean = rt.mean()
+        chunk_m2 = ((rt - chunk_mean) ** 2).sum()
+        delta = chunk_mean - mean
+        total = count + n
+        mean += delta * n / total
+        m2 += chunk_m2 + delta * delta * count * n / total
+        count = total
+        # record microseconds to keep 3 significant digits for sub-millisecond values
+        hist.record_many(rt * 1000)
+        for status, c in chunk["status-code"].value_counts().items():
+            statuses[str(status)] = statuses.get(str(status), 0) + int(c)
+        duration = max(duration, float((chunk["offset"] + chunk["response-time"]).max()))
+    return {
+        **parse_file_name(path),
+        "count": count,
+        "mean": mean,
+        "std": float(np.sqrt(m2 / (count - 1))) if count > 1 else 0.0,
+        "min": hist.min / 1000 if count else np.nan,
+        "max": hist.max / 1000 if count else np.nan,
+        "duration_s": duration,
+        "statuses": statuses,
+        "histogram": hist.encode(),
+    }
+
+
+def cached_summary(path: Path):
+    """Summary of a results CSV, parsed only if no cached summary of identical content exists."""
+    CACHE_DIR.mkdir(exist_ok=True)
+    cache_file = CACHE_DIR / f"{path.stem}-{file_hash(path)}-v{CACHE_VERSION}.json"
+    if cache_file.exists():
+        return json.loads(cache_file.read_text())
+    summary = summarize_file(path)
+    cache_file.write_text(json.dumps(summary))
+    return summary
+
+
+def load_summaries(results_dir):
+    """
+    Summaries of all CSV files in a results directory.
+
+    Returns (summary DataFrame with one row per gateway/protocol/numberOfRequests/concurrency,
+    dict of HDR histograms in microseconds keyed by the same tuple). The protocol is
+    part of the key, the http, grpc and grpc-stream runs share the 10-seconds directory.
+    """
+    rows = []
+    histograms = {}
+    for path in sorted(Path(results_dir).glob("*.csv")):
+        summary = cached_summary(path)
+        hist = HdrHistogram.decode(summary.pop("histogram"))
+        key = (summary["gateway"], summary["protocol"], summary["numberOfRequests"], summary["concurrency"])
+        histograms[key] = hist
+        statuses = summary.pop("statuses")
+        summary["non_2xx"] = sum(c for s, c in statuses.items() if not s.startswith("2"))
+        summary["median"] = hist.value_at_percentile(50) / 1000
+        summary["p90"] = hist.value_at_percentile(90) / 1000
+        summary["p99"] = hist.value_at_percentile(99) / 1000
+        summary["p99.9"] = hist.value_at_percentile(99.9) / 1000
+        summary["requests_per_s"] = summary["count"] / summary["duration_s"] if summary["duration_s"] else np.nan
+        rows.append(summary)
+    df = pd.DataFrame(rows)
+    if not df.empty:
+        df["gateway"] = df["gateway"].astype("category")
+        df["protocol"] = df["protocol"].astype("category")
+    return df, histograms
+
+
+def load_lb_results(results_dir):
+    """
+    Results of the load-balancing runs (gateway_algorithm_replicas_concurrency.csv
+    with the responses per replica in ..._backends.csv).
+
+    Returns (summary DataFrame with throughput, latency and the imbalance of the
+    distribution per run, DataFrame with one row per run and replica). The
+    imbalance is the busiest replica's share relative to an even share (1.0 =
+    perfectly even), cv the coefficient of variation of the per-replica counts.
+    """
+    rows = []
+    shares = []
+    for path in sorted(Path(results_dir).glob("*_backends.csv")):
+        data = path.with_name(path.name.replace("_backends", ""))
+        gateway, algorithm, replicas, concurrency = data.stem.split("_")
+        key = {"gateway": gateway, "algorithm": algorithm,
+               "replicas": int(replicas), "concurrency": int(concurrency)}
+        backends = pd.read_csv(path)
+        # replicas that got no request at all are missing from the counts
+        counts = np.zeros(int(replicas))
+        counts[:len(backends)] = np.sort(backends["responses"].to_numpy())[::-1][:int(replicas)]
+        for backend, count, share in backends.itertuples(index=False):
+            shares.append({**key, "backend": backend, "responses": count, "share": share})
+        summary = cached_summary(data) if data.exists() else None
+        hist = HdrHistogram.decode(summary["histogram"]) if summary else None
+        rows.append({
+            **key,
+            "count": int(counts.sum()),
+            "requests_per_s": summary["count"] / summary["duration_s"]
+            if summary and summary["duration_s"] else np.nan,
+            "median": hist.value_at_percentile(50) / 1000 if hist and hist.total_count else np.nan,
+            "p99": hist.value_at_percentile(99) / 1000 if hist and hist.total_count else np.nan,
+            "imbalance": counts.max() / counts.mean() if counts.sum() else np.nan,
+            "cv": counts.std() / counts.mean() if counts.sum() else np.nan,
+        })
+    return pd.DataFrame(rows), pd.DataFrame(shares)
+
+
+def container_role(name):
+    """Role of a container of the load test stacks: echo, redis or gateway."""
+    if name.startswith("echo-"):
+        return "echo"
+    return "redis" if "redis" in name else "gateway"
+
+
+def load_resources(resources_dir, summary: pd.DataFrame):
+    """
+    Resource use per run from the samples of common/resource_sampler.py
+    (results/<run>/resources/<profile>/*.csv), joined with the summaries of the
+    same profile (load_summaries). Only samples during the load count.
+
+    Returns one row per run with the mean CPU cores of the gateway and of all
+    echo replicas, the gateway's peak memory, TCP sockets and context switches
+    per second, requests_per_core (throughput per busy gateway core; echo cores
+    for the upstream baseline) and memory_mb_per_1k_conn.
+    """
+    rows = []
+    for path in sorted(Path(resources_dir).glob("*.csv")):
+        key = parse_file_name(path)
+        samples = pd.read_csv(path)
+        run = summary
+        for column, value in key.items():
+            run = run[run[column].astype(str) == value]
+        duration = run["duration_s"].iloc[0] if len(run) else samples["offset_s"].max()
+        samples = samples[(samples["offset_s"] >= 0) & (samples["offset_s"] <= duration)]
+        roles = samples["container"].map(container_role)
+        gateway = samples[roles == "gateway"]
+        echo_cores = samples[roles == "echo"].groupby("container")["cpu_cores"].mean().sum()
+        gateway_cores = gateway["cpu_cores"].mean() if len(gateway) else np.nan
+        span = gateway["offset_s"].max() - gateway["offset_s"].min() if len(gateway) > 1 else np.nan
+        requests_per_s = run["requests_per_s"].iloc[0] if len(run) else np.nan
+        load_cores = echo_cores if key["gateway"] == "upstream" else gateway_cores
+        memory_mb = gateway["memory_bytes"].max() / 2**20 if len(gateway) else np.nan
+        rows.append({
+            **key,
+            "requests_per_s": requests_per_s,
+            "gateway_cores": gateway_cores,
+            "echo_cores": echo_cores,
+            "gateway_memory_mb": memory_mb,
+            "gateway_tcp_sockets": gateway["tcp_sockets"].max() if len(gateway) else np.nan,
+            "context_switches_per_s": (gateway["context_switches"].iloc[-1] - gateway["context_switches"].iloc[0])
+            / span if span else np.nan,
+            "requests_per_core": requests_per_s / load_cores if load_cores else np.nan,
+            "memory_mb_per_1k_conn": memory_mb / int(key["concurrency"]) * 1000,
+        })
+    return pd.DataFrame(rows)
+
+
+def metrics_timeline(results_csv, metrics_csv, window=1.0):
+    """
+    Client latencies of one run next to the gateway metrics scraped during it
+    (common/gateway_metrics.py), per window of `window` seconds: throughput and
+    p50/p99 latency (ms) of the client, mean active and upstream connections and
+    queue depth at the gateway, and its 5xx and retry rates.
+    """
+    latency = pd.read_csv(results_csv, dtype=DTYPES, usecols=["response-time", "status-code", "offset"])
+    merged = merge_timeline(latency, pd.read_csv(metrics_csv))
+    merged["window"] = (merged["offset"] // window) * window
+    grouped = merged.groupby("window")
+    return pd.DataFrame({
+        "requests_per_s": grouped.size() / window,
+        "p50_ms": grouped["response-time"].quantile(0.5) * 1000,
+        "p99_ms": grouped["response-time"].quantile(0.99) * 1000,
+        **{column: grouped[column].mean() for column in (
+            "active_connections", "upstream_connections", "queue_depth", "responses_5xx_per_s", "retries_per_s")},
+    }).reset_index()
+
+
+def boxplot_stats(hist: HdrHistogram, label=None, whis=1.5, max_fliers=500):
+    """
+    Statistics for matplotlib's Axes.bxp from an HDR histogram in microseconds,
+    in milliseconds. Whiskers reach the most extreme values within whis * IQR
+    (like Axes.boxplot); fliers are represented by one value per histogram bucket.
+    """
+    q1 = hist.value_at_percentile(25) / 1000
+    q3 = hist.value_at_percentile(75) / 1000
+    iqr = q3 - q1
+    low_bound, high_bound = q1 - whis * iqr, q3 + whis * iqr
+    values = [hist.median_equivalent(i) / 1000 for i in sorted(hist.counts)]
+    inside = [v for v in values if low_bound <= v <= high_bound]
+    fliers = [v for v in values if v < low_bound or v > high_bound]
+    if len(fliers) > max_fliers:
+        fliers = fliers[:: len(fliers) // max_fliers + 1]
+    return {
+        "label": label,
+        "med": hist.value_at_percentile(50) / 1000,
+        "q1": q1,
+        "q3": q3,
+        "whislo": min(inside) if inside else q1,
+        "whishi": max(inside) if inside else q3,
+        "mean": hist.mean / 1000,
+        "fliers": fliers,
+    }
+
+
+def welch_ttest_matrix(summary: pd.DataFrame, group_col="gateway"):
+    """
+    Pairwise Welch's t-test p-values (like scikit_posthocs.posthoc_ttest with
+    equal_var=False) computed from the streamed mean, std and count.
+    """
+    from scipy.stats import ttest_ind_from_stats
+
+    groups = sorted(summary[group_col].astype(str).unique())
+    stats = summary.set_index(summary[group_col].astype(str))
+    matrix = pd.DataFrame(1.0, index=groups, columns=groups)
+    for a in groups:
+        for b in groups:
+            if a != b:
+                matrix.loc[a, b] = ttest_ind_from_stats(
+                    stats.loc[a, "mean"], stats.loc[a, "std"], stats.loc[a, "count"],
+                    stats.loc[b, "mean"], stats.loc[b, "std"], stats.loc[b, "count"],
+                    equal_var=False).pvalue
+    return matrix
@@ -0,0 +1,210 @@
+"""
+Throughput and latency over time of the load test runs, importable from the notebooks.
+
+The requests of a results CSV are binned by their `offset` (start time in
+seconds since the start of the run) into windows of 10-100 ms, vectorized with
+NumPy, giving per window the requests per second, the error rate (status codes
+outside 2xx/3xx, 0 for failed requests) and the p50/p99 response time.
+
+On these series the run is split into phases:
+
+    warm-up       from the start until the smoothed throughput first reaches
+                  (1 - TOLERANCE) of the steady level and the smoothed median
+                  latency is within (1 + TOLERANCE) of the steady median
+    steady state  from the end of the warm-up to the last window that still
+                  reaches the steady throughput (the tail where the client
+                  drains its last requests is excluded)
+    stalls        runs of at least STALL_MIN_MS in which the throughput drops
+                  below STALL_FRACTION of the steady level, e.g. garbage
+                  collection pauses of the Go gateways or a collapsing upstream
+
+The steady level is the median of the second half of the run, which is past
+the warm-up in all runs of the scenario. Figures for the steady state only are
+computed from the raw requests in that interval, so they can be reported
+without the warm-up. The per-run results of load_timelines() are cached in
+.cache/ like the summaries of load_stats.py.
+"""
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from load_stats import CACHE_DIR, DTYPES, file_hash, parse_file_name
+
+CACHE_VERSION = 1
+WINDOW_MS = 50
+SMOOTHING_MS = 500  # rolling window for the warm-up and steady-state detection
+TOLERANCE = 0.1
+STALL_FRACTION = 0.25
+STALL_MIN_MS = 100
+
+
+def read_run(path: Path):
+    """Offsets (s), response times (ms) and error flags of a results CSV as NumPy arrays."""
+    df = pd.read_csv(path, dtype=DTYPES, usecols=["response-time", "status-code", "offset"])
+    status = df["status-code"].to_numpy()
+    return (df["offset"].to_numpy(dtype=np.float64),
+            df["response-time"].to_numpy(dtype=np.float64) * 1000,
+            (status < 200) | (status >= 400))
+
+
+def binned_percentiles(bins, values, n_bins, percentiles):
+    """Nearest-rank percentiles of values per bin (NaN for empty bins), without a Python loop."""
+    order = np.lexsort((values, bins))
+    sorted_values = values[order]
+    counts = np.bincount(bins, minlength=n_bins)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    result = {}
+    for p in percentiles:
+        rank = np.minimum(counts - 1, (counts * p / 100).astype(np.int64))
+        index = np.clip(starts + rank, 0, max(len(sorted_values) - 1, 0))
+        taken = sorted_values[index] if len(sorted_values) else np.zeros(n_bins)
+        result[p] = np.where(counts > 0, taken, np.nan)
+    return result
+
+
+def timeseries(offset, latency_ms, failed, window_ms=WINDOW_MS):
+    """
+    Per window of window_ms: start (s), requests, requests_per_s, error_rate,
+    p50_ms and p99_ms. Windows without a request are kept (requests 0).
+    """
+    window = window_ms / 1000
+    bins = np.floor(offset / window).astype(np.int64)
+    n_bins = int(bins.max()) + 1 if len(bins) else 0
+    requests = np.bincount(bins, minlength=n_bins)
+    errors = np.bincount(bins, weights=failed, minlength=n_bins)
+    ok = ~failed
+    latency = binned_percentiles(bins[ok], latency_ms[ok], n_bins, (50, 99))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        error_rate = np.where(requests > 0, errors / requests, np.nan)
+    return pd.DataFrame({
+        "start_s": np.arange(n_bins) * window,
+        "requests": requests,
+        "requests_per_s": requests / window,
+        "error_rate": error_rate,
+        "p50_ms": latency[50],
+        "p99_ms": latency[99],
+    })
+
+
+def runs_of(mask):
+    """(first, last) indices of the runs of True in a boolean array."""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return list(zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1) - 1))
+
+
+def detect_phases(series: pd.DataFrame, window_ms=WINDOW_MS):
+    """
+    Warm-up end, steady-state interval (seconds) and stalls of a timeseries().
+
+    Returns {"warmup_s", "steady_start_s", "steady_end_s", "steady_level_rps",
+    "stalls": [{"start_s", "end_s", "duration_ms", "min_requests_per_s"}]}.
+    """
+    window = window_ms / 1000
+    rps = series["requests_per_s"].to_numpy()
+    if not len(rps):
+        return {"warmup_s": np.nan, "steady_start_s": np.nan, "steady_end_s": np.nan,
+                "steady_level_rps": np.nan, "stalls": []}
+    smoothing = max(1, round(SMOOTHING_MS / window_ms))
+    # centered, so the smoothing does not shift the phase boundaries
+    smooth_rps = series["requests_per_s"].rolling(smoothing, center=True, min_periods=1).mean().to_numpy()
+    smooth_p50 = series["p50_ms"].rolling(smoothing, center=True, min_periods=1).median().to_numpy()
+    second_half = slice(len(rps) // 2, None)
+    level = np.median(rps[second_half])
+    level_p50 = np.nanmedian(series["p50_ms"].to_numpy()[second_half]) \
+        if series["p50_ms"].iloc[second_half].notna().any() else np.nan
+
+    reached = smooth_rps >= (1 - TOLERANCE) * level
+    if not np.isnan(level_p50):
+        reached &= np.nan_to_num(smooth_p50, nan=np.inf) <= (1 + TOLERANCE) * level_p50
+    warmup_end = int(np.argmax(reached)) if reached.any() else len(rps)
+    full = np.flatnonzero(smooth_rps >= (1 - TOLERANCE) * level)
+    steady_end = int(full[-1]) + 1 if len(full) else len(rps)
+
+    stalls = []
+    if level > 0:
+        low = rps < STALL_FRACTION * level
+        low[:warmup_end] = False
+        low[steady_end:] = False
+        for first_bin, last_bin in runs_of(low):
+            duration_ms = (last_bin - first_bin + 1) * window_ms
+            if duration_ms >= STALL_MIN_MS:
+                stalls.append({
+                    "start_s": round(float(first_bin * window), 6),
+                    "end_s": round(float((last_bin + 1) * window), 6),
+                    "duration_ms": int(duration_ms),
+                    "min_requests_per_s": float(rps[first_bin:last_bin + 1].min()),
+                })
+    return {
+        "warmup_s": round(warmup_end * window, 6),
+        "steady_start_s": round(warmup_end * window, 6),
+        "steady_end_s": round(steady_end * window, 6),
+        "steady_level_rps": float(level),
+        "stalls": stalls,
+    }
+
+
+def steady_stats(offset, latency_ms, failed, start_s, end_s):
+    """Throughput, error rate and latency percentiles (ms) of the requests started in [start_s, end_s)."""
+    inside = (offset >= start_s) & (offset < end_s)
+    ok = latency_ms[inside & ~failed]
+    count = int(inside.sum())
+    duration = end_s - start_s
+    return {
+        "steady_requests_per_s": count / duration if duration > 0 else np.nan,
+        "steady_error_rate": float(failed[inside].mean()) if count else np.nan,
+        "steady_p50_ms": float(np.percentile(ok, 50)) if len(ok) else np.nan,
+        "steady_p99_ms": float(np.percentile(ok, 99)) if len(ok) else np.nan,
+    }
+
+
+def analyze_run(path: Path, window_ms=WINDOW_MS):
+    """
+    Timeline of one results CSV.
+
+    Returns (timeseries DataFrame, dict with the phases of detect_phases() and
+    the steady-state figures of steady_stats()).
+    """
+    offset, latency_ms, failed = read_run(path)
+    series = timeseries(offset, latency_ms, failed, window_ms)
+    phases = detect_phases(series, window_ms)
+    if np.isnan(phases["steady_start_s"]):
+        return series, phases
+    return series, {**phases, **steady_stats(offset, latency_ms, failed,
+                                            phases["steady_start_s"], phases["steady_end_s"])}
+
+
+def cached_phases(path: Path, window_ms=WINDOW_MS):
+    """Phases and steady-state figures of a results CSV, analyzed only if not cached."""
+    CACHE_DIR.mkdir(exist_ok=True)
+    cache_file = CACHE_DIR / f"{path.stem}-{file_hash(path)}-timeline{window_ms}-v{CACHE_VERSION}.json"
+    if cache_file.exists():
+        return json.loads(cache_file.read_text())
+    _, phases = analyze_run(path, window_ms)
+    cache_file.write_text(json.dumps(phases))
+    return phases
+
+
+def load_timelines(results_dir, window_ms=WINDOW_MS):
+    """
+    Phases of all CSV files in a results directory.
+
+    Returns (DataFrame with one row per run: warm-up, steady-state interval and
+    figures, number of stalls and the longest stall in ms; DataFrame with one row
+    per stall).
+    """
+    rows = []
+    stalls = []
+    for path in sorted(Path(results_dir).glob("*.csv")):
+        key = parse_file_name(path)
+        phases = dict(cached_phases(path, window_ms))
+        run_stalls = phases.pop("stalls")
+        stalls.extend({**key, **stall} for stall in run_stalls)
+        rows.append({
+            **key,
+            **phases,
+            "stalls": len(run_stalls),
+            "longest_stall_ms": max((s["duration_ms"] for s in run_stalls), default=0),
+        })
+    return pd.DataFrame(rows), pd.DataFrame(stalls)
@@ -0,0 +1,591 @@
+"""
+Load generator for Scenario 3: drop-in replacement for the external hey binary.
+
+Takes the same -n/-c/-z arguments as hey and writes the same CSV schema
+(response-time,DNS+dialup,DNS,Request-write,Response-delay,Response-read,status-code,offset),
+so existing results and notebooks remain comparable. Requests are sent over pooled
+keep-alive connections by asyncio workers that are spread over several processes,
+each with its own event loop (uvloop if installed).
+
+By default the load is closed-loop like hey (-c workers sending back to back).
+With --rate or --schedule the load is open-loop: requests are started at fixed
+intended times independent of how fast the gateway answers, and the latency is
+additionally measured from the intended start time (coordinated-omission
+correction) in the extra CSV columns intended-offset and corrected-response-time.
+
+With --protocol grpc or grpc-stream the same load is sent as unary Ping or
+bidirectional StreamPing calls of the Echo service (proto/echo.proto) over a
+pool of grpc.aio channels per process; every message is one CSV row with the
+whole latency in response-time/Response-delay and status-code 200 for OK.
+
+With --backends the responses are additionally counted per answering backend
+(the echo replica named in the response body) and written to a CSV file, which
+shows how evenly a gateway spreads the load over several replicas.
+
+With --resources the cgroup v2 counters (CPU, memory, I/O, context switches,
+TCP sockets) of the containers of the compose project in the working directory
+are sampled every 100 ms during the run (common/resource_sampler.py) and written
+to a CSV file whose offset_s column is on the same time base as `offset`.
+With --metrics the gateway's own counters (connections, queue, 5xx, retries) are
+scraped on the same time base (common/gateway_metrics.py, gateway from --gateway).
+
+With --hdr-log no per-request rows are kept: latencies are recorded into one HDR
+histogram per interval (default 1 s) and appended to an HdrHistogram log under
+the given --tag, which keeps long runs small in memory and on disk.
+"""
+import argparse
+import asyncio
+import itertools
+import math
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common.async_http import HttpConnection, Response, Target, install_uvloop  # noqa: E402
+from common.hdr_histogram import IntervalRecorder, write_log  # noqa: E402
+from common.switchover import backend_name  # noqa: E402
+
+CSV_HEADER = ("response-time,DNS+dialup,DNS,Request-write,"
+              "Response-delay,Response-read,status-code,offset")
+OPEN_LOOP_COLUMNS = ",intended-offset,corrected-response-time"
+START_DELAY = 0.5  # seconds given to the worker processes to start before the common start time
+PROTOCOLS = ["http", "grpc", "grpc-stream"]
+
+
+def parse_duration(value: str):
+    """Parse a hey-style duration such as '10s', '500ms', '2m' or '1h' into seconds."""
+    units = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    for unit in ("ms", "s", "m", "h"):
+        if value.endswith(unit):
+            return float(value[:-len(unit)]) * units[unit]
+    return float(value)
+
+
+def split_evenly(total: int, parts: int):
+    """Split total into parts integers that differ by at most one."""
+    return [total // parts + (1 if i < total % parts else 0) for i in range(parts)]
+
+
+class RateSchedule:
+    """
+    Piecewise linear arrival rate as a list of (duration_s, start_rps, end_rps) segments.
+
+    Spec formats:
+      500                     constant 500 RPS (duration given separately)
+      step:100,200,400@10s    100, 200 and 400 RPS for 10 seconds each
+      ramp:100:1000@60s       linear ramp from 100 to 1000 RPS within 60 seconds
+    """
+
+    def __init__(self, segments):
+        self.segments = segments
+
+    @property
+    def duration(self):
+        return sum(seg[0] for seg in self.segments)
+
+    @classmethod
+    def parse(cls, spec: str, duration=None):
+        kind, _, rest = spec.partition(":")
+        if not rest:
+            if duration is None:
+                raise ValueError("a constant rate needs a duration (-z) or number of requests (-n)")
+            rate = float(spec)
+            return cls([(duration, rate, rate)])
+        rates, _, length = rest.partition("@")
+        length = parse_duration(length)
+        if kind == "step":
+            return cls([(length, float(r), float(r)) for r in rates.split(",")])
+        if kind == "ramp":
+            start, end = (float(r) for r in rates.split(":"))
+            return cls([(length, start, end)])
+        raise ValueError(f"Unknown rate schedule: {spec}")
+
+    def intended_offsets(self):
+        """Yield the intended start offset (seconds) of every request in the schedule."""
+        seg_start = 0.0
+        due = 0.0  # requests due before the current segment
+        k = 0
+        for length, r0, r1 in self.segments:
+            slope = (r1 - r0) / length
+            # requests due within the segment: integral of the rate
+            total = r0 * length + slope * length * length / 2
+            while k < due + total:
+                n = k - due
+                if slope == 0:
+                    t = n / r0
+                else:
+                    # solve r0*t + slope*t^2/2 = n for t
+                    t = (-r0 + math.sqrt(r0 * r0 + 2 * slope * n)) / slope
+                yield seg_start + t
+                k += 1
+            due += total
+            seg_start += length
+
+
+def error_name(e):
+    """Error distribution key: the gRPC status code for failed calls, else the exception type."""
+    code = getattr(e, "code", None)
+    return f"grpc {code().name}" if callable(code) else type(e).__name__
+
+
+class GrpcConnection:
+    """
+    Unary Ping or bidirectional StreamPing calls with the request() interface of
+    HttpConnection. In streaming mode every request is one message on a
+    long-lived stream, which is reopened after an error.
+    """
+
+    def __init__(self, channel, stream, timeout=None, message="ping"):
+        # imported in the worker processes only, grpc must not be initialized before the fork
+        import grpc
+        import proto.echo_pb2 as echo_pb2
+        import proto.echo_pb2_grpc as echo_pb2_grpc
+
+        self.eof = grpc.aio.EOF
+        self.stub = echo_pb2_grpc.EchoStub(channel)
+        self.stream = stream
+        self.timeout = timeout
+        self.request_message = echo_pb2.EchoRequest(message=message)
+        self._call = None
+
+    async def request(self):
+        resp = Response()
+        start = time.perf_counter()
+        if self.stream:
+            try:
+                if self._call is None:
+                    self._call = self.stub.StreamPing()
+                await self._call.write(self.request_message)
+                read = self._call.read()
+                reply = await (asyncio.wait_for(read, self.timeout) if self.timeout else read)
+            except BaseException:
+                self.close()
+                raise
+            if reply is self.eof:
+                self.close()
+                raise ConnectionResetError("stream closed by the server")
+        else:
+            reply = await self.stub.Ping(self.request_message, timeout=self.timeout)
+        resp.status = 200
+        resp.body = reply.message.encode()
+        resp.total = resp.delay = time.perf_counter() - start
+        return resp
+
+    def close(self):
+        if self._call is not None:
+            self._call.cancel()
+            self._call = None
+
+
+def connection_factory(spec):
+    """Return a function creating one connection of the spec's protocol (HTTP or gRPC)."""
+    if spec["protocol"] == "http":
+        target = Target(spec["url"])
+        return lambda: HttpConnection(target, timeout=spec["timeout"], keep_alive=spec["keep_alive"])
+
+    import grpc
+
+    address = spec["url"].split("://", 1)[-1].rstrip("/")
+    # the workers of a process share a small pool of HTTP/2 channels round-robin
+    channels = itertools.cycle([grpc.aio.insecure_channel(address)
+                                for _ in range(spec["channels"])])
+    return lambda: GrpcConnection(next(channels), spec["protocol"] == "grpc-stream",
+                                  spec["timeout"], spec["message"])
+
+
+async def closed_loop_worker(connect, start, deadline, count, rows, errors, include_errors,
+                             backends=None):
+    """Send requests back to back over one connection (like a hey worker)."""
+    conn = connect()
+    done = 0
+    while count is None or done < count:
+        t = time.monotonic()
+        if deadline is not None and t >= deadline:
+            break
+        done += 1
+        try:
+            resp = await conn.request()
+        except Exception as e:
+            errors[error_name(e)] += 1
+            if include_errors:
+                rows.append((time.monotonic() - t, 0.0, 0.0, 0.0, 0.0, 0.0, 0, t - start))
+            continue
+        if backends is not None:
+            # counted per response body, the bodies are mapped to backend names once at the end
+            backends[resp.body] += 1
+        rows.append((resp.total, resp.dialup, resp.dns, resp.write,
+                     resp.delay, resp.read, resp.status, t - start))
+    conn.close()
+
+
+async def open_loop_request(idle, intended, start, rows, errors, include_errors, backends=None):
+    """Send one scheduled request on the next idle connection."""
+    conn = await idle.get()
+    t = time.monotonic()
+    try:
+        resp = await conn.request()
+    except Exception as e:
+        errors[error_name(e)] += 1
+        if include_errors:
+            end = time.monotonic()
+            rows.append((end - t, 0.0, 0.0, 0.0, 0.0, 0.0, 0, t - start,
+                         intended - start, end - intended))
+        return
+    finally:
+        idle.put_nowait(conn)
+    if backends is not None:
+        backends[resp.body] += 1
+    rows.append((resp.total, resp.dialup, resp.dns, resp.write, resp.delay,
+                 resp.read, resp.status, t - start,
+                 intended - start, t + resp.total - intended))
+
+
+async def open_loop_dispatcher(connect, start, spec, rows, errors, backends):
+    """
+    Start requests at their intended times, regardless of outstanding responses.
+    At most `concurrency` requests are in flight; further requests queue up and
+    the waiting time counts towards their corrected latency.
+    """
+    idle = asyncio.Queue()
+    for _ in range(spec["concurrency"]):
+        idle.put_nowait(connect())
+    tasks = set()
+    offsets = RateSchedule(spec["schedule"]).intended_offsets()
+    for offset in itertools.islice(offsets, spec["index"], None, spec["stride"]):
+        intended = start + offset
+        delay = intended - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        task = asyncio.create_task(open_loop_request(
+            idle, intended, start, rows, errors, spec["include_errors"], backends))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    if tasks:
+        await asyncio.wait(tasks)
+    while not idle.empty():
+        idle.get_nowait().close()
+
+
+async def run_workers(spec):
+    # rows are either kept per request or recorded into interval histograms
+    rows = IntervalRecorder(spec["interval"]) if spec["interval"] else []
+    errors = Counter()
+    backends = Counter() if spec["count_backends"] else None
+    connect = connection_factory(spec)
+    start = spec["start"]
+    deadline = start + spec["duration"] if spec["duration"] else None
+
+    await asyncio.sleep(max(0.0, start - time.monotonic()))
+    if spec["schedule"] is not None:
+        await open_loop_dispatcher(connect, start, spec, rows, errors, backends)
+        return rows, dict(errors), dict(backends or {})
+
+    counts = (split_evenly(spec["requests"], spec["concurrency"])
+              if spec["duration"] is None else [None] * spec["concurrency"])
+    await asyncio.gather(*(
+        closed_loop_worker(connect, start, deadline, count, rows, errors, spec["include_errors"], backends)
+        for count in counts))
+    return rows, dict(errors), dict(backends or {})
+
+
+def run_process(spec):
+    """Entry point of a worker process: run its share of the workers on its own event loop."""
+    if spec["uvloop"]:
+        install_uvloop()
+    return asyncio.run(run_workers(spec))
+
+
+def run_load(url, requests=200, concurrency=50, duration=None, processes=None,
+             timeout=20, keep_alive=True, use_uvloop=True, include_errors=False,
+             schedule=None, interval=None, protocol="http", channels=4, message="ping",
+             backends=None):
+    """
+    Run a load test and return (rows, errors, elapsed_seconds).
+    Rows are hey CSV tuples sorted by offset. If a RateSchedule is given, the load
+    is open-loop, ends with the schedule (or after duration) and the rows carry
+    the two additional open-loop columns. If an interval is given, an
+    IntervalRecorder with one histogram per interval is returned instead of rows.
+    For the gRPC protocols the url is the gateway address (host:port) and every
+    process opens `channels` channels. A Counter passed as backends is updated
+    with the number of successful responses per backend name.
+    """
+    processes = max(1, min(processes or os.cpu_count() or 1, concurrency))
+    start = time.monotonic() + START_DELAY
+    if schedule is not None and duration is not None:
+        schedule = truncate_schedule(schedule, duration)
+    specs = [{
+        "url": url,
+        "concurrency": c,
+        "requests": r,
+        "duration": duration,
+        "start": start,
+        "timeout": timeout or None,
+        "keep_alive": keep_alive,
+        # grpc.aio runs on the default asyncio event loop
+        "uvloop": use_uvloop and protocol == "http",
+        "protocol": protocol,
+        "channels": channels,
+        "message": message,
+        "include_errors": include_errors,
+        "count_backends": backends is not None,
+        "schedule": schedule.segments if schedule is not None else None,
+        "interval": interval,
+        # open-loop processes take every `stride`-th request of the schedule
+        "stride": processes,
+        "index": i,
+    } for i, (c, r) in enumerate(zip(split_evenly(concurrency, processes),
+                                     split_evenly(requests, processes)))]
+
+    if processes == 1:
+        results = [run_process(specs[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            results = list(pool.map(run_process, specs))
+    elapsed = time.monotonic() - start
+
+    errors = Counter()
+    for _, process_errors, process_backends in results:
+        errors.update(process_errors)
+        if backends is not None:
+            for body, count in process_backends.items():
+                backends[backend_name(body.decode(errors="replace")) or "unknown"] += count
+    if interval:
+        recorder = IntervalRecorder(interval)
+        for process_recorder, _, _ in results:
+            recorder.merge(process_recorder)
+        return recorder, errors, elapsed
+
+    rows = []
+    for process_rows, _, _ in results:
+        rows.extend(process_rows)
+    rows.sort(key=lambda row: row[7])
+    return rows, errors, elapsed
+
+
+def truncate_schedule(schedule, duration):
+    """Cut a rate schedule off after duration seconds."""
+    segments = []
+    remaining = duration
+    for length, r0, r1 in schedule.segments:
+        if remaining <= 0:
+            break
+        if length > remaining:
+            r1 = r0 + (r1 - r0) * remaining / length
+            length = remaining
+        segments.append((length, r0, r1))
+        remaining -= length
+    return RateSchedule(segments)
+
+
+def write_csv(rows, out):
+    open_loop = bool(rows) and len(rows[0]) > 8
+    out.write(CSV_HEADER + (OPEN_LOOP_COLUMNS if open_loop else "") + "\n")
+    for r in rows:
+        line = (f"{r[0]:.4f},{r[1]:.4f},{r[2]:.4f},{r[3]:.4f},"
+                f"{r[4]:.4f},{r[5]:.4f},{r[6]},{r[7]:.4f}")
+        if open_loop:
+            line += f",{r[8]:.4f},{r[9]:.4f}"
+        out.write(line + "\n")
+
+
+def write_summary(rows, errors, elapsed, out):
+    """Print a hey-like text summary (open-loop: latencies from the intended start)."""
+    open_loop = bool(rows) and len(rows[0]) > 8
+    latencies = sorted(r[9] if open_loop else r[0] for r in rows if r[6])
+    out.write("\nSummary:\n")
+    out.write(f"  Total:\t{elapsed:.4f} secs\n")
+    if latencies:
+        out.write(f"  Slowest:\t{latencies[-1]:.4f} secs\n")
+        out.write(f"  Fastest:\t{latencies[0]:.4f} secs\n")
+        out.write(f"  Average:\t{sum(latencies) / len(latencies):.4f} secs\n")
+    out.write(f"  Requests/sec:\t{len(latencies) / elapsed:.4f}\n\n")
+    if latencies:
+        out.write("Latency distribution:\n")
+        for p in (10, 25, 50, 75, 90, 95, 99, 99.9):
+            idx = min(len(latencies) - 1, int(len(latencies) * p / 100))
+            out.write(f"  {p}% in {latencies[idx]:.4f} secs\n")
+    out.write("\nStatus code distribution:\n")
+    for status, count in sorted(Counter(r[6] for r in rows if r[6]).items()):
+        out.write(f"  [{status}]\t{count} responses\n")
+    if errors:
+        out.write("\nError distribution:\n")
+        for name, count in errors.most_common():
+            out.write(f"  [{count}]\t{name}\n")
+
+
+def write_backends(backends, path):
+    """Responses per backend with their share of all responses."""
+    total = sum(backends.values())
+    with open(path, "w") as out:
+        out.write("backend,responses,share\n")
+        for backend, count in sorted(backends.items()):
+            out.write(f"{backend},{count},{count / total:.4f}\n")
+
+
+def write_histogram_summary(recorder, errors, elapsed, out):
+    """Print a hey-like text summary from the recorded histograms."""
+    hist = recorder.total()
+    out.write("\nSummary:\n")
+    out.write(f"  Total:\t{elapsed:.4f} secs\n")
+    if hist.total_count:
+        out.write(f"  Slowest:\t{hist.max / 1e6:.4f} secs\n")
+        out.write(f"  Fastest:\t{hist.min / 1e6:.4f} secs\n")
+        out.write(f"  Average:\t{hist.mean / 1e6:.4f} secs\n")
+    out.write(f"  Requests/sec:\t{hist.total_count / elapsed:.4f}\n\n")
+    if hist.total_count:
+        out.write("Latency distribution:\n")
+        for p in (10, 25, 50, 75, 90, 95, 99, 99.9):
+            out.write(f"  {p}% in {hist.value_at_percentile(p) / 1e6:.4f} secs\n")
+    out.write("\nStatus code distribution:\n")
+    for status, count in sorted(recorder.statuses.items()):
+        if status:
+            out.write(f"  [{status}]\t{count} responses\n")
+    if errors:
+        out.write("\nError distribution:\n")
+        for name, count in errors.most_common():
+            out.write(f"  [{count}]\t{name}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Load generator for Scenario 3 (hey-compatible arguments and CSV output)")
+    parser.add_argument("url", help="Target URL, e.g. http://localhost:8080/ (gRPC: localhost:8080)")
+    parser.add_argument("-n", type=int, default=200,
+                        help="Number of requests to run (ignored if -z is set)")
+    parser.add_argument("-c", type=int, default=50,
+                        help="Number of workers to run concurrently")
+    parser.add_argument("-z", default=None,
+                        help="Duration of the test, e.g. 10s, 3m (overrides -n)")
+    parser.add_argument("--rate", default=None,
+                        help="Open-loop mode: constant target rate in requests/sec")
+    parser.add_argument("--schedule", default=None,
+                        help="Open-loop mode with a stepped or ramped rate, "
+                             "e.g. step:100,200,400@10s or ramp:100:1000@60s")
+    parser.add_argument("--protocol", default="http", choices=PROTOCOLS,
+                        help="http, grpc (unary Ping) or grpc-stream (StreamPing messages)")
+    parser.add_argument("--channels", type=int, default=4,
+                        help="gRPC channels per worker process, shared round-robin by its workers")
+    parser.add_argument("--message", default="ping",
+                        help="Message sent in every gRPC request")
+    parser.add_argument("--hdr-log", default=None,
+                        help="Record latencies into interval HDR histograms and append them to this log file")
+    parser.add_argument("--tag", default=None,
+                        help="Tag of the histograms in the HDR log, e.g. haproxy_http_10s_64")
+    parser.add_argument("--interval", default="1s",
+                        help="Length of the HDR histogram intervals (default: 1s)")
+    parser.add_argument("--backends", default=None,
+                        help="Count the responses per answering backend and write them to this CSV file")
+    parser.add_argument("--resources", default=None,
+                        help="Sample the resource use of the compose project's containers into this CSV file")
+    parser.add_argument("--metrics", default=None,
+                        help="Scrape the metrics endpoint of --gateway into this CSV file "
+                             "(skipped for gateways without one)")
+    parser.add_argument("--metrics-interval", default="500ms",
+                        help="Interval between two metrics scrapes (default: 500ms)")
+    parser.add_argument("--store", default=None,
+                        help="Also append the rows to the result store at this path (requires pyarrow)")
+    parser.add_argument("--run", default=None,
+                        help="Run id in the result store (default: current timestamp)")
+    parser.add_argument("--gateway", default="unknown",
+                        help="Gateway name recorded in the result store")
+    parser.add_argument("--profile", default=None,
+                        help="Load profile recorded in the result store, e.g. fixed or 10-seconds")
+    parser.add_argument("--algorithm", default=None,
+                        help="Balancing algorithm recorded in the result store (load-balancing runs)")
+    parser.add_argument("--replicas", type=int, default=None,
+                        help="Number of echo replicas recorded in the result store (load-balancing runs)")
+    parser.add_argument("-t", type=float, default=20,
+                        help="Timeout for each request in seconds, 0 for infinite")
+    parser.add_argument("-o", default=None, choices=["csv"],
+                        help="Output type; prints a summary if not set")
+    parser.add_argument("--disable-keepalive", action="store_true",
+                        help="Open a new TCP connection for every request")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="Number of worker processes (default: number of CPUs)")
+    parser.add_argument("--no-uvloop", action="store_true",
+                        help="Use the default asyncio event loop even if uvloop is installed")
+    parser.add_argument("--include-errors", action="store_true",
+                        help="Write failed requests to the CSV with status-code 0")
+    args = parser.parse_args()
+
+    duration = parse_duration(args.z) if args.z else None
+    schedule = None
+    if args.rate and args.schedule:
+        parser.error("--rate and --schedule are mutually exclusive")
+    if args.rate:
+        schedule = RateSchedule.parse(
+            args.rate, duration if duration else args.n / float(args.rate))
+    elif args.schedule:
+        schedule = RateSchedule.parse(args.schedule)
+    if args.hdr_log and args.o == "csv":
+        parser.error("--hdr-log replaces the per-request CSV output, drop -o csv")
+    if args.hdr_log and args.store:
+        parser.error("--store needs per-request rows and cannot be combined with --hdr-log")
+    interval = parse_duration(args.interval) if args.hdr_log else None
+    start_time = time.time()
+    backends = Counter() if args.backends else None
+    sampler = None
+    if args.resources:
+        from common.resource_sampler import ResourceSampler
+        sampler = ResourceSampler(log=lambda message: None)
+        sampler.start()
+    poller = None
+    if args.metrics:
+        from common.gateway_metrics import MetricsPoller, UnsupportedMetrics
+        try:
+            poller = MetricsPoller(args.gateway, parse_duration(args.metrics_interval), log=lambda message: None)
+            poller.start()
+        except UnsupportedMetrics:
+            # no metrics endpoint (tyk without TYK_METRICS_URL, the upstream baseline)
+            pass
+    rows, errors, elapsed = run_load(
+        args.url, requests=args.n, concurrency=args.c, duration=duration,
+        processes=args.processes, timeout=args.t, keep_alive=not args.disable_keepalive,
+        use_uvloop=not args.no_uvloop, include_errors=args.include_errors,
+        schedule=schedule, interval=interval, protocol=args.protocol,
+        channels=args.channels, message=args.message, backends=backends)
+    # run_load measures elapsed from the start its offsets are relative to
+    origin = time.monotonic() - elapsed
+    if sampler:
+        sampler.stop()
+        sampler.write_csv(args.resources, origin=origin)
+    if poller:
+        poller.stop()
+        poller.write_csv(args.metrics, origin=origin)
+
+    if args.hdr_log:
+        default_tag = Target(args.url).host_header if args.protocol == "http" else args.url
+        write_log(args.hdr_log, args.tag or default_tag, rows, start_time)
+        write_histogram_summary(rows, errors, elapsed, sys.stdout)
+    elif args.o == "csv":
+        write_csv(rows, sys.stdout)
+    else:
+        write_summary(rows, errors, elapsed, sys.stdout)
+
+    if args.backends:
+        write_backends(backends, args.backends)
+
+    if args.store:
+        # imported on demand, the store needs pyarrow
+        from common.result_store import store_rows
+        header = CSV_HEADER.split(",")
+        if rows and len(rows[0]) > 8:
+            header += OPEN_LOOP_COLUMNS.strip(",").split(",")
+        # same meaning as the numberOfRequests and rate parts of the legacy CSV file names
+        rate = args.rate or args.schedule or ""
+        number_of_requests = "" if rate else args.z or str(args.n)
+        # as the algorithm and replicas parts of the load-balancing file names
+        lb_columns = {"algorithm": args.algorithm, "replicas": str(args.replicas)} if args.algorithm else {}
+        store_rows(args.store, "3-load-test", args.run, args.gateway, header, rows,
+                   protocol=args.protocol, concurrency=args.c,
+                   parameters={"url": args.url, "keep_alive": not args.disable_keepalive},
+                   extra_columns={"profile": args.profile or ("duration" if args.z else "fixed"),
+                                  "numberOfRequests": number_of_requests, "rate": rate, **lb_columns})
+
+
+if __name__ == "__main__":
+    main()
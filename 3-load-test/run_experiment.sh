@@ -1,26 +1,106 @@
 #!/bin/bash
 set -e
 
+SCENARIO_DIR="$(pwd)"
+
+# TUNING=<profile> runs the gateways on stacks rendered from topology.yaml with that
+# tuning profile (common/gateway_config.py) instead of the hand-written configs
+if [ -n "$TUNING" ]; then
+  python3 ../common/gateway_config.py --tuning "$TUNING" > /dev/null
+fi
+
+stack_dir() {
+  local gw=$1
+  local mode=$2
+
+  if [ -n "$TUNING" ]; then
+    echo "$SCENARIO_DIR/$gw/generated/${TUNING}_$mode"
+  elif [ "$mode" == "grpc" ]; then
+    echo "$SCENARIO_DIR/$gw/grpc"
+  else
+    echo "$SCENARIO_DIR/$gw"
+  fi
+}
+
 # create results directories
-RESULTS_DIR="./results/$(date +%Y%m%d_%H%M%S)"
+RESULTS_DIR="$SCENARIO_DIR/results/$(date +%Y%m%d_%H%M%S)${TUNING:+_$TUNING}"
 mkdir -p "$RESULTS_DIR"
 mkdir -p "$RESULTS_DIR/fixed"
 mkdir -p "$RESULTS_DIR/10-seconds"
+mkdir -p "$RESULTS_DIR/fixed-rate"
+mkdir -p "$RESULTS_DIR/hdr"
+mkdir -p "$RESULTS_DIR/load-balancing"
+
+# load generator: the in-repo python client by default, LOAD_CLIENT=hey uses the hey binary
+if [ "${LOAD_CLIENT:-python}" == "hey" ]; then
+  HEY="hey"
+else
+  HEY="python3 $SCENARIO_DIR/base/load_client.py"
+fi
+
+# RESULT_STORE=<dir> additionally appends the CSV rows of the python load client to the shared result store
+if [ -n "$RESULT_STORE" ]; then
+  RESULT_STORE="$(realpath "$RESULT_STORE")"
+fi
+
+store_args() {
+  local profile=$1
+  shift
+  # further arguments are passed on, e.g. --algorithm and --replicas of the load-balancing runs
+  if [ -n "$RESULT_STORE" ] && [ "$HEY" != "hey" ]; then
+    echo "--store $RESULT_STORE --run $(basename "$RESULTS_DIR") --gateway $gw --profile $profile $*"
+  fi
+}
+
+# RESOURCES=0 disables sampling the cgroup v2 resource use of the stack's containers during
+# every run of the python load client (resources/<profile>/<run>.csv, common/resource_sampler.py),
+# METRICS=0 scraping the gateway's own metrics endpoint (metrics/<profile>/<run>.csv,
+# common/gateway_metrics.py)
+instrument_args() {
+  local profile=$1
+  local name=$2
+  if [ "$HEY" == "hey" ]; then
+    return
+  fi
+  if [ "${RESOURCES:-1}" == "1" ]; then
+    echo "--resources $RESULTS_DIR/resources/$profile/$name.csv"
+  fi
+  if [ "${METRICS:-1}" == "1" ] && [ "$gw" != "upstream" ]; then
+    echo "--metrics $RESULTS_DIR/metrics/$profile/$name.csv --gateway $gw"
+  fi
+}
+
+# URL the load is sent to: the gateway, or the echo service directly for the upstream baseline
+GATEWAY_URL="http://localhost:${GATEWAY_PORT:-8080}/"
+UPSTREAM_URL="http://localhost:5001/"
+TARGET_URL="$GATEWAY_URL"
+
+# RECORD=hdr records latencies into per-second HDR histograms (one log per gateway,
+# tagged with the run's file name) instead of writing one CSV row per request
+if [ "${RECORD:-csv}" == "hdr" ] && [ "$HEY" == "hey" ]; then
+  echo "RECORD=hdr requires the python load client"
+  exit 1
+fi
 
 
 run_hey() {
   local numberOfRequests=$1
   local concurrency=$2
   local mode=${3:-""}
+  local name="${gw}_http_${numberOfRequests}_${concurrency}"
 
   echo "Running hey with $numberOfRequests requests and concurrency $concurrency..."
 
-  if [ "$mode" == "csv" ]; then
-    hey -t 0 -n $numberOfRequests -c $concurrency -o csv "http://localhost:8080/" \
-      > "../$RESULTS_DIR/fixed/${gw}_http_${numberOfRequests}_${concurrency}.csv" 2>&1
+  if [ "$mode" == "csv" ] && [ "${RECORD:-csv}" == "hdr" ]; then
+    $HEY -t 0 -n $numberOfRequests -c $concurrency "$TARGET_URL" $(instrument_args fixed $name) \
+      --hdr-log "$RESULTS_DIR/hdr/${gw}.hlog" --tag "fixed_${gw}_http_${numberOfRequests}_${concurrency}" \
+      > "$RESULTS_DIR/fixed/${gw}_http_${numberOfRequests}_${concurrency}.txt" 2>&1
+  elif [ "$mode" == "csv" ]; then
+    $HEY -t 0 -n $numberOfRequests -c $concurrency -o csv "$TARGET_URL" $(store_args fixed) $(instrument_args fixed $name) \
+      > "$RESULTS_DIR/fixed/${gw}_http_${numberOfRequests}_${concurrency}.csv" 2>&1
   else
-    hey -t 0 -n $numberOfRequests -c $concurrency "http://localhost:8080/" \
-      > "../$RESULTS_DIR/fixed/${gw}_http_${numberOfRequests}_${concurrency}.txt" 2>&1
+    $HEY -t 0 -n $numberOfRequests -c $concurrency "$TARGET_URL" $(instrument_args fixed $name) \
+      > "$RESULTS_DIR/fixed/${gw}_http_${numberOfRequests}_${concurrency}.txt" 2>&1
   fi
 
   sleep 2
@@ -30,22 +110,78 @@ run_hey() {
 run_hey_for_10_sec() {
   local concurrency=$1
   local mode=${2:-""}
+  local name="${gw}_http_10s_${concurrency}"
 
   echo "Running hey for 10 sec with concurrency $concurrency..."
 
-  if [ "$mode" == "csv" ]; then
-    hey -c $concurrency -z 10s -o csv "http://localhost:8080/" \
-      > "../$RESULTS_DIR/10-seconds/${gw}_http_10s_${concurrency}.csv" 2>&1
+  if [ "$mode" == "csv" ] && [ "${RECORD:-csv}" == "hdr" ]; then
+    $HEY -c $concurrency -z 10s "$TARGET_URL" $(instrument_args 10-seconds $name) \
+      --hdr-log "$RESULTS_DIR/hdr/${gw}.hlog" --tag "10-seconds_${gw}_http_10s_${concurrency}" \
+      > "$RESULTS_DIR/10-seconds/${gw}_http_10s_${concurrency}.txt" 2>&1
+  elif [ "$mode" == "csv" ]; then
+    $HEY -c $concurrency -z 10s -o csv "$TARGET_URL" $(store_args 10-seconds) $(instrument_args 10-seconds $name) \
+      > "$RESULTS_DIR/10-seconds/${gw}_http_10s_${concurrency}.csv" 2>&1
   else
-    hey -c $concurrency -z 10s "http://localhost:8080/" \
-      > "../$RESULTS_DIR/10-seconds/${gw}_http_10s_${concurrency}.txt" 2>&1
+    $HEY -c $concurrency -z 10s "$TARGET_URL" $(instrument_args 10-seconds $name) \
+      > "$RESULTS_DIR/10-seconds/${gw}_http_10s_${concurrency}.txt" 2>&1
   fi
 
   sleep 2
 }
 
+# open-loop load at a fixed arrival rate, latency measured from the intended start time
+# (file name: gateway_protocol_rate_concurrency.csv, concurrency = max. open connections)
+run_fixed_rate() {
+  local rate=$1
+  local concurrency=$2
+  local name="${gw}_http_${rate}_${concurrency}"
+
+  if [ "${LOAD_CLIENT:-python}" == "hey" ]; then
+    echo "Skipping fixed rate $rate requests/sec (not supported by hey)"
+    return
+  fi
+
+  echo "Running fixed rate of $rate requests/sec for 10 sec with up to $concurrency connections..."
+
+  if [ "${RECORD:-csv}" == "hdr" ]; then
+    python3 "$SCENARIO_DIR/base/load_client.py" --rate $rate -c $concurrency -z 10s "$TARGET_URL" $(instrument_args fixed-rate $name) \
+      --hdr-log "$RESULTS_DIR/hdr/${gw}.hlog" --tag "fixed-rate_${gw}_http_${rate}_${concurrency}" \
+      > "$RESULTS_DIR/fixed-rate/${gw}_http_${rate}_${concurrency}.txt" 2>&1
+  else
+    python3 "$SCENARIO_DIR/base/load_client.py" --rate $rate -c $concurrency -z 10s -o csv "$TARGET_URL" $(store_args fixed-rate) $(instrument_args fixed-rate $name) \
+      > "$RESULTS_DIR/fixed-rate/${gw}_http_${rate}_${concurrency}.csv" 2>&1
+  fi
+
+  sleep 2
+}
+
+# throughput ceiling of the echo service itself, measured with the same concurrency steps
+# as the gateways (gateway name "upstream"), to tell gateway and upstream bottlenecks apart
+run_upstream_baseline() {
+  cd haproxy
+  echo ""
+  echo "==== Measuring upstream baseline (echo service without gateway) ===="
+  docker compose down -v
+  docker compose up --build -d
+  sleep 5
+
+  gw=upstream
+  TARGET_URL="$UPSTREAM_URL"
+  for concurrency in 1 2 4 8 16 32 64; do
+    run_hey_for_10_sec $concurrency csv
+  done
+  TARGET_URL="$GATEWAY_URL"
+
+  docker compose down -v
+  cd "$SCENARIO_DIR"
+}
+
+if [ "${BASELINE:-1}" == "1" ]; then
+  run_upstream_baseline
+fi
+
 for gw in haproxy nginx traefik tyk; do
-  cd $gw
+  cd "$(stack_dir $gw http)"
 
   echo ""
   echo "==== Starting experiment for $gw ===="
@@ -79,10 +215,104 @@ for gw in haproxy nginx traefik tyk; do
   run_hey_for_10_sec 32 csv
   run_hey_for_10_sec 64 csv
 
+  # open-loop constant arrival rates (coordinated-omission corrected latencies)
+  run_fixed_rate 500 64
+  run_fixed_rate 1000 64
+  run_fixed_rate 2000 64
+
   echo "Stopping environment..."
   docker compose down -v
 
-  cd ..
+  cd "$SCENARIO_DIR"
 done
 
+# gRPC load through the gateways' h2c routes to the gRPC echo service (own compose
+# stacks in <gateway>/grpc): unary Ping and StreamPing messages over the same
+# concurrency steps as the HTTP runs (file name: gateway_grpc[-stream]_10s_concurrency.csv)
+run_grpc_for_10_sec() {
+  local protocol=$1
+  local concurrency=$2
+
+  echo "Running $protocol for 10 sec with concurrency $concurrency..."
+
+  python3 "$SCENARIO_DIR/base/load_client.py" --protocol $protocol -c $concurrency -z 10s -o csv \
+    "localhost:${GATEWAY_PORT:-8080}" $(store_args 10-seconds) \
+    $(instrument_args 10-seconds "${gw}_${protocol}_10s_${concurrency}") \
+    > "$RESULTS_DIR/10-seconds/${gw}_${protocol}_10s_${concurrency}.csv" 2>&1
+
+  sleep 2
+}
+
+if [ "${GRPC:-1}" == "1" ] && [ "${LOAD_CLIENT:-python}" == "hey" ]; then
+  echo "Skipping gRPC load (not supported by hey)"
+elif [ "${GRPC:-1}" == "1" ]; then
+  for gw in haproxy nginx traefik tyk; do
+    cd "$(stack_dir $gw grpc)"
+
+    echo ""
+    echo "==== Starting gRPC experiment for $gw ===="
+    docker compose down -v
+    docker compose up --build -d
+    sleep 5
+
+    for protocol in grpc grpc-stream; do
+      for concurrency in 1 2 4 8 16 32 64; do
+        run_grpc_for_10_sec $protocol $concurrency
+      done
+    done
+
+    docker compose down -v
+    cd "$SCENARIO_DIR"
+  done
+fi
+
+# load balancing over several echo replicas: a stack per gateway, replica count and
+# balancing algorithm is generated by common/lb_stack.py into <gateway>/lb/<algorithm>_<replicas>
+# (file name: gateway_algorithm_replicas_concurrency.csv, responses per replica in
+# gateway_algorithm_replicas_concurrency_backends.csv)
+run_lb_for_10_sec() {
+  local algorithm=$1
+  local replicas=$2
+  local concurrency=$3
+  local name="${gw}_${algorithm}_${replicas}_${concurrency}"
+
+  echo "Running $algorithm over $replicas replicas for 10 sec with concurrency $concurrency..."
+
+  python3 "$SCENARIO_DIR/base/load_client.py" -c $concurrency -z 10s -o csv "$GATEWAY_URL" \
+    --backends "$RESULTS_DIR/load-balancing/${name}_backends.csv" $(store_args load-balancing --algorithm $algorithm --replicas $replicas) \
+    $(instrument_args load-balancing $name) \
+    > "$RESULTS_DIR/load-balancing/${name}.csv" 2>&1
+
+  sleep 2
+}
+
+if [ "${LB:-1}" == "1" ] && [ "${LOAD_CLIENT:-python}" == "hey" ]; then
+  echo "Skipping load balancing runs (the backend counts need the python load client)"
+elif [ "${LB:-1}" == "1" ]; then
+  for gw in haproxy nginx traefik tyk; do
+    for algorithm in roundrobin leastconn random hash; do
+      for replicas in 1 2 4 8; do
+        if ! stack=$(python3 ../common/lb_stack.py --gateway $gw --replicas $replicas --algorithm $algorithm \
+            --tuning "${TUNING:-default}"); then
+          continue
+        fi
+        cd "$stack"
+
+        echo ""
+        echo "==== Starting load balancing experiment for $gw ($algorithm, $replicas replicas) ===="
+        docker compose down -v
+        docker compose up --build -d
+        sleep 5
+
+        for concurrency in 16 64; do
+          run_lb_for_10_sec $algorithm $replicas $concurrency
+        done
+
+        docker compose down -v
+        cd "$SCENARIO_DIR"
+      done
+    done
+  done
+fi
+
 echo "✅ Experiment complete."
\ No newline at end of file
@@ -0,0 +1 @@
+"""Helpers shared by the experiment clients of all three scenarios."""
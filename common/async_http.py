@@ -0,0 +1,177 @@
+"""
+Minimal asyncio HTTP/1.1 client with persistent keep-alive connections.
+
+Every request is timed in the same phases that hey reports in its CSV output
+(DNS+dialup, DNS, request write, response delay, response read), so results
+from the in-repo clients stay comparable with the existing hey measurements.
+"""
+import asyncio
+import socket
+import time
+from urllib.parse import urlsplit
+
+
+class Target:
+    """Parsed request target (host, port and request path of a URL)."""
+
+    def __init__(self, url: str):
+        parts = urlsplit(url)
+        if parts.scheme != "http":
+            raise ValueError(f"Only plain http:// targets are supported: {url}")
+        self.url = url
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port or 80
+        self.path = parts.path or "/"
+        if parts.query:
+            self.path += "?" + parts.query
+        self.host_header = parts.netloc
+
+
+class Response:
+    """Status, body and phase timings (seconds) of a single request."""
+
+    __slots__ = ("status", "body", "reused", "dns", "dialup",
+                 "write", "delay", "read", "total")
+
+    def __init__(self):
+        self.status = 0
+        self.body = b""
+        self.reused = False
+        self.dns = 0.0
+        self.dialup = 0.0
+        self.write = 0.0
+        self.delay = 0.0
+        self.read = 0.0
+        self.total = 0.0
+
+
+class HttpConnection:
+    """A single keep-alive connection that transparently reconnects when closed."""
+
+    def __init__(self, target: Target, timeout=None, keep_alive=True):
+        self.target = target
+        self.timeout = timeout
+        self.keep_alive = keep_alive
+        self._reader = None
+        self._writer = None
+
+    @property
+    def connected(self):
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def _connect(self, resp: Response):
+        loop = asyncio.get_running_loop()
+        t0 = time.perf_counter()
+        infos = await loop.getaddrinfo(self.target.host, self.target.port,
+                                       type=socket.SOCK_STREAM)
+        t1 = time.perf_counter()
+        family, type_, proto, _, addr = infos[0]
+        self._reader, self._writer = await asyncio.open_connection(
+            host=addr[0], port=addr[1], family=family, proto=proto)
+        sock = self._writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        t2 = time.perf_counter()
+        resp.dns = t1 - t0
+        resp.dialup = t2 - t0
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = None
+        self._writer = None
+
+    async def request(self, path=None, method="GET", headers=None, body=b""):
+        """Send one request and read the full response."""
+        if self.timeout:
+            return await asyncio.wait_for(
+                self._request(path, method, headers, body), self.timeout)
+        return await self._request(path, method, headers, body)
+
+    async def _request(self, path, method, headers, body):
+        resp = Response()
+        start = time.perf_counter()
+        try:
+            if self.connected:
+                resp.reused = True
+            else:
+                await self._connect(resp)
+
+            head = [f"{method} {path or self.target.path} HTTP/1.1",
+                    f"Host: {self.target.host_header}",
+                    "Connection: " + ("keep-alive" if self.keep_alive else "close")]
+            if body:
+                head.append(f"Content-Length: {len(body)}")
+            for name, value in (headers or {}).items():
+                head.append(f"{name}: {value}")
+            t_write = time.perf_counter()
+            self._writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + body)
+            await self._writer.drain()
+            t_written = time.perf_counter()
+
+            status_line = await self._reader.readline()
+            if not status_line:
+                raise ConnectionResetError("connection closed before response")
+            t_first_byte = time.perf_counter()
+            version, status = status_line.split(b" ", 2)[:2]
+            resp.status = int(status)
+
+            length = None
+            chunked = False
+            close = version == b"HTTP/1.0" or not self.keep_alive
+            while True:
+                line = await self._reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.partition(b":")
+                name = name.strip().lower()
+                value = value.strip()
+                if name == b"content-length":
+                    length = int(value)
+                elif name == b"transfer-encoding" and b"chunked" in value.lower():
+                    chunked = True
+                elif name == b"connection":
+                    close = value.lower() == b"close"
+
+            if chunked:
+                resp.body = await self._read_chunked()
+            elif length is not None:
+                resp.body = await self._reader.readexactly(length)
+            else:
+                # no framing information: body ends when the server closes
+                resp.body = await self._reader.read()
+                close = True
+            t_end = time.perf_counter()
+        except BaseException:
+            self.close()
+            raise
+
+        if close:
+            self.close()
+        resp.write = t_written - t_write
+        resp.delay = t_first_byte - t_written
+        resp.read = t_end - t_first_byte
+        resp.total = t_end - start
+        return resp
+
+    async def _read_chunked(self):
+        chunks = []
+        while True:
+            size = int((await self._reader.readline()).split(b";")[0], 16)
+            if size == 0:
+                # skip trailers
+                while (await self._reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                return b"".join(chunks)
+            chunks.append(await self._reader.readexactly(size))
+            await self._reader.readexactly(2)
+
+
+def install_uvloop():
+    """Use uvloop as event loop policy if it is installed. Returns True on success."""
+    try:
+        import uvloop
+    except ImportError:
+        return False
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return True
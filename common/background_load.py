@@ -0,0 +1,105 @@
+"""
+Constant-rate background load for experiments that act on a gateway under load.
+
+Requests are started open-loop at fixed intended times (rate per second) on a
+pool of keep-alive connections, in an event loop on a background thread, so
+the synchronous experiment clients can restart or reconfigure the gateway
+while the load keeps running. Every request is kept with its intended, send
+and completion time (time.monotonic_ns) and its status or error class, so
+failures can be attributed to the time window of an action afterwards.
+"""
+import asyncio
+import threading
+import time
+
+from common.async_http import HttpConnection, Target
+from common.prober import error_class
+
+
+class Request:
+    __slots__ = ("intended_ns", "sent_ns", "done_ns", "status", "error")
+
+    def __init__(self, intended_ns, sent_ns, done_ns, status, error):
+        self.intended_ns = intended_ns
+        self.sent_ns = sent_ns
+        self.done_ns = done_ns
+        self.status = status
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.status == 200
+
+    @property
+    def latency_ms(self):
+        """Latency from the intended start time (includes queueing for a free connection)."""
+        return (self.done_ns - self.intended_ns) / 1e6
+
+
+class BackgroundLoad:
+    """Open-loop load at a constant rate with at most `concurrency` requests in flight."""
+
+    def __init__(self, url, rate=500, concurrency=32, timeout=2.0):
+        self.target = Target(url)
+        self.rate = rate
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.requests = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        self._thread = threading.Thread(target=asyncio.run, args=(self._run(),), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop starting new requests and wait for the outstanding ones."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def window(self, start_ns, end_ns=None):
+        """Requests intended to start in [start_ns, end_ns)."""
+        return [r for r in self.requests
+                if r.intended_ns >= start_ns and (end_ns is None or r.intended_ns < end_ns)]
+
+    async def _run(self):
+        idle = asyncio.Queue()
+        for _ in range(self.concurrency):
+            idle.put_nowait(HttpConnection(self.target, timeout=self.timeout))
+        tasks = set()
+        start = time.monotonic_ns()
+        step = 1e9 / self.rate
+        k = 0
+        while not self._stop.is_set():
+            intended = start + int(k * step)
+            delay = intended - time.monotonic_ns()
+            if delay > 0:
+                await asyncio.sleep(delay / 1e9)
+            task = asyncio.create_task(self._request(idle, intended))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            k += 1
+        if tasks:
+            await asyncio.wait(tasks)
+        while not idle.empty():
+            idle.get_nowait().close()
+
+    async def _request(self, idle, intended):
+        conn = await idle.get()
+        sent = time.monotonic_ns()
+        try:
+            resp = await conn.request()
+            status, error = resp.status, None if resp.status == 200 else f"http_{resp.status}"
+        except Exception as exc:
+            status, error = 0, error_class(exc)
+        finally:
+            idle.put_nowait(conn)
+        self.requests.append(Request(intended, sent, time.monotonic_ns(), status, error))
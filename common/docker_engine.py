@@ -0,0 +1,224 @@
+"""
+Minimal Docker Engine API client over the unix socket.
+
+Commands (kill, start, inspect, stats, ...) are sent over one persistent HTTP
+connection, so they do not fork the docker CLI for every call. EventStream
+subscribes once to the /events endpoint and timestamps every container event
+(kill, die, start, health_status, ...) as it arrives, which replaces polling
+`docker inspect` for the container state.
+"""
+import http.client
+import json
+import os
+import socket
+import struct
+import threading
+import time
+from urllib.parse import quote, urlencode
+
+DEFAULT_SOCKET = "/var/run/docker.sock"
+
+
+def socket_path():
+    """Path of the Docker socket (DOCKER_HOST=unix://... or the default socket)."""
+    host = os.getenv("DOCKER_HOST", "")
+    if host.startswith("unix://"):
+        return host[len("unix://"):]
+    if host:
+        raise ValueError(f"Only unix sockets are supported as DOCKER_HOST: {host}")
+    return DEFAULT_SOCKET
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout=None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class DockerError(RuntimeError):
+    pass
+
+
+class DockerEngine:
+    """Docker Engine API calls over a persistent connection to the daemon's unix socket."""
+
+    def __init__(self, path=None, timeout=30):
+        self.path = path or socket_path()
+        self._conn = UnixHTTPConnection(self.path, timeout)
+        self._lock = threading.Lock()
+
+    def close(self):
+        self._conn.close()
+
+    def request(self, method, path, body=None):
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        with self._lock:
+            try:
+                self._conn.request(method, path, json.dumps(body) if body is not None else None, headers)
+                resp = self._conn.getresponse()
+                data = resp.read()
+            except BaseException:
+                # reconnect on the next call instead of failing with CannotSendRequest
+                self._conn.close()
+                raise
+        if resp.status >= 400:
+            message = json.loads(data).get("message", "") if data else ""
+            raise DockerError(f"{method} {path} failed with {resp.status}: {message}")
+        return json.loads(data) if data else None
+
+    def kill(self, container, signal="SIGKILL"):
+        self.request("POST", f"/containers/{quote(container)}/kill?signal={signal}")
+
+    def start(self, container):
+        # 304 (already started) is not an error for the experiments
+        self.request("POST", f"/containers/{quote(container)}/start")
+
+    def inspect(self, container):
+        return self.request("GET", f"/containers/{quote(container)}/json")
+
+    def running(self, container):
+        return self.inspect(container)["State"]["Running"]
+
+    def stats(self, container):
+        """One stats sample like `docker stats --no-stream` (one-shot: no second sample for CPU)."""
+        return self.request("GET", f"/containers/{quote(container)}/stats?stream=false&one-shot=true")
+
+    def memory_bytes(self, container):
+        """Memory usage of the container without the page cache, like `docker stats`."""
+        memory = self.stats(container)["memory_stats"]
+        cache = memory.get("stats", {}).get("inactive_file", memory.get("stats", {}).get("cache", 0))
+        return memory.get("usage", 0) - cache
+
+    def processes(self, container):
+        """Number of processes running in the container (`docker top`)."""
+        return len(self.request("GET", f"/containers/{quote(container)}/top")["Processes"])
+
+    def exec(self, container, cmd):
+        """Run a command in a running container like `docker exec`. Returns (exit code, output)."""
+        exec_id = self.request("POST", f"/containers/{quote(container)}/exec", {
+            "Cmd": cmd, "AttachStdout": True, "AttachStderr": True})["Id"]
+        with self._lock:
+            # the daemon streams the output over the hijacked connection until the command exits
+            self._conn.request("POST", f"/exec/{exec_id}/start", json.dumps({"Detach": False}),
+                               {"Content-Type": "application/json"})
+            resp = self._conn.getresponse()
+            raw = resp.read()
+            self._conn.close()
+        if resp.status >= 400:
+            raise DockerError(f"exec {cmd} in {container} failed with {resp.status}")
+        output = bytearray()
+        pos = 0
+        # multiplexed stdout/stderr frames: 1 byte stream, 3 bytes padding, 4 bytes size
+        while pos + 8 <= len(raw):
+            size = struct.unpack(">I", raw[pos + 4:pos + 8])[0]
+            output += raw[pos + 8:pos + 8 + size]
+            pos += 8 + size
+        exit_code = self.request("GET", f"/exec/{exec_id}/json")["ExitCode"]
+        return exit_code, output.decode(errors="replace")
+
+
+class Event:
+    """A container event with the daemon's timestamp and the local arrival time."""
+
+    __slots__ = ("action", "container", "time_ns", "received_ns", "attributes")
+
+    def __init__(self, data, received_ns):
+        self.action = data.get("Action", data.get("status", ""))
+        self.attributes = data.get("Actor", {}).get("Attributes", {})
+        self.container = self.attributes.get("name", data.get("id", ""))
+        self.time_ns = int(data.get("timeNano", data.get("time", 0) * 1_000_000_000))
+        self.received_ns = received_ns
+
+
+class EventStream:
+    """
+    Background subscription to the container events of the given containers.
+
+    Positions returned by mark() allow waiting for the first event of an
+    action after a command was sent, without missing events that arrive
+    before wait_for() is called.
+    """
+
+    def __init__(self, containers, path=None):
+        self.containers = list(containers)
+        self.path = path or socket_path()
+        self.events = []
+        self._cond = threading.Condition()
+        self._conn = None
+        self._ready = threading.Event()
+        self._error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def start(self):
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            raise DockerError(f"Cannot subscribe to Docker events on {self.path}: {self._error}")
+
+    def close(self):
+        if self._conn is not None and self._conn.sock is not None:
+            # unblocks the reading thread
+            try:
+                self._conn.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._conn.close()
+        self._thread.join(timeout=5)
+
+    def _run(self):
+        filters = json.dumps({"type": ["container"], "container": self.containers})
+        self._conn = UnixHTTPConnection(self.path)
+        try:
+            self._conn.request("GET", "/events?" + urlencode({"filters": filters}))
+            resp = self._conn.getresponse()
+            if resp.status != 200:
+                raise DockerError(f"status {resp.status}")
+        except (OSError, http.client.HTTPException, DockerError) as exc:
+            self._error = exc
+            return
+        finally:
+            self._ready.set()
+        try:
+            while True:
+                line = resp.readline()
+                if not line:
+                    break
+                event = Event(json.loads(line), time.monotonic_ns())
+                with self._cond:
+                    self.events.append(event)
+                    self._cond.notify_all()
+        except Exception:
+            # the stream ends with an error when close() shuts down the socket
+            pass
+
+    def mark(self):
+        with self._cond:
+            return len(self.events)
+
+    def wait_for(self, action, start=0, container=None, timeout=None):
+        """First event of an action (prefix match, e.g. "health_status") from position start on."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            position = start
+            while True:
+                for event in self.events[position:]:
+                    if event.action.startswith(action) and container in (None, event.container):
+                        return event
+                position = len(self.events)
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
@@ -0,0 +1,110 @@
+"""
+gRPC echo backend on grpc.aio, used by the gRPC stacks of scenarios 2 and 3.
+
+Replies are cached per request message, so neither Ping nor the messages of a
+StreamPing stream are formatted per request, and several worker processes
+serve the same port via SO_REUSEPORT, so the backend is not the bottleneck
+when the gateway is loaded.
+
+Configuration (environment variables):
+    SERVICE_NAME  name in the reply message (default: echo-unknown)
+    PORT          listen port (default: 5002)
+    WORKERS       number of worker processes (default: number of CPUs the container may use)
+    LOG           "1" prints every request (default: off)
+"""
+import asyncio
+import os
+import signal
+
+import grpc
+import proto.echo_pb2 as echo_pb2
+import proto.echo_pb2_grpc as echo_pb2_grpc
+
+SERVICE_NAME = os.getenv("SERVICE_NAME", "echo-unknown")
+PORT = int(os.getenv("PORT", "5002"))
+# the CPUs of the container's cpuset (docker --cpuset-cpus), not all CPUs of the host
+WORKERS = int(os.getenv("WORKERS", str(len(os.sched_getaffinity(0)))))
+LOG = os.getenv("LOG", "0") == "1"
+MAX_CACHED_REPLIES = 1024
+PREFIX = f"{SERVICE_NAME}: "
+
+
+class EchoServicer(echo_pb2_grpc.EchoServicer):
+    def __init__(self):
+        self.replies = {}
+
+    def reply(self, message):
+        """The (cached) reply for a request message."""
+        reply = self.replies.get(message)
+        if reply is None:
+            if len(self.replies) >= MAX_CACHED_REPLIES:
+                self.replies.clear()
+            reply = self.replies[message] = echo_pb2.EchoReply(message=PREFIX + message)
+        return reply
+
+    async def Ping(self, request, context):
+        if LOG:
+            print(f"Received message: {request.message}", flush=True)
+        return self.reply(request.message)
+
+    async def StreamPing(self, request_iterator, context):
+        async for request in request_iterator:
+            if LOG:
+                print(f"Received stream message: {request.message}", flush=True)
+            yield self.reply(request.message)
+
+
+async def serve():
+    # grpc.so_reuseport lets the worker processes bind the same port
+    server = grpc.aio.server(options=[("grpc.so_reuseport", 1)])
+    echo_pb2_grpc.add_EchoServicer_to_server(EchoServicer(), server)
+    server.add_insecure_port(f"[::]:{PORT}")
+    await server.start()
+    stopped = asyncio.Event()
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stopped.set)
+    await stopped.wait()
+    await server.stop(grace=1)
+
+
+def run_worker():
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    print(f"gRPC Echo server {SERVICE_NAME} running on port {PORT} with {WORKERS} worker(s)", flush=True)
+    if WORKERS <= 1:
+        run_worker()
+        return
+
+    # the workers are forked before any of them creates gRPC objects
+    children = []
+    for _ in range(WORKERS):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            run_worker()
+            os._exit(0)
+        children.append(pid)
+
+    def stop(*_):
+        for child in children:
+            try:
+                os.kill(child, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    # as PID 1 of the container the server has to handle SIGTERM itself
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for child in children:
+        try:
+            os.waitpid(child, 0)
+        except ChildProcessError:
+            pass
+
+
+if __name__ == "__main__":
+    main()
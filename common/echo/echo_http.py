@@ -0,0 +1,210 @@
+"""
+HTTP/1.1 echo backend on asyncio, used by the stacks of all three scenarios.
+
+Responses are pre-encoded once at startup (with Content-Length, so connections
+are kept alive) and several worker processes accept on the same port via
+SO_REUSEPORT, so the backend is not the bottleneck when the gateway is loaded.
+
+Configuration (environment variables):
+    SERVICE_NAME  name in the response body (default: echo-unknown)
+    BODY          response body (default: "response from <SERVICE_NAME>")
+    PORT          listen port (default: 5001)
+    WORKERS       number of worker processes (default: number of CPUs the container may use)
+    PAYLOAD_SIZE  response body size in bytes, the body is padded or cut (default: body size)
+    DELAY_MS      response delay: fixed ("5"), "uniform:<min>:<max>" or "exp:<mean>" (default: 0)
+    STATUS_CODES  status code distribution, e.g. "200:0.99,503:0.01" (default: 200)
+    LOG           "1" prints every request (default: off)
+"""
+import asyncio
+import os
+import random
+import signal
+import sys
+from collections import deque
+from http import HTTPStatus
+
+SERVICE_NAME = os.getenv("SERVICE_NAME", "echo-unknown")
+PORT = int(os.getenv("PORT", "5001"))
+BODY = os.getenv("BODY", f"response from {SERVICE_NAME}")
+# the CPUs of the container's cpuset (docker --cpuset-cpus), not all CPUs of the host
+WORKERS = int(os.getenv("WORKERS", str(len(os.sched_getaffinity(0)))))
+PAYLOAD_SIZE = os.getenv("PAYLOAD_SIZE")
+DELAY_MS = os.getenv("DELAY_MS", "0")
+STATUS_CODES = os.getenv("STATUS_CODES", "200")
+LOG = os.getenv("LOG", "0") == "1"
+MAX_HEADER_SIZE = 65536
+
+
+def make_body():
+    body = BODY.encode()
+    if PAYLOAD_SIZE is not None:
+        size = int(PAYLOAD_SIZE)
+        body = (body + b"." * size)[:size]
+    return body
+
+
+def encode_response(status, body, keep_alive):
+    head = (f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+            f"Content-Type: text/plain\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode() + body
+
+
+def parse_status_codes(spec):
+    """'200:0.99,503:0.01' -> ([200, 503], [0.99, 0.01])"""
+    codes, weights = [], []
+    for part in spec.split(","):
+        code, _, weight = part.partition(":")
+        codes.append(int(code))
+        weights.append(float(weight or 1))
+    return codes, weights
+
+
+def parse_delay(spec):
+    """Return a function drawing a delay in seconds."""
+    kind, _, params = spec.partition(":")
+    if kind == "uniform":
+        low, high = (float(v) / 1000 for v in params.split(":"))
+        return lambda: random.uniform(low, high)
+    if kind == "exp":
+        mean = float(params) / 1000
+        return lambda: random.expovariate(1 / mean)
+    fixed = float(kind) / 1000
+    return lambda: fixed
+
+
+RESPONSE_BODY = make_body()
+CODES, WEIGHTS = parse_status_codes(STATUS_CODES)
+# pre-encoded responses per status code: (close, keep-alive)
+RESPONSES = {code: (encode_response(code, RESPONSE_BODY, False), encode_response(code, RESPONSE_BODY, True))
+             for code in CODES}
+DELAY = parse_delay(DELAY_MS) if DELAY_MS not in ("", "0") else None
+
+
+def pick_status():
+    if len(CODES) == 1:
+        return CODES[0]
+    return random.choices(CODES, WEIGHTS)[0]
+
+
+class EchoProtocol(asyncio.Protocol):
+    def connection_made(self, transport):
+        self.transport = transport
+        self.buffer = bytearray()
+        self.pending = deque()  # delayed responses in request order: (send_at, data, keep_alive)
+        self.timer = None
+        self.closing = False
+
+    def connection_lost(self, exc):
+        if self.timer is not None:
+            self.timer.cancel()
+
+    def data_received(self, data):
+        self.buffer += data
+        while not self.closing:
+            end = self.buffer.find(b"\r\n\r\n")
+            if end < 0:
+                if len(self.buffer) > MAX_HEADER_SIZE:
+                    self.transport.close()
+                return
+            head = bytes(self.buffer[:end]).lower()
+            length = 0
+            pos = head.find(b"\r\ncontent-length:")
+            if pos >= 0:
+                line_end = head.find(b"\r\n", pos + 2)
+                length = int(head[pos + 17:line_end if line_end >= 0 else len(head)])
+            if len(self.buffer) < end + 4 + length:
+                return
+            del self.buffer[:end + 4 + length]
+            request_line = head.split(b"\r\n", 1)[0]
+            if request_line.endswith(b"http/1.0"):
+                keep_alive = b"\r\nconnection: keep-alive" in head
+            else:
+                keep_alive = b"\r\nconnection: close" not in head
+            if LOG:
+                print(f"{SERVICE_NAME}: {request_line.decode(errors='replace')}", flush=True)
+            self.respond(keep_alive)
+
+    def respond(self, keep_alive):
+        data = RESPONSES[pick_status()][keep_alive]
+        if not keep_alive:
+            self.closing = True
+        if DELAY is None and not self.pending:
+            self.send(data, keep_alive)
+            return
+        loop = asyncio.get_running_loop()
+        send_at = loop.time() + (DELAY() if DELAY else 0)
+        if self.pending:
+            # pipelined responses must keep the request order
+            send_at = max(send_at, self.pending[-1][0])
+        self.pending.append((send_at, data, keep_alive))
+        if self.timer is None:
+            self.timer = loop.call_at(send_at, self.flush)
+
+    def flush(self):
+        loop = asyncio.get_running_loop()
+        self.timer = None
+        while self.pending and self.pending[0][0] <= loop.time():
+            _, data, keep_alive = self.pending.popleft()
+            self.send(data, keep_alive)
+        if self.pending:
+            self.timer = loop.call_at(self.pending[0][0], self.flush)
+
+    def send(self, data, keep_alive):
+        if self.transport.is_closing():
+            return
+        self.transport.write(data)
+        if not keep_alive:
+            self.transport.close()
+
+
+async def serve():
+    loop = asyncio.get_running_loop()
+    server = await loop.create_server(EchoProtocol, port=PORT, reuse_port=True, backlog=4096)
+    async with server:
+        await server.serve_forever()
+
+
+def run_worker():
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    print(f"Echo server {SERVICE_NAME} running on port {PORT} with {WORKERS} worker(s)", flush=True)
+    if WORKERS <= 1:
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        run_worker()
+        return
+
+    children = []
+    for _ in range(WORKERS):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            run_worker()
+            os._exit(0)
+        children.append(pid)
+
+    def stop(*_):
+        for child in children:
+            try:
+                os.kill(child, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    # as PID 1 of the container the server has to handle SIGTERM itself
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for child in children:
+        try:
+            os.waitpid(child, 0)
+        except ChildProcessError:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,395 @@
+"""
+Gateway configurations rendered from one declarative topology.
+
+3-load-test/topology.yaml describes the upstreams (echo replicas, balancing
+algorithm) and named tuning profiles; every gateway's configuration and compose
+stack is rendered from it, so all gateways run with the same upstreams and
+equivalent worker, connection, keep-alive and buffer settings:
+
+    knob                haproxy          nginx                    caddy / traefik / tyk
+    workers             nbthread         worker_processes         GOMAXPROCS
+    max_connections     maxconn          worker_connections       -
+    upstream_keepalive  http-reuse       upstream keepalive       keepalive_idle_conns_per_host /
+                        always           (HTTP/1.1 to upstream)   maxIdleConnsPerHost /
+                                                                  max_idle_connections_per_host
+    buffer_size         tune.bufsize     proxy/grpc_buffer_size   -
+    access_log          (no log)         access_log off           (no access log by default)
+
+Balancing algorithms: roundrobin, leastconn (traefik: p2c), random and hash
+(consistent hash over the client connection, the load client always requests
+the same URL). Combinations a gateway does not offer raise UnsupportedStack.
+
+The stacks are written to 3-load-test/<gateway>/generated/<tuning>_<mode>:
+
+    python3 common/gateway_config.py --tuning tuned
+    python3 common/gateway_config.py --tuning default --gateways nginx --modes grpc
+
+Reading the topology needs PyYAML.
+"""
+import argparse
+import json
+import string
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SCENARIO_DIR = REPO_ROOT / "3-load-test"
+ECHO_DIR = REPO_ROOT / "common" / "echo"  # echo servers and their Dockerfiles, shared by all scenarios
+TOPOLOGY_FILE = SCENARIO_DIR / "topology.yaml"
+ECHO_PORTS = {"http": 5001, "grpc": 5002}
+ALGORITHMS = ["roundrobin", "leastconn", "random", "hash"]
+KNOBS = ["workers", "max_connections", "upstream_keepalive", "buffer_size", "access_log"]
+
+HAPROXY_BALANCE = {
+    "roundrobin": ["balance roundrobin"],
+    "leastconn": ["balance leastconn"],
+    "random": ["balance random"],
+    "hash": ["balance hash src_port", "hash-type consistent"],
+}
+NGINX_BALANCE = {
+    "roundrobin": [],
+    "leastconn": ["least_conn;"],
+    "random": ["random;"],
+    "hash": ["hash $remote_addr$remote_port consistent;"],
+}
+CADDY_POLICY = {"roundrobin": "round_robin", "leastconn": "least_conn", "random": "random"}
+TRAEFIK_STRATEGY = {"roundrobin": "wrr", "leastconn": "p2c"}
+SUPPORTED = {
+    "haproxy": set(HAPROXY_BALANCE),
+    "nginx": set(NGINX_BALANCE),
+    "caddy": set(CADDY_POLICY),
+    "traefik": set(TRAEFIK_STRATEGY),
+    "tyk": {"roundrobin"},
+}
+
+
+class UnsupportedStack(ValueError):
+    pass
+
+
+def load_topology(path=TOPOLOGY_FILE):
+    try:
+        import yaml
+    except ImportError:
+        sys.exit("Reading the topology requires PyYAML (pip install pyyaml)")
+    with open(path) as f:
+        return yaml.safe_load(f)
+
+
+class Stack:
+    """One gateway stack to render: mode, upstream replicas, algorithm and tuning knobs."""
+
+    def __init__(self, mode="http", replicas=1, algorithm="roundrobin", echo_workers=None,
+                 tuning=None, name=None):
+        unknown = set(tuning or {}) - set(KNOBS)
+        if unknown:
+            raise ValueError(f"Unknown tuning knobs {sorted(unknown)} (known: {', '.join(KNOBS)})")
+        if not 1 <= replicas <= len(string.ascii_lowercase):
+            raise ValueError("replicas must be between 1 and 26")
+        self.mode = mode
+        self.replicas = replicas
+        self.algorithm = algorithm
+        self.echo_workers = echo_workers
+        self.tuning = tuning or {}
+        self.name = name  # compose project name
+
+    @classmethod
+    def from_topology(cls, topology, tuning, mode, name=None):
+        if tuning not in topology["tuning"]:
+            raise KeyError(f"No tuning profile '{tuning}' (known: {', '.join(topology['tuning'])})")
+        upstream = topology.get("upstream", {})
+        return cls(mode, upstream.get("replicas", 1), upstream.get("algorithm", "roundrobin"),
+                   upstream.get("workers"), topology["tuning"][tuning] or {}, name)
+
+    @property
+    def port(self):
+        return ECHO_PORTS[self.mode]
+
+    @property
+    def upstreams(self):
+        return [f"echo-{letter}" for letter in string.ascii_lowercase[:self.replicas]]
+
+    def get(self, knob):
+        return self.tuning.get(knob)
+
+    @property
+    def go_environment(self):
+        """GOMAXPROCS for the Go gateways ("auto" keeps Go's default of one per CPU)."""
+        workers = self.get("workers")
+        return [f'      GOMAXPROCS: "{workers}"'] if workers not in (None, "auto") else []
+
+
+def echo_services(gateway, stack):
+    lines = []
+    for i, name in enumerate(stack.upstreams):
+        letter = name[-1]
+        lines += [
+            f"  {name}:",
+            "    build:",
+            f"      context: {ECHO_DIR}",
+            f"      dockerfile: Dockerfile.{stack.mode}",
+            *(["      additional_contexts:", f"        proto: {SCENARIO_DIR / 'base' / 'proto'}"]
+              if stack.mode == "grpc" else []),
+            f"    container_name: echo-{stack.mode}-{letter}-{gateway}",
+            "    environment:",
+            f"      - SERVICE_NAME=echo-{letter.upper()}",
+        ]
+        if stack.echo_workers:
+            lines.append(f"      - WORKERS={stack.echo_workers}")
+        if i == 0:
+            # first replica reachable from the host for the upstream baseline
+            lines += ["    ports:", f'      - "{stack.port}:{stack.port}"']
+        lines.append("")
+    return lines
+
+
+def gateway_service(stack, image, container, volumes, environment=(), extra=(), depends_on=(), metrics_port=None):
+    suffix = "-grpc" if stack.mode == "grpc" else ""
+    lines = [
+        "  gateway:",
+        f"    image: {image}",
+        f"    container_name: {container}{suffix}",
+        *extra,
+    ]
+    if environment:
+        lines += ["    environment:", *environment]
+    lines += [
+        "    ports:",
+        '      - "${GATEWAY_PORT:-8080}:80"',
+        # stats endpoint scraped by common/gateway_metrics.py
+        *([f'      - "${{METRICS_PORT:-8404}}:{metrics_port}"'] if metrics_port else []),
+        "    volumes:",
+        *(f"      - {volume}" for volume in volumes),
+        "    depends_on:",
+        *(f"      - {name}" for name in [*depends_on, *stack.upstreams]),
+        '    restart: "no"',
+        "",
+    ]
+    return lines
+
+
+def render_haproxy(stack):
+    grpc = stack.mode == "grpc"
+    tuning = [
+        f"    nbthread {stack.get('workers')}" if stack.get("workers") not in (None, "auto") else None,
+        f"    maxconn {stack.get('max_connections')}" if stack.get("max_connections") else None,
+        f"    tune.bufsize {stack.get('buffer_size')}" if stack.get("buffer_size") else None,
+    ]
+    balance = HAPROXY_BALANCE[stack.algorithm] if stack.replicas > 1 else []
+    if stack.get("upstream_keepalive"):
+        # share idle server connections between client connections
+        balance = [*balance, "http-reuse always"]
+    server_options = " proto h2" if grpc else ""
+    config = "\n".join([
+        "global", "    daemon", *filter(None, tuning), "",
+        "defaults", "    mode http", "",
+        "frontend fe_main", f"    bind *:80{' proto h2' if grpc else ''}", "    default_backend be_echo", "",
+        "backend be_echo", *(f"    {line}" for line in balance),
+        *(f"    server {name.replace('-', '')} {name}:{stack.port}{server_options}" for name in stack.upstreams),
+        "",
+        "frontend stats", "    # metrics (common/gateway_metrics.py): /stats;csv",
+        "    bind *:8404", "    stats enable", "    stats uri /stats",
+    ]) + "\n"
+    service = gateway_service(stack, "haproxy:3.2.6-alpine", "gateway",
+                              ["./haproxy.cfg:/usr/local/etc/haproxy/haproxy.cfg:ro"], metrics_port=8404)
+    return {"haproxy.cfg": config}, service
+
+
+def render_nginx(stack):
+    grpc = stack.mode == "grpc"
+    workers = stack.get("workers")
+    keepalive = stack.get("upstream_keepalive")
+    buffer_size = stack.get("buffer_size")
+    location = ["grpc_pass grpc://echo;" if grpc else "proxy_pass http://echo;"]
+    if keepalive and not grpc:
+        # upstream keep-alive needs HTTP/1.1 without the Connection: close nginx sends by default
+        location += ["proxy_http_version 1.1;", 'proxy_set_header Connection "";']
+    if buffer_size:
+        location += [f"grpc_buffer_size {buffer_size};"] if grpc else [
+            f"proxy_buffer_size {buffer_size};", f"proxy_buffers 8 {buffer_size};"]
+    events = (f"events {{\n    worker_connections {stack.get('max_connections')};\n}}"
+              if stack.get("max_connections") else "events {}")
+    config = "\n".join([
+        *([f"worker_processes {workers};", ""] if workers is not None else []),
+        events, "",
+        "http {",
+        *(["    access_log off;", ""] if stack.get("access_log") is False else []),
+        "    upstream echo {",
+        *(f"        {line}" for line in (NGINX_BALANCE[stack.algorithm] if stack.replicas > 1 else [])),
+        *(f"        server {name}:{stack.port};" for name in stack.upstreams),
+        *([f"        keepalive {keepalive};"] if keepalive else []),
+        "    }", "",
+        "    server {", "        listen 80;", *(["        http2 on;"] if grpc else []), "",
+        "        location / {", *(f"            {line}" for line in location), "        }",
+        "    }", "",
+        "    # metrics (common/gateway_metrics.py)",
+        "    server {", "        listen 8404;", "",
+        "        location /stub_status {", "            stub_status;", "        }",
+        "    }",
+        "}",
+    ]) + "\n"
+    service = gateway_service(stack, "nginx:1.29.3-alpine", "nginx", ["./nginx.conf:/etc/nginx/nginx.conf:ro"],
+                              metrics_port=8404)
+    return {"nginx.conf": config}, service
+
+
+def render_caddy(stack):
+    grpc = stack.mode == "grpc"
+    transport = [*(["versions h2c"] if grpc else []),
+                 *([f"keepalive_idle_conns_per_host {stack.get('upstream_keepalive')}"]
+                   if stack.get("upstream_keepalive") else [])]
+    proxy = []
+    if stack.replicas > 1:
+        proxy.append(f"lb_policy {CADDY_POLICY[stack.algorithm]}")
+    if transport:
+        proxy += ["transport http {", *(f"    {line}" for line in transport), "}"]
+    upstreams = " ".join(f"{name}:{stack.port}" for name in stack.upstreams)
+    lines = []
+    if grpc:
+        lines += ["{", "  servers {", "    protocols h1 h2c", "  }", "}", ""]
+    lines += [":80 {", f"    reverse_proxy {upstreams}" + (" {" if proxy else "")]
+    if proxy:
+        lines += [*(f"        {line}" for line in proxy), "    }"]
+    lines.append("}")
+    service = gateway_service(stack, "caddy:2.8.4-alpine", "caddy", ["./Caddyfile:/etc/caddy/Caddyfile"],
+                              environment=stack.go_environment)
+    return {"Caddyfile": "\n".join(lines) + "\n"}, service
+
+
+def render_traefik(stack):
+    scheme = "h2c" if stack.mode == "grpc" else "http"
+    static = [
+        "entryPoints:", "  web:", "    address: :80", "  traefik:", "    address: :8080", "",
+        "providers:", "  file:", "    directory: /etc/traefik/dynamic_conf", "",
+        "api:", "  dashboard: true", "",
+        "# served on the traefik entry point (common/gateway_metrics.py)",
+        "metrics:", "  prometheus:", "    addEntryPointsLabels: true", "    addServicesLabels: true", "",
+    ]
+    if stack.get("upstream_keepalive"):
+        static += ["serversTransport:", f"  maxIdleConnsPerHost: {stack.get('upstream_keepalive')}", ""]
+    static += ["log:", "  format: json", "  level: WARN"]
+    dynamic = [
+        "http:",
+        "  routers:",
+        "    routerTest:",
+        "      entryPoints:",
+        "        - web",
+        '      rule: "PathPrefix(`/`)"',
+        "      service: echo-service",
+        "",
+        "  services:",
+        "    echo-service:",
+        "      loadBalancer:",
+        *([f"        strategy: {TRAEFIK_STRATEGY[stack.algorithm]}"] if stack.replicas > 1 else []),
+        "        servers:",
+        *(f"        - url: {scheme}://{name}:{stack.port}/" for name in stack.upstreams),
+    ]
+    service = gateway_service(
+        stack, "traefik:v3.5", "traefik",
+        ["./traefik.yml:/etc/traefik/traefik.yml:ro",
+         "./dynamic_conf.yml:/etc/traefik/dynamic_conf/dynamic_conf.yml:ro"],
+        environment=stack.go_environment,
+        extra=["    command:", '      - "--api.insecure=true"', '      - "--configFile=/etc/traefik/traefik.yml"'],
+        metrics_port=8080)
+    return {"traefik.yml": "\n".join(static) + "\n", "dynamic_conf.yml": "\n".join(dynamic) + "\n"}, service
+
+
+def render_tyk(stack):
+    scheme = "h2c" if stack.mode == "grpc" else "http"
+    suffix = "-grpc" if stack.mode == "grpc" else ""
+    targets = [f"{scheme}://{name}:{stack.port}" for name in stack.upstreams]
+    proxy = {"listen_path": "/", "target_url": targets[0], "strip_listen_path": True}
+    if stack.replicas > 1:
+        proxy.update(enable_load_balancing=True, target_list=targets)
+    api = {
+        "name": "Echo Service",
+        "use_keyless": True,
+        "version_data": {"not_versioned": True, "versions": {"Default": {"name": "Default"}}},
+        "proxy": proxy,
+    }
+    conf = {
+        "log_level": "warn",
+        "template_path": "/opt/tyk-gateway/templates",
+        "tyk_js_path": "/opt/tyk-gateway/js/tyk.js",
+        "app_path": "/opt/tyk-gateway/apps/",
+        "storage": {
+            "type": "redis", "host": "tyk-redis", "port": 6379, "username": "", "password": "",
+            "database": 0, "optimisation_max_idle": 2000, "optimisation_max_active": 4000,
+        },
+    }
+    if stack.get("upstream_keepalive"):
+        conf["max_idle_connections_per_host"] = stack.get("upstream_keepalive")
+    redis = ["  tyk-redis:", "    image: redis:7-alpine", f"    container_name: tyk-redis{suffix}", ""]
+    service = gateway_service(
+        stack, "tykio/tyk-gateway:v5.10.0", "tyk",
+        ["./tyk.conf:/opt/tyk-gateway/tyk.conf", "./apps:/opt/tyk-gateway/apps"],
+        environment=['      TYK_GW_LISTENPORT: "80"', '      TYK_GW_SECRET: "12345"',
+                     '      TYK_GW_POLICIES_POLICYCONNECTIONSTRING: ""', *stack.go_environment],
+        depends_on=["tyk-redis"])
+    files = {"tyk.conf": json.dumps(conf, indent=2) + "\n",
+             "apps/echo-service-api.json": json.dumps(api, indent=2) + "\n"}
+    return files, redis + service
+
+
+RENDERERS = {
+    "caddy": render_caddy,
+    "haproxy": render_haproxy,
+    "nginx": render_nginx,
+    "traefik": render_traefik,
+    "tyk": render_tyk,
+}
+
+
+def render(gateway, stack):
+    """Config files and docker-compose.yaml of a stack as {relative path: content}."""
+    if gateway not in RENDERERS:
+        raise UnsupportedStack(f"No renderer for gateway '{gateway}'")
+    if stack.replicas > 1 and stack.algorithm not in SUPPORTED[gateway]:
+        raise UnsupportedStack(f"{gateway} does not support the '{stack.algorithm}' algorithm")
+    files, service = RENDERERS[gateway](stack)
+    compose = [*([f"name: {stack.name}", ""] if stack.name else []),
+               "services:", *service, *echo_services(gateway, stack)]
+    files["docker-compose.yaml"] = "\n".join(compose).rstrip("\n") + "\n"
+    return files
+
+
+def write_stack(files, out):
+    for name, content in files.items():
+        path = Path(out) / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+    return Path(out)
+
+
+def stack_dir(gateway, tuning, mode):
+    return SCENARIO_DIR / gateway / "generated" / f"{tuning}_{mode}"
+
+
+def generate(gateway, tuning, mode, topology=None, out=None):
+    """Render one gateway stack of the topology with a tuning profile, return its directory."""
+    topology = topology or load_topology()
+    stack = Stack.from_topology(topology, tuning, mode, name=f"{gateway}-{tuning}-{mode}")
+    return write_stack(render(gateway, stack), out or stack_dir(gateway, tuning, mode))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render the gateway stacks of the load test topology")
+    parser.add_argument("--topology", default=str(TOPOLOGY_FILE), help="Topology YAML file")
+    parser.add_argument("--tuning", default="default", help="Tuning profile of the topology")
+    parser.add_argument("--gateways", nargs="+", default=None,
+                        help="Gateways to render (default: the gateways of the topology)")
+    parser.add_argument("--modes", nargs="+", default=None, choices=list(ECHO_PORTS),
+                        help="Modes to render (default: the modes of the topology)")
+    args = parser.parse_args()
+
+    topology = load_topology(args.topology)
+    for gateway in args.gateways or topology["gateways"]:
+        for mode in args.modes or topology["modes"]:
+            try:
+                print(generate(gateway, args.tuning, mode, topology))
+            except UnsupportedStack as exc:
+                print(f"[INFO] {exc}, skipping", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
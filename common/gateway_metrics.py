@@ -0,0 +1,293 @@
+"""
+Gateway-native metrics scraped during the experiments.
+
+A background thread polls the gateway's own counters on a configurable
+interval and normalizes them into one schema, so queueing, connection reuse to
+the upstream and retries inside the gateway can be put next to the latencies
+the clients measured:
+
+    active_connections    client connections open at the gateway
+    upstream_connections  connections from the gateway to the upstreams
+    queue_depth           requests waiting for a free upstream connection
+    responses_5xx         5xx responses sent (counter)
+    retries               retried upstream requests (counter)
+    requests              requests handled (counter)
+
+One scraper per gateway, on the metrics port published by the stacks
+(METRICS_PORT, default 8404):
+
+    haproxy  stats page in CSV (/stats;csv): scur, qcur, hrsp_5xx, wretr, req_tot
+    nginx    stub_status: active connections and requests only
+    traefik  Prometheus endpoint of the traefik entry point (/metrics)
+    tyk      the gateway has no metrics endpoint of its own; with TYK_METRICS_URL
+             the Prometheus endpoint of a Tyk Pump is scraped (tyk_http_status)
+
+Fields a gateway does not expose stay empty. Further gateways are plugins
+like the reload adapters of scenario 2: a subclass of MetricsScraper decorated
+with @register("envoy").
+
+    with MetricsPoller("haproxy") as poller:
+        ...
+    poller.write_csv("metrics.csv")
+"""
+import csv
+import http.client
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+METRICS_PORT = os.getenv("METRICS_PORT", "8404")
+INTERVAL = 0.5  # seconds between two scrapes
+FIELDS = ["active_connections", "upstream_connections", "queue_depth", "responses_5xx", "retries", "requests"]
+COUNTERS = ["responses_5xx", "retries", "requests"]
+HEADER = ["timestamp_ms", "offset_s", "iteration", "gateway", *FIELDS]
+
+SCRAPERS = {}
+
+PROMETHEUS_LINE = re.compile(r"^([a-zA-Z_:][\w:]*)(?:\{(.*)\})?\s+(\S+)")
+PROMETHEUS_LABEL = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+
+class UnsupportedMetrics(Exception):
+    pass
+
+
+def register(name):
+    """Class decorator adding a MetricsScraper to the registry under the given gateway name."""
+    def decorator(cls):
+        cls.name = name
+        SCRAPERS[name] = cls
+        return cls
+    return decorator
+
+
+def get_scraper(gateway, port=None):
+    if gateway not in SCRAPERS:
+        raise UnsupportedMetrics(f"No metrics scraper for gateway '{gateway}'")
+    return SCRAPERS[gateway](port)
+
+
+def parse_prometheus(text):
+    """Samples of the Prometheus text format as (name, labels, value)."""
+    samples = []
+    for line in text.splitlines():
+        match = None if line.startswith("#") else PROMETHEUS_LINE.match(line)
+        if not match:
+            continue
+        name, labels, value = match.groups()
+        samples.append((name, dict(PROMETHEUS_LABEL.findall(labels or "")), float(value)))
+    return samples
+
+
+def metric_sum(samples, name, **labels):
+    """Sum of a metric over the samples whose labels match (None if the metric is missing)."""
+    values = [value for n, l, value in samples
+              if n == name and all(l.get(k) == v for k, v in labels.items())]
+    return sum(values) if values else None
+
+
+class MetricsScraper:
+    """Fetches one snapshot of a gateway's counters in the common schema."""
+
+    name = None
+    path = None
+
+    def __init__(self, port=None):
+        self.host = "localhost"
+        self.port = int(port or METRICS_PORT)
+
+    def fetch(self):
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=1)
+        try:
+            conn.request("GET", self.path)
+            resp = conn.getresponse()
+            body = resp.read().decode(errors="replace")
+        finally:
+            conn.close()
+        if resp.status != 200:
+            raise OSError(f"GET {self.path} returned {resp.status}")
+        return body
+
+    def parse(self, body):
+        raise NotImplementedError
+
+    def scrape(self):
+        return {field: None for field in FIELDS} | self.parse(self.fetch())
+
+
+@register("haproxy")
+class HAProxyScraper(MetricsScraper):
+    # `frontend stats` with `stats uri /stats` on the metrics port
+    path = "/stats;csv"
+
+    def parse(self, body):
+        rows = list(csv.DictReader(body.lstrip("# ").splitlines()))
+        # the stats frontend itself is not part of the measured traffic
+        frontends = [r for r in rows if r["svname"] == "FRONTEND" and r["pxname"] != "stats"]
+        backends = [r for r in rows if r["svname"] == "BACKEND"]
+
+        def total(rows, column):
+            return sum(int(r[column] or 0) for r in rows)
+
+        return {
+            "active_connections": total(frontends, "scur"),
+            "upstream_connections": total(backends, "scur"),
+            "queue_depth": total(backends, "qcur"),
+            "responses_5xx": total(frontends, "hrsp_5xx"),
+            "retries": total(backends, "wretr"),
+            "requests": total(frontends, "req_tot"),
+        }
+
+
+@register("nginx")
+class NginxScraper(MetricsScraper):
+    path = "/stub_status"
+
+    def parse(self, body):
+        # Active connections: 3 / server accepts handled requests / 10 10 25 / Reading: ...
+        lines = body.splitlines()
+        return {
+            # without the connection of the scrape itself
+            "active_connections": int(lines[0].split(":")[1]) - 1,
+            "requests": int(lines[2].split()[2]),
+        }
+
+
+@register("traefik")
+class TraefikScraper(MetricsScraper):
+    # metrics.prometheus on the traefik entry point (8080 in the container)
+    path = "/metrics"
+
+    def parse(self, body):
+        samples = parse_prometheus(body)
+        requests = [(labels, value) for name, labels, value in samples
+                    if name == "traefik_entrypoint_requests_total" and labels.get("entrypoint") != "traefik"]
+        open_connections = metric_sum(samples, "traefik_open_connections", entrypoint="web")
+        if open_connections is None:
+            # Traefik 2
+            open_connections = metric_sum(samples, "traefik_entrypoint_open_connections", entrypoint="web")
+        return {
+            "active_connections": open_connections,
+            "upstream_connections": metric_sum(samples, "traefik_service_open_connections"),
+            "responses_5xx": sum(v for labels, v in requests if labels.get("code", "").startswith("5"))
+            if requests else None,
+            # only exported once a retry happened
+            "retries": metric_sum(samples, "traefik_service_retries_total") or 0,
+            "requests": sum(v for _, v in requests) if requests else None,
+        }
+
+
+@register("tyk")
+class TykScraper(MetricsScraper):
+    path = "/metrics"
+
+    def __init__(self, port=None):
+        super().__init__(port)
+        url = os.getenv("TYK_METRICS_URL")
+        if not url:
+            raise UnsupportedMetrics("tyk has no metrics endpoint, set TYK_METRICS_URL to a Tyk Pump "
+                                     "Prometheus endpoint")
+        parts = urlsplit(url)
+        self.host, self.port, self.path = parts.hostname, parts.port or 80, parts.path or "/metrics"
+
+    def parse(self, body):
+        status = [(labels, value) for name, labels, value in parse_prometheus(body) if name == "tyk_http_status"]
+        return {
+            "responses_5xx": sum(v for labels, v in status if labels.get("code", "").startswith("5")),
+            "requests": sum(v for _, v in status),
+        }
+
+
+class MetricsPoller:
+    """Scrapes a gateway's metrics on a background thread (same time base as ResourceSampler)."""
+
+    def __init__(self, gateway, interval=INTERVAL, port=None, log=print):
+        self.gateway = gateway
+        self.scraper = get_scraper(gateway, port)
+        self.interval = interval
+        self.log = log
+        self.samples = []  # (wall ns, monotonic ns, iteration, fields)
+        self.iteration = None
+        self.origin_ns = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        self.origin_ns = time.monotonic_ns()
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def mark(self, iteration):
+        """Label the following samples with an iteration."""
+        self.iteration = iteration
+
+    def _run(self):
+        interval_ns = int(self.interval * 1e9)
+        next_ns = time.monotonic_ns()
+        warned = False
+        while not self._stop.is_set():
+            wall_ns, now_ns = time.time_ns(), time.monotonic_ns()
+            try:
+                self.samples.append((wall_ns, now_ns, self.iteration, self.scraper.scrape()))
+            except (OSError, http.client.HTTPException, ValueError, IndexError, KeyError) as exc:
+                if not warned:
+                    warned = True
+                    self.log(f"[WARN] Cannot scrape the metrics of {self.gateway}: {exc}")
+            next_ns += interval_ns
+            while next_ns <= time.monotonic_ns():
+                next_ns += interval_ns
+            self._stop.wait((next_ns - time.monotonic_ns()) / 1e9)
+
+    def rows(self, origin=None):
+        """Samples as CSV rows, offsets in seconds from origin (monotonic seconds, default: start)."""
+        origin_ns = int(origin * 1e9) if origin is not None else self.origin_ns
+        return [[round(wall_ns / 1e6, 3), round((mono_ns - origin_ns) / 1e9, 4), iteration, self.gateway,
+                 *(fields[f] for f in FIELDS)]
+                for wall_ns, mono_ns, iteration, fields in self.samples]
+
+    def write_csv(self, path, origin=None):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(HEADER)
+            writer.writerows(self.rows(origin))
+        return path
+
+
+def merge_timeline(latency, metrics, latency_time="offset", metrics_time="offset_s"):
+    """
+    Put the gateway metrics next to client-side latency rows (pandas DataFrames).
+
+    Every latency row gets the last scrape at or before its time (merge_asof);
+    the counters are additionally turned into per-second rates between two
+    scrapes (responses_5xx_per_s, retries_per_s, requests_per_s). Scenario 3:
+    offset / offset_s, scenarios 1 and 2: timestamp_ms / timestamp_ms.
+    """
+    import pandas as pd
+
+    metrics = metrics.sort_values(metrics_time).copy()
+    seconds = metrics[metrics_time].diff() / (1000 if metrics_time.endswith("_ms") else 1)
+    for counter in COUNTERS:
+        metrics[f"{counter}_per_s"] = metrics[counter].diff() / seconds
+    # the latency rows keep their own time and iteration columns
+    metrics = metrics.drop(columns=[c for c in ("timestamp_ms", "offset_s", "iteration")
+                                    if c != metrics_time and c in latency])
+    metrics[metrics_time] = metrics[metrics_time].astype(float)
+    latency = latency.assign(**{latency_time: latency[latency_time].astype(float)}).sort_values(latency_time)
+    if latency_time == metrics_time:
+        return pd.merge_asof(latency, metrics, on=latency_time, direction="backward")
+    return pd.merge_asof(latency, metrics, left_on=latency_time, right_on=metrics_time, direction="backward")
@@ -0,0 +1,292 @@
+"""
+Pure Python HDR histogram for latency recording.
+
+The bucket layout and the compressed V2 encoding follow the reference
+HdrHistogram implementation, so the interval logs written here can also be
+read by the standard HdrHistogram tools (e.g. HistogramLogProcessor).
+Counts are stored sparsely, which keeps per-interval histograms small and
+cheap to merge. Latencies are recorded in microseconds.
+"""
+import base64
+import math
+import struct
+import time
+import zlib
+from collections import Counter, defaultdict
+
+# cookie bases with the 0x10 word size flag that the reference implementations write
+V2_COOKIE = 0x1c849313
+V2_COMPRESSED_COOKIE = 0x1c849314
+COOKIE_MASK = ~0xf0
+HEADER_FORMAT = ">iiiiqqd"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+
+class HdrHistogram:
+    """Mergeable histogram with a fixed relative precision (significant digits)."""
+
+    def __init__(self, lowest=1, highest=3_600_000_000, significant_digits=3):
+        if lowest != 1:
+            raise ValueError("Only a lowest discernible value of 1 is supported")
+        self.lowest = lowest
+        self.highest = highest
+        self.significant_digits = significant_digits
+        largest_single_unit = 2 * 10 ** significant_digits
+        self._sub_bucket_bits = max(1, math.ceil(math.log2(largest_single_unit)))
+        self._half_bits = self._sub_bucket_bits - 1
+        self.counts = defaultdict(int)
+        self.total_count = 0
+        self.min = None
+        self.max = 0
+
+    def _index(self, value):
+        bucket = max(0, value.bit_length() - self._sub_bucket_bits)
+        return (bucket << self._half_bits) + (value >> bucket)
+
+    def _bucket_of(self, index):
+        return max(0, (index >> self._half_bits) - 1)
+
+    def lowest_equivalent(self, index):
+        bucket = self._bucket_of(index)
+        return (index - (bucket << self._half_bits)) << bucket
+
+    def highest_equivalent(self, index):
+        return self.lowest_equivalent(index) + (1 << self._bucket_of(index)) - 1
+
+    def median_equivalent(self, index):
+        return self.lowest_equivalent(index) + ((1 << self._bucket_of(index)) >> 1)
+
+    def record(self, value, count=1):
+        value = min(max(0, round(value)), self.highest)
+        self.counts[self._index(value)] += count
+        self.total_count += count
+        if self.min is None or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def record_many(self, values):
+        """Record a numpy array of values at once (vectorized bucket computation)."""
+        import numpy as np
+
+        values = np.rint(np.clip(np.asarray(values, dtype=np.float64), 0, self.highest)).astype(np.int64)
+        if not len(values):
+            return
+        # frexp's exponent equals int.bit_length() for positive integers
+        buckets = np.maximum(0, np.frexp(values)[1] - self._sub_bucket_bits)
+        indices, counts = np.unique((buckets << self._half_bits) + (values >> buckets),
+                                    return_counts=True)
+        for index, count in zip(indices.tolist(), counts.tolist()):
+            self.counts[index] += count
+        self.total_count += len(values)
+        low, high = int(values.min()), int(values.max())
+        if self.min is None or low < self.min:
+            self.min = low
+        self.max = max(self.max, high)
+
+    def add(self, other):
+        """Merge another histogram into this one."""
+        for index, count in other.counts.items():
+            self.counts[index] += count
+        self.total_count += other.total_count
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def mean(self):
+        if not self.total_count:
+            return 0.0
+        return sum(self.median_equivalent(i) * c for i, c in self.counts.items()) / self.total_count
+
+    @property
+    def stddev(self):
+        if not self.total_count:
+            return 0.0
+        mean = self.mean
+        var = sum((self.median_equivalent(i) - mean) ** 2 * c
+                  for i, c in self.counts.items()) / self.total_count
+        return math.sqrt(var)
+
+    def value_at_percentile(self, percentile):
+        """Value at the given percentile (0-100), at the histogram's precision."""
+        if not self.total_count:
+            return 0
+        target = max(1, math.ceil(min(percentile, 100.0) / 100 * self.total_count))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(self.highest_equivalent(index), self.max)
+        return self.max
+
+    def encode(self):
+        """Compressed V2 encoding as base64 string (HdrHistogram log format)."""
+        payload = bytearray()
+        zeros = 0
+        for index in range(max(self.counts, default=-1) + 1):
+            count = self.counts.get(index, 0)
+            if count == 0:
+                zeros += 1
+                continue
+            if zeros:
+                _write_zigzag(payload, -zeros)
+                zeros = 0
+            _write_zigzag(payload, count)
+        header = struct.pack(HEADER_FORMAT, V2_COOKIE, len(payload), 0,
+                             self.significant_digits, self.lowest, self.highest, 1.0)
+        compressed = zlib.compress(header + bytes(payload))
+        return base64.b64encode(
+            struct.pack(">ii", V2_COMPRESSED_COOKIE, len(compressed)) + compressed).decode()
+
+    @classmethod
+    def decode(cls, encoded: str):
+        raw = base64.b64decode(encoded)
+        cookie, length = struct.unpack(">ii", raw[:8])
+        if cookie & COOKIE_MASK != V2_COMPRESSED_COOKIE & COOKIE_MASK:
+            raise ValueError("Not a compressed V2 HdrHistogram encoding")
+        data = zlib.decompress(raw[8:8 + length])
+        cookie, payload_len, _, digits, lowest, highest, _ = struct.unpack(
+            HEADER_FORMAT, data[:HEADER_SIZE])
+        if cookie & COOKIE_MASK != V2_COOKIE & COOKIE_MASK:
+            raise ValueError("Not a V2 HdrHistogram encoding")
+        hist = cls(lowest, highest, digits)
+        payload = data[HEADER_SIZE:HEADER_SIZE + payload_len]
+        pos = 0
+        index = 0
+        while pos < len(payload):
+            value, pos = _read_zigzag(payload, pos)
+            if value < 0:
+                index += -value
+                continue
+            hist.counts[index] = value
+            hist.total_count += value
+            low = hist.lowest_equivalent(index)
+            if hist.min is None:
+                hist.min = low
+            hist.max = hist.highest_equivalent(index)
+            index += 1
+        return hist
+
+
+def _write_zigzag(buf, value):
+    value = (value << 1) ^ (value >> 63)
+    while value > 0x7f:
+        buf.append((value & 0x7f) | 0x80)
+        value >>= 7
+    buf.append(value)
+
+
+def _read_zigzag(buf, pos):
+    result = 0
+    shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        result |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            break
+        shift += 7
+    return (result >> 1) ^ -(result & 1), pos
+
+
+class IntervalRecorder:
+    """
+    Records latencies into one histogram per time interval.
+
+    append() accepts load client result rows (response time at index 0 or the
+    corrected response time at index 9, request offset at index 7), so the
+    recorder can be passed wherever the load client collects rows. Failed
+    requests (status code 0) are only counted, not recorded.
+    """
+
+    def __init__(self, interval=1.0, significant_digits=3):
+        self.interval = interval
+        self.significant_digits = significant_digits
+        self.histograms = {}
+        self.statuses = Counter()
+
+    def __len__(self):
+        return self.statuses.total()
+
+    def append(self, row):
+        self.statuses[row[6]] += 1
+        if not row[6]:
+            return
+        latency = row[9] if len(row) > 8 else row[0]
+        slot = int(row[7] // self.interval)
+        hist = self.histograms.get(slot)
+        if hist is None:
+            hist = self.histograms[slot] = HdrHistogram(
+                significant_digits=self.significant_digits)
+        hist.record(latency * 1_000_000)
+
+    def merge(self, other):
+        self.statuses.update(other.statuses)
+        for slot, hist in other.histograms.items():
+            if slot in self.histograms:
+                self.histograms[slot].add(hist)
+            else:
+                self.histograms[slot] = hist
+        return self
+
+    def total(self):
+        total = HdrHistogram(significant_digits=self.significant_digits)
+        for hist in self.histograms.values():
+            total.add(hist)
+        return total
+
+
+def write_log(path, tag, recorder: IntervalRecorder, start_time=None):
+    """Append the interval histograms of a recorder to an HdrHistogram log file."""
+    start_time = time.time() if start_time is None else start_time
+    try:
+        new_file = open(path).read(1) == ""
+    except FileNotFoundError:
+        new_file = True
+    with open(path, "a") as f:
+        if new_file:
+            f.write("#[Histogram log format version 1.3]\n")
+            f.write(f"#[StartTime: {start_time:.3f} (seconds since epoch)]\n")
+            f.write('"StartTimestamp","Interval_Length","Interval_Max","Interval_Compressed_Histogram"\n')
+        f.write(f"#[Tag {tag} started at {start_time:.3f}]\n")
+        for slot in sorted(recorder.histograms):
+            hist = recorder.histograms[slot]
+            f.write(f"Tag={tag},{slot * recorder.interval:.3f},{recorder.interval:.3f},"
+                    f"{hist.max / 1000:.3f},{hist.encode()}\n")
+
+
+def read_log(path):
+    """Read an HdrHistogram log into {tag: [(start_s, length_s, histogram), ...]}."""
+    entries = defaultdict(list)
+    with open(path) as f:
+        for line in f:
+            if line.startswith("#") or line.startswith('"') or not line.strip():
+                continue
+            fields = line.strip().split(",")
+            tag = None
+            if fields[0].startswith("Tag="):
+                tag = fields.pop(0)[4:]
+            start, length, _, encoded = fields
+            entries[tag].append((float(start), float(length), HdrHistogram.decode(encoded)))
+    return dict(entries)
+
+
+def merge_intervals(intervals):
+    """Merge the histograms of a list of log intervals into one histogram."""
+    total = HdrHistogram()
+    for _, _, hist in intervals:
+        total.add(hist)
+    return total
+
+
+def throughput_series(intervals):
+    """Requests per second for every log interval as [(start_s, rps), ...]."""
+    return [(start, hist.total_count / length) for start, length, hist in intervals]
+
+
+def percentile_series(intervals, percentile):
+    """Latency percentile in milliseconds for every log interval as [(start_s, ms), ...]."""
+    return [(start, hist.value_at_percentile(percentile) / 1000)
+            for start, _, hist in intervals]
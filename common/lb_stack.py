@@ -0,0 +1,70 @@
+"""
+Scenario 3 load-balancing stacks: one gateway in front of 1..N echo replicas.
+
+Renders a compose stack and the gateway configuration for a replica count and
+a balancing algorithm (with the gateway renderers of common/gateway_config.py)
+into a directory, by default 3-load-test/<gateway>/lb/<algorithm>_<replicas>,
+so the replica/algorithm dimension of the load test does not need hand-edited
+configs. The replicas are echo-a, echo-b, ... and answer with their own name,
+which the load client counts (--backends).
+
+The algorithms (roundrobin, leastconn, random, hash) map to the gateways'
+own balancing options as described in common/gateway_config.py; combinations
+a gateway does not offer are reported as unsupported.
+
+Usage:
+    python3 common/lb_stack.py --gateway nginx --replicas 4 --algorithm leastconn
+"""
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.gateway_config import (  # noqa: E402
+    ALGORITHMS, RENDERERS, SCENARIO_DIR, SUPPORTED, Stack, UnsupportedStack, load_topology, render, write_stack)
+
+REPLICAS = [1, 2, 4, 8]
+
+
+def stack_dir(gateway, algorithm, replicas):
+    return SCENARIO_DIR / gateway / "lb" / f"{algorithm}_{replicas}"
+
+
+def generate(gateway, replicas, algorithm, out=None, workers=None, tuning="default"):
+    """Write the compose stack and gateway config, return the stack directory."""
+    if gateway not in SUPPORTED:
+        raise UnsupportedStack(f"No load-balancing stack for gateway '{gateway}'")
+    if algorithm not in SUPPORTED[gateway]:
+        raise UnsupportedStack(f"{gateway} does not support the '{algorithm}' algorithm")
+    profiles = load_topology()["tuning"]
+    if tuning not in profiles:
+        raise KeyError(f"No tuning profile '{tuning}' (known: {', '.join(profiles)})")
+    stack = Stack("http", replicas, algorithm, workers, profiles[tuning],
+                  name=f"{gateway}-lb-{algorithm}-{replicas}")
+    return write_stack(render(gateway, stack), out or stack_dir(gateway, algorithm, replicas))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render a scenario 3 load-balancing stack")
+    parser.add_argument("--gateway", required=True, choices=sorted(RENDERERS))
+    parser.add_argument("--replicas", type=int, required=True, help="Number of echo replicas (1-26)")
+    parser.add_argument("--algorithm", default="roundrobin", choices=ALGORITHMS)
+    parser.add_argument("--out", default=None,
+                        help="Stack directory (default: 3-load-test/<gateway>/lb/<algorithm>_<replicas>)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes per echo replica (default: the echo service's default)")
+    parser.add_argument("--tuning", default="default",
+                        help="Tuning profile of 3-load-test/topology.yaml (default: default)")
+    args = parser.parse_args()
+    if not 1 <= args.replicas <= 26:
+        parser.error("--replicas must be between 1 and 26")
+    try:
+        out = generate(args.gateway, args.replicas, args.algorithm, args.out, args.workers, args.tuning)
+    except UnsupportedStack as exc:
+        print(f"[INFO] {exc}, skipping", file=sys.stderr)
+        sys.exit(2)
+    print(out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,452 @@
+"""
+Experiment orchestrator for all three scenarios (Python replacement of the run_experiment.sh loops).
+
+Gateway stacks of scenarios 1 and 2 are independent of each other and run
+concurrently: every stack gets its own compose project, its own host port and
+a disjoint set of CPUs (containers via `docker update --cpuset-cpus`, the
+client via its CPU affinity), so parallel stacks do not compete for cores.
+Scenario 3 measures throughput and always runs one gateway at a time.
+
+Instead of fixed sleeps the orchestrator waits until the gateway actually
+answers through to the echo service. Every finished client step is recorded
+in a state file, so an interrupted run can be continued with --resume <run id>.
+
+Usage:
+    python3 -m common.orchestrator --scenarios 1 2 --iterations 100
+    python3 -m common.orchestrator --resume 20251201_101500
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+STATE_DIR = REPO_ROOT / "results" / "orchestrator"
+BASE_PORT = 18080  # host port of the first parallel slot
+UPSTREAM_URL = "http://localhost:5001/"  # echo service of the scenario 3 stacks
+READY_TIMEOUT = 120  # seconds until a stack that does not become ready is given up
+
+SCENARIO_DIRS = {
+    "1": "1-restart-after-shutdown",
+    "2": "2-dynamic-reconfiguration",
+    "3": "3-load-test",
+}
+# absolute, the scenario 3 stacks live at different depths (<gateway>, <gateway>/grpc, generated stacks)
+LOAD_CLIENT = str(REPO_ROOT / SCENARIO_DIRS["3"] / "base" / "load_client.py")
+GATEWAYS = {
+    "1": ["caddy", "haproxy", "nginx", "traefik", "tyk"],
+    "2": ["haproxy", "nginx", "traefik", "tyk"],
+    "3": ["haproxy", "nginx", "traefik", "tyk"],
+}
+PARALLEL = {"1": True, "2": True, "3": False}
+
+# load test steps as in 3-load-test/run_experiment.sh: (name, results subdir, load client arguments)
+LOAD_STEPS = [
+    *[(f"fixed_{n}_{c}", "fixed", ["-t", "0", "-n", str(n), "-c", str(c)])
+      for n, c in [(5000, 1), (5000, 10), (20000, 10), (20000, 50), (50000, 50), (100000, 50)]],
+    *[(f"10s_{c}", "10-seconds", ["-c", str(c), "-z", "10s"])
+      for c in [1, 2, 4, 8, 16, 32, 64]],
+    *[(f"rate_{r}_64", "fixed-rate", ["--rate", str(r), "-c", "64", "-z", "10s"])
+      for r in [500, 1000, 2000]],
+]
+LB_CONCURRENCY = [16, 64]  # concurrency steps of the load-balancing runs
+
+print_lock = threading.Lock()
+
+
+def log(message):
+    with print_lock:
+        print(f"[{time.strftime('%H:%M:%S')}] {message}", flush=True)
+
+
+class Step:
+    """One client invocation; `key` identifies it in the resume state."""
+
+    def __init__(self, key, command, stdout=None):
+        self.key = key
+        self.command = command
+        self.stdout = stdout
+
+
+class Phase:
+    """A gateway stack brought up with a given environment and the client steps run against it."""
+
+    def __init__(self, scenario, gateway, mode, steps, env=None, subdir=None):
+        self.scenario = scenario
+        self.gateway = gateway
+        self.mode = mode
+        self.steps = steps
+        self.env = env or {}
+        self.subdir = subdir  # compose stack below the gateway directory (e.g. grpc)
+
+    @property
+    def directory(self):
+        directory = REPO_ROOT / SCENARIO_DIRS[self.scenario] / self.gateway
+        return directory / self.subdir if self.subdir else directory
+
+
+def stack_subdir(gw, mode, tuning):
+    """Scenario 3 stack below the gateway directory: hand-written, or rendered with a tuning profile."""
+    if tuning:
+        from common.gateway_config import SCENARIO_DIR, generate
+
+        return generate(gw, tuning, mode).relative_to(SCENARIO_DIR / gw)
+    return "grpc" if mode == "grpc" else None
+
+
+def resource_args(args, path):
+    """Client arguments that sample the containers' resource use into path (common/resource_sampler.py)."""
+    return ["--resources", str(path)] if args.resources else []
+
+
+def metrics_args(args, gw, path):
+    """Client arguments that scrape the gateway's metrics endpoint into path (common/gateway_metrics.py)."""
+    return ["--metrics", str(path), "--gateway", gw] if args.metrics else []
+
+
+def lb_phases(gw, args, run_id, results_dir, store):
+    """Scenario 3 load-balancing phases: one generated stack per replica count and algorithm."""
+    from common.lb_stack import ALGORITHMS, REPLICAS, SUPPORTED, generate
+    from common.gateway_config import SCENARIO_DIR
+
+    (results_dir / "load-balancing").mkdir(parents=True, exist_ok=True)
+    phases = []
+    for algorithm in ALGORITHMS:
+        if algorithm not in SUPPORTED[gw]:
+            continue
+        for replicas in REPLICAS:
+            stack = generate(gw, replicas, algorithm, tuning=args.tuning or "default")
+            steps = []
+            for c in LB_CONCURRENCY:
+                out = results_dir / "load-balancing" / f"{gw}_{algorithm}_{replicas}_{c}"
+                steps.append(Step(
+                    f"3/{gw}/lb_{algorithm}_{replicas}_{c}",
+                    [sys.executable, LOAD_CLIENT, "-c", str(c), "-z", "10s",
+                     "-o", "csv", "--backends", f"{out}_backends.csv",
+                     *resource_args(args, results_dir / "resources" / "load-balancing" / out.with_suffix(".csv").name),
+                     *metrics_args(args, gw, results_dir / "metrics" / "load-balancing" / out.with_suffix(".csv").name),
+                     *(["--store", store[1], "--run", run_id, "--gateway", gw,
+                        "--profile", "load-balancing", "--algorithm", algorithm,
+                        "--replicas", str(replicas)] if store else []), "{url}"],
+                    stdout=out.with_suffix(".csv")))
+            phases.append(Phase("3", gw, "http", steps, subdir=stack.relative_to(SCENARIO_DIR / gw)))
+    return phases
+
+
+def publishes_upstream(phase):
+    """Whether the compose stack of the phase publishes its echo service on the port of UPSTREAM_URL."""
+    compose_file = phase.directory / "docker-compose.yaml"
+    if not compose_file.exists():
+        return False
+    port = urllib.parse.urlsplit(UPSTREAM_URL).port
+    lines = (line.split("#", 1)[0] for line in compose_file.read_text().splitlines())
+    return any(f'"{port}:{port}"' in line for line in lines)
+
+
+def build_jobs(scenario, args, run_id):
+    """Return one list of phases per gateway (phases of a gateway run sequentially)."""
+    store = ["--store", str(Path(args.store).resolve()), "--run", run_id] if args.store else []
+    jobs = []
+    for gw in args.gateways or GATEWAYS[scenario]:
+        if scenario == "1":
+            steps = [Step(f"1/{gw}", [sys.executable, "../base/client.py", "--gateway", gw,
+                                      "--iterations", str(args.iterations), *store,
+                                      *resource_args(args, f"../results/resources_{gw}.csv")])]
+            if args.under_load:
+                steps.append(Step(f"1/{gw}/under-load",
+                                  [sys.executable, "../base/client_under_load.py", "--gateway", gw,
+                                   "--iterations", str(args.under_load), *store]))
+            jobs.append([Phase(scenario, gw, "http", steps)])
+        elif scenario == "2":
+            jobs.append([
+                Phase(scenario, gw, mode, [Step(
+                    f"2/{gw}/{mode}",
+                    [sys.executable, f"../base/client_{mode}.py", "--gateway", gw,
+                     "--iterations", str(args.iterations), *store,
+                     *resource_args(args, f"../results/resources_{mode}_{gw}.csv"),
+                     *metrics_args(args, gw, f"../results/metrics_{mode}_{gw}.csv")]),
+                    Step(f"2/{gw}/{mode}/switchover",
+                         [sys.executable, "../base/client_switchover.py", "--gateway", gw,
+                          "--protocol", mode, "--iterations", str(args.iterations), *store]),
+                    Step(f"2/{gw}/{mode}/reload-storm",
+                         [sys.executable, "../base/client_reload_load.py", "--gateway", gw,
+                          "--protocol", mode, *store]),
+                    Step(f"2/{gw}/{mode}/hot-swap",
+                         [sys.executable, "../base/client_switchover.py", "--gateway", gw,
+                          "--protocol", mode, "--method", "hot-swap",
+                          "--iterations", str(args.iterations), *store])],
+                    env={"MODE": mode})
+                for mode in ("http", "grpc")])
+        else:
+            results_dir = REPO_ROOT / SCENARIO_DIRS["3"] / "results" / run_id
+            steps = []
+            for name, subdir, load_args in LOAD_STEPS:
+                (results_dir / subdir).mkdir(parents=True, exist_ok=True)
+                out = results_dir / subdir / f"{gw}_http_{name.split('_', 1)[1]}.csv"
+                store3 = ["--store", store[1], "--run", run_id, "--gateway", gw,
+                          "--profile", subdir] if store else []
+                steps.append(Step(
+                    f"3/{gw}/{name}",
+                    [sys.executable, LOAD_CLIENT, *load_args, "-o", "csv",
+                     *store3, *resource_args(args, results_dir / "resources" / subdir / out.name),
+                     *metrics_args(args, gw, results_dir / "metrics" / subdir / out.name), "{url}"],
+                    stdout=out))
+            phases = [Phase(scenario, gw, "http", steps, subdir=stack_subdir(gw, "http", args.tuning))]
+            if args.grpc:
+                phases.append(Phase(scenario, gw, "grpc", [Step(
+                    f"3/{gw}/{protocol}_10s_{c}",
+                    [sys.executable, LOAD_CLIENT, "--protocol", protocol,
+                     "-c", str(c), "-z", "10s", "-o", "csv",
+                     *(["--store", store[1], "--run", run_id, "--gateway", gw,
+                        "--profile", "10-seconds"] if store else []),
+                     *resource_args(args, results_dir / "resources" / "10-seconds" / f"{gw}_{protocol}_10s_{c}.csv"),
+                     *metrics_args(args, gw, results_dir / "metrics" / "10-seconds" / f"{gw}_{protocol}_10s_{c}.csv"),
+                     "{url}"],
+                    stdout=results_dir / "10-seconds" / f"{gw}_{protocol}_10s_{c}.csv")
+                    for protocol in ("grpc", "grpc-stream") for c in [1, 2, 4, 8, 16, 32, 64]],
+                    subdir=stack_subdir(gw, "grpc", args.tuning)))
+            if args.lb:
+                phases += lb_phases(gw, args, run_id, results_dir, store)
+            jobs.append(phases)
+    if scenario == "3":
+        # upstream baseline: the echo service without gateway, on the first stack that publishes it
+        host = next((phases[0] for phases in jobs if publishes_upstream(phases[0])), None)
+        if host is None:
+            log(f"[WARN] None of the stacks publishes the echo service on {UPSTREAM_URL}, "
+                "skipping the upstream baseline")
+        else:
+            results_dir = REPO_ROOT / SCENARIO_DIRS["3"] / "results" / run_id
+            host.steps[:0] = [Step(
+                f"3/upstream/10s_{c}",
+                [sys.executable, LOAD_CLIENT, "-c", str(c), "-z", "10s", "-o", "csv",
+                 *resource_args(args, results_dir / "resources" / "10-seconds" / f"upstream_http_10s_{c}.csv"),
+                 UPSTREAM_URL],
+                stdout=results_dir / "10-seconds" / f"upstream_http_10s_{c}.csv")
+                for c in [1, 2, 4, 8, 16, 32, 64]]
+    return jobs
+
+
+class State:
+    """Completed steps of a run, persisted after every step."""
+
+    def __init__(self, run_id):
+        self.path = STATE_DIR / run_id / "state.json"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.data = json.loads(self.path.read_text()) if self.path.exists() else {"done": {}}
+
+    def is_done(self, key):
+        return key in self.data["done"]
+
+    def mark_done(self, key):
+        with self._lock:
+            self.data["done"][key] = time.time()
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(self.data, indent=2))
+            tmp.replace(self.path)
+
+
+def compose(phase, env, *args):
+    result = subprocess.run(["docker", "compose", *args], cwd=phase.directory, env=env,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        log(f"[WARN] docker compose {' '.join(args)} failed for {phase.gateway}: {result.stderr.strip()}")
+    return result
+
+
+def pin_containers(phase, env, cpus):
+    """Restrict all containers of the phase's compose project to the given CPUs, False if that failed."""
+    if not cpus:
+        return True
+    ids = compose(phase, env, "ps", "-q").stdout.split()
+    if not ids:
+        log(f"[WARN] No containers of {phase.gateway}/{phase.mode} to pin")
+        return False
+    cpuset = ",".join(str(c) for c in sorted(cpus))
+    result = subprocess.run(["docker", "update", f"--cpuset-cpus={cpuset}", *ids],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        log(f"[WARN] docker update --cpuset-cpus failed for {phase.gateway}: {result.stderr.strip()}")
+        return False
+    return True
+
+
+def probe_http(port):
+    try:
+        with urllib.request.urlopen(f"http://localhost:{port}/", timeout=1) as resp:
+            return resp.status == 200
+    except Exception:
+        return False
+
+
+def probe_grpc(port):
+    # the generated stubs live next to the scenario 2 clients
+    sys.path.insert(0, str(REPO_ROOT / SCENARIO_DIRS["2"] / "base"))
+    import grpc
+    import proto.echo_pb2 as echo_pb2
+    import proto.echo_pb2_grpc as echo_pb2_grpc
+
+    try:
+        with grpc.insecure_channel(f"localhost:{port}") as channel:
+            echo_pb2_grpc.EchoStub(channel).Ping(echo_pb2.EchoRequest(message="ready"), timeout=1)
+        return True
+    except grpc.RpcError:
+        return False
+
+
+def wait_until_ready(phase, port):
+    """Wait until the gateway answers successfully through to the echo service."""
+    probe = probe_grpc if phase.mode == "grpc" else probe_http
+    deadline = time.monotonic() + READY_TIMEOUT
+    while time.monotonic() < deadline:
+        if probe(port):
+            return True
+        time.sleep(0.2)
+    return False
+
+
+def run_phase(phase, slot, cpus, state, run_id, log_dir):
+    pending = [step for step in phase.steps if not state.is_done(step.key)]
+    if not pending:
+        log(f"Skipping {phase.gateway}/{phase.mode} (already done)")
+        return True
+
+    port = BASE_PORT + slot
+    env = {
+        **os.environ,
+        **phase.env,
+        "GATEWAY_PORT": str(port),
+        # admin API of the gateway (scenario 2 adapters), next to the gateway port range
+        "ADMIN_PORT": str(port + 1000),
+        # stats / metrics endpoint of the gateway (common/gateway_metrics.py)
+        "METRICS_PORT": str(port + 2000),
+        "COMPOSE_PROJECT_NAME": f"s{phase.scenario}-{phase.gateway}",
+    }
+    log(f"Starting {phase.gateway}/{phase.mode} on port {port} (CPUs {sorted(cpus) or 'all'})")
+    compose(phase, env, "down", "-v")
+    ok = True
+    try:
+        if compose(phase, env, "up", "--build", "-d").returncode != 0:
+            log(f"[ERROR] {phase.gateway}/{phase.mode} could not be started, skipping")
+            return False
+        # unpinned stacks would compete with the parallel ones and distort the results
+        if not pin_containers(phase, env, cpus):
+            log(f"[ERROR] {phase.gateway}/{phase.mode} could not be pinned to CPUs {sorted(cpus)}, skipping")
+            return False
+        for step in pending:
+            if not wait_until_ready(phase, port):
+                log(f"[ERROR] {phase.gateway}/{phase.mode} did not become ready")
+                return False
+            command = [part.replace("{url}", f"http://localhost:{port}/") for part in step.command]
+            log_file = log_dir / (step.key.replace("/", "_") + ".log")
+            with open(log_file, "w") as err, \
+                    open(step.stdout or log_file, "w" if step.stdout else "a") as out:
+                # pinned after the start, preexec_fn is not safe in the worker threads of the pool
+                proc = subprocess.Popen(command, cwd=phase.directory, env=env, stdout=out, stderr=err)
+                if cpus:
+                    try:
+                        os.sched_setaffinity(proc.pid, cpus)
+                    except ProcessLookupError:
+                        pass  # already exited, its return code tells
+                returncode = proc.wait()
+            if returncode != 0:
+                log(f"[ERROR] {step.key} failed, see {log_file}")
+                ok = False
+                break
+            state.mark_done(step.key)
+            log(f"[OK] {step.key}")
+    finally:
+        compose(phase, env, "down", "-v")
+    return ok
+
+
+def cpu_slots(parallel, pin):
+    """Split the available CPUs into `parallel` disjoint sets (empty sets disable pinning)."""
+    cpus = sorted(os.sched_getaffinity(0))
+    size = len(cpus) // parallel
+    if not pin or size < 2:
+        if pin:
+            log(f"[WARN] {len(cpus)} CPUs are too few to pin {parallel} parallel stacks")
+        return [set() for _ in range(parallel)]
+    return [set(cpus[i * size:(i + 1) * size]) for i in range(parallel)]
+
+
+def run_scenario(scenario, args, run_id, state):
+    jobs = build_jobs(scenario, args, run_id)
+    parallel = min(len(jobs), args.parallel or len(jobs)) if PARALLEL[scenario] else 1
+    slots = cpu_slots(parallel, not args.no_pin)
+    log_dir = STATE_DIR / run_id / "logs"
+    log_dir.mkdir(parents=True, exist_ok=True)
+    free_slots = list(range(parallel))
+    slot_lock = threading.Lock()
+
+    def run_job(phases):
+        with slot_lock:
+            slot = free_slots.pop()
+        try:
+            return all([run_phase(phase, slot, slots[slot], state, run_id, log_dir)
+                        for phase in phases])
+        finally:
+            with slot_lock:
+                free_slots.append(slot)
+
+    log(f"==== Scenario {SCENARIO_DIRS[scenario]}: {len(jobs)} gateways, {parallel} in parallel ====")
+    with ThreadPoolExecutor(max_workers=parallel) as pool:
+        return all(pool.map(run_job, jobs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the gateway experiments of all scenarios")
+    parser.add_argument("--scenarios", nargs="+", default=["1", "2", "3"], choices=list(SCENARIO_DIRS))
+    parser.add_argument("--gateways", nargs="+", default=None,
+                        help="Only run these gateways (default: all gateways of the scenario)")
+    parser.add_argument("--iterations", type=int, default=100,
+                        help="Iterations per signal/protocol in scenarios 1 and 2")
+    parser.add_argument("--under-load", type=int, default=0, metavar="ITERATIONS",
+                        help="Also restart/reload the scenario 1 gateways under background load")
+    parser.add_argument("--no-grpc", dest="grpc", action="store_false",
+                        help="Skip the gRPC load runs of scenario 3")
+    parser.add_argument("--no-lb", dest="lb", action="store_false",
+                        help="Skip the load-balancing runs over several echo replicas in scenario 3")
+    parser.add_argument("--no-resources", dest="resources", action="store_false",
+                        help="Do not sample the cgroup v2 resource use of the containers during the clients")
+    parser.add_argument("--no-metrics", dest="metrics", action="store_false",
+                        help="Do not scrape the gateways' own metrics endpoints during the clients")
+    parser.add_argument("--tuning", default=None, metavar="PROFILE",
+                        help="Run scenario 3 on stacks rendered from 3-load-test/topology.yaml "
+                             "with this tuning profile (e.g. default, tuned)")
+    parser.add_argument("--parallel", type=int, default=None,
+                        help="Maximum number of stacks running at the same time (scenarios 1 and 2)")
+    parser.add_argument("--no-pin", action="store_true", help="Do not pin stacks to CPUs")
+    parser.add_argument("--store", default=None, help="Also append results to this result store")
+    parser.add_argument("--resume", default=None, metavar="RUN_ID",
+                        help="Continue an interrupted run, skipping all completed steps")
+    args = parser.parse_args()
+
+    run_id = args.resume or time.strftime("%Y%m%d_%H%M%S")
+    state = State(run_id)
+    if args.resume:
+        # continue with the parameters of the interrupted run
+        for key, value in state.data.get("args", {}).items():
+            if key not in ("resume",):
+                setattr(args, key, value)
+    else:
+        state.data["args"] = vars(args)
+    log(f"Run {run_id} (state: {state.path})")
+
+    ok = True
+    for scenario in args.scenarios:
+        ok = run_scenario(scenario, args, run_id, state) and ok
+    log("✅ All experiments complete." if ok else "❌ Some experiments failed, rerun with --resume " + run_id)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
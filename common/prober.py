@@ -0,0 +1,220 @@
+"""
+High-resolution availability prober for downtime measurements.
+
+Several probes send requests concurrently, each on its own keep-alive
+connection, with their send times staggered so that together they sample the
+gateway every `interval / probes` seconds (1 ms with the defaults). Every
+sample keeps its send and completion time (time.monotonic_ns) and the class of
+error it failed with, and the down and up edges are derived from the samples
+afterwards, so the result does not depend on the order in which concurrent
+requests complete.
+
+The prober runs its event loop in a background thread, so it can be used
+from the synchronous experiment clients:
+
+    with EdgeProber("http://localhost:8080/") as prober:
+        docker kill ...
+        prober.wait_down()
+        docker start ...
+        prober.wait_up()
+    edges = prober.edges()
+"""
+import asyncio
+import threading
+import time
+
+from common.async_http import HttpConnection, Target
+
+
+def error_class(exc):
+    """Short name for the way a probe failed (refused, reset, timeout, ...)."""
+    if isinstance(exc, asyncio.TimeoutError):
+        return "timeout"
+    if isinstance(exc, ConnectionRefusedError):
+        return "refused"
+    if isinstance(exc, (ConnectionResetError, BrokenPipeError, asyncio.IncompleteReadError)):
+        return "reset"
+    return type(exc).__name__
+
+
+class Sample:
+    __slots__ = ("sent_ns", "done_ns", "ok", "error")
+
+    def __init__(self, sent_ns, done_ns, ok, error):
+        self.sent_ns = sent_ns
+        self.done_ns = done_ns
+        self.ok = ok
+        self.error = error
+
+
+class Edges:
+    """
+    Down and up edge of one outage (times in ns of time.monotonic_ns, None if not observed).
+
+    first_response is the first probe after the outage that received any HTTP
+    response (e.g. a 502 while the upstream is not reachable yet), first_ok the
+    first one that received a 200.
+    """
+
+    def __init__(self, samples, clock_offset_ns, port_open_ns=None):
+        self.clock_offset_ns = clock_offset_ns
+        self.last_ok = self.first_fail = self.last_fail = self.first_ok = None
+        self.first_response = None
+        ordered = sorted(samples, key=lambda s: s.sent_ns)
+        failed = [i for i, sample in enumerate(ordered) if not sample.ok]
+        if failed:
+            self.first_fail = ordered[failed[0]]
+            self.last_ok = next((s for s in reversed(ordered[:failed[0]])), None)
+            # requests sent shortly before the shutdown can still succeed after the
+            # first failure, so the outage only ends after the last failed probe
+            self.last_fail = ordered[failed[-1]]
+            self.first_ok = next((s for s in ordered[failed[-1]:] if s.ok), None)
+            no_connection = [i for i in failed if not ordered[i].error.startswith("http_")]
+            self.first_response = next(
+                (s for s in ordered[no_connection[-1] if no_connection else failed[0]:]
+                 if s.ok or s.error.startswith("http_")), None)
+        # a response implies an accepted connection, even if the port probe saw it later
+        if port_open_ns and self.first_response:
+            port_open_ns = min(port_open_ns, self.first_response.sent_ns)
+        self.port_open_ns = port_open_ns
+
+    @property
+    def complete(self):
+        return self.first_fail is not None and self.first_ok is not None
+
+    def wall_ms(self, ns):
+        """Convert a monotonic timestamp to milliseconds since the epoch."""
+        return (ns + self.clock_offset_ns) / 1e6
+
+    @property
+    def down_ns(self):
+        return self.first_fail.sent_ns
+
+    @property
+    def up_ns(self):
+        return self.first_ok.sent_ns
+
+    @property
+    def downtime_ms(self):
+        return (self.up_ns - self.down_ns) / 1e6
+
+    @property
+    def down_uncertainty_ms(self):
+        """Gap between the last successful and the first failed probe before the outage."""
+        return (self.down_ns - self.last_ok.sent_ns) / 1e6 if self.last_ok else None
+
+    @property
+    def up_uncertainty_ms(self):
+        """Gap between the last failed and the first successful probe after the outage."""
+        return (self.up_ns - self.last_fail.sent_ns) / 1e6
+
+
+class EdgeProber:
+    """Samples a URL with staggered concurrent probes until stopped."""
+
+    def __init__(self, url, probes=8, interval=0.008, timeout=0.25):
+        self.target = Target(url)
+        self.probes = probes
+        self.interval = interval
+        self.timeout = timeout
+        self.samples = []
+        self._down = threading.Event()
+        self._up = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._last_fail_ns = None
+        self._loop = None
+        self._port_open = threading.Event()
+        self.port_open_ns = None
+        self.clock_offset_ns = time.time_ns() - time.monotonic_ns()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        self._thread = threading.Thread(target=asyncio.run, args=(self._run(),), daemon=True)
+        self._thread.start()
+        while self._loop is None:
+            time.sleep(0.001)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def wait_down(self, timeout=None):
+        """Block until a probe failed. Returns False on timeout."""
+        return self._down.wait(timeout)
+
+    def wait_up(self, timeout=None):
+        """Block until a probe sent after the last failure succeeded. Returns False on timeout."""
+        return self._up.wait(timeout)
+
+    def watch_port(self, host, port):
+        """
+        Start probing TCP connects to host:port until one is accepted, e.g. the
+        container address of a restarted gateway, which (unlike the published
+        port) refuses connections until the gateway listens.
+        """
+        self._port_open.clear()
+        self.port_open_ns = None
+        asyncio.run_coroutine_threadsafe(self._watch_port(host, port), self._loop)
+
+    def wait_port(self, timeout=None):
+        """Block until a connection to the watched port was accepted. Returns False on timeout."""
+        return self._port_open.wait(timeout)
+
+    def edges(self):
+        return Edges(self.samples, self.clock_offset_ns, self.port_open_ns)
+
+    async def _watch_port(self, host, port):
+        step = int(self.interval * 1e9) // self.probes
+        while not self._stop.is_set():
+            sent = time.monotonic_ns()
+            try:
+                _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), self.timeout)
+                writer.close()
+                self.port_open_ns = sent
+                self._port_open.set()
+                return
+            except (OSError, asyncio.TimeoutError):
+                await asyncio.sleep(max(0, sent + step - time.monotonic_ns()) / 1e9)
+
+    async def _run(self):
+        self._loop = asyncio.get_running_loop()
+        start = time.monotonic_ns()
+        step = int(self.interval * 1e9)
+        await asyncio.gather(*(self._probe(start + step * k // self.probes, step)
+                               for k in range(self.probes)))
+
+    async def _probe(self, first_ns, step):
+        conn = HttpConnection(self.target, timeout=self.timeout)
+        next_ns = first_ns
+        while not self._stop.is_set():
+            now = time.monotonic_ns()
+            if now < next_ns:
+                await asyncio.sleep((next_ns - now) / 1e9)
+            elif now - next_ns > step:
+                # a slow request overran its slots, continue with the next slot in the grid
+                next_ns += (now - next_ns) // step * step
+            sent = time.monotonic_ns()
+            try:
+                resp = await conn.request()
+                ok, error = resp.status == 200, None if resp.status == 200 else f"http_{resp.status}"
+            except Exception as exc:
+                ok, error = False, error_class(exc)
+            self.samples.append(Sample(sent, time.monotonic_ns(), ok, error))
+            self._update(sent, ok)
+            next_ns += step
+        conn.close()
+
+    def _update(self, sent, ok):
+        if not ok:
+            self._last_fail_ns = max(sent, self._last_fail_ns or sent)
+            self._down.set()
+        elif self._down.is_set() and sent > self._last_fail_ns:
+            self._up.set()
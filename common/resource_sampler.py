@@ -0,0 +1,261 @@
+"""
+Per-container resource sampling from cgroup v2 during the experiments.
+
+A background thread reads the cgroup v2 files of every container of the
+compose project (cpu.stat, memory.current, io.stat, pids.current) every 100 ms,
+together with the context switches of the container's threads and the TCP
+sockets in use in its network namespace (from /proc). The cgroup of a
+container is found through /proc/<pid>/cgroup of its main process, which works
+with both the systemd and the cgroupfs driver; the sampler has to run on the
+Docker host (not in Docker Desktop's VM). Containers that are not running at
+a sample time (restarts in scenario 1) are skipped until they are back.
+
+Every sample carries the wall-clock time in ms (like the timestamps of the
+scenario 1 and 2 results), the offset in seconds from an origin on the
+monotonic clock (the load client passes its own start, so the offsets match
+its `offset` column) and the label of the current iteration (mark()).
+
+    with ResourceSampler() as sampler:
+        for i in range(iterations):
+            sampler.mark(i)
+            ...
+    sampler.write_csv("resources.csv")
+"""
+import csv
+import os
+import subprocess
+import threading
+import time
+from pathlib import Path
+
+from common.docker_engine import DockerEngine, DockerError
+
+CGROUP_ROOT = Path(os.getenv("CGROUP_ROOT", "/sys/fs/cgroup"))
+INTERVAL = 0.1  # seconds between two samples
+
+HEADER = [
+    "timestamp_ms",
+    "offset_s",
+    "iteration",
+    "container",
+    "cpu_usage_usec",
+    "cpu_user_usec",
+    "cpu_system_usec",
+    "cpu_throttled_usec",
+    "cpu_cores",
+    "memory_bytes",
+    "io_read_bytes",
+    "io_write_bytes",
+    "pids",
+    "context_switches",
+    "tcp_sockets",
+]
+
+
+def compose_containers(cwd=None):
+    """Ids of the running containers of the compose project in cwd (honours COMPOSE_PROJECT_NAME)."""
+    result = subprocess.run(["docker", "compose", "ps", "-q"], cwd=cwd, capture_output=True, text=True)
+    return result.stdout.split()
+
+
+def read_keyed(path):
+    """`key value` lines of a cgroup file (cpu.stat) as a dict of ints."""
+    values = {}
+    for line in path.read_text().splitlines():
+        key, _, value = line.partition(" ")
+        values[key] = int(value)
+    return values
+
+
+def read_io(path):
+    """Bytes read and written over all devices of io.stat."""
+    read = written = 0
+    for line in path.read_text().splitlines():
+        for field in line.split()[1:]:
+            key, _, value = field.partition("=")
+            if key == "rbytes":
+                read += int(value)
+            elif key == "wbytes":
+                written += int(value)
+    return read, written
+
+
+def context_switches(cgroup):
+    """Voluntary and involuntary context switches of all threads in the cgroup (None if unreadable)."""
+    total = 0
+    try:
+        tids = (cgroup / "cgroup.threads").read_text().split()
+    except OSError:
+        return None
+    for tid in tids:
+        try:
+            for line in Path(f"/proc/{tid}/status").read_text().splitlines():
+                if "ctxt_switches:" in line:
+                    total += int(line.split()[1])
+        except OSError:
+            # thread exited between listing and reading
+            continue
+    return total
+
+
+def open_files(cgroup):
+    """File descriptors open in all processes of the cgroup (None if unreadable, /proc/<pid>/fd needs root)."""
+    try:
+        pids = (cgroup / "cgroup.procs").read_text().split()
+    except OSError:
+        return None
+    total = 0
+    for pid in pids:
+        try:
+            total += len(os.listdir(f"/proc/{pid}/fd"))
+        except FileNotFoundError:
+            # process exited between listing and reading
+            continue
+        except OSError:
+            return None
+    return total
+
+
+def tcp_sockets(pid):
+    """TCP sockets in use in the network namespace of a process (None if unreadable)."""
+    try:
+        for line in Path(f"/proc/{pid}/net/sockstat").read_text().splitlines():
+            if line.startswith("TCP:"):
+                fields = line.split()
+                return int(fields[fields.index("inuse") + 1])
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+class Container:
+    """A sampled container with its cgroup directory."""
+
+    def __init__(self, engine, ref):
+        self.engine = engine
+        self.ref = ref
+        self.name = ref
+        self.cgroup = None
+        self.pid = None
+        self.last = None  # (monotonic_ns, cpu usage in usec) of the previous sample
+
+    def resolve(self):
+        """Look up the main process and cgroup of the container, False if it does not run."""
+        try:
+            info = self.engine.inspect(self.ref)
+        except (DockerError, OSError):
+            return False
+        self.name = info["Name"].lstrip("/")
+        self.pid = info["State"].get("Pid") or None
+        if not self.pid:
+            return False
+        try:
+            lines = Path(f"/proc/{self.pid}/cgroup").read_text().splitlines()
+        except OSError:
+            return False
+        # cgroup v2: "0::/system.slice/docker-<id>.scope" (the root cgroup means cgroup v1 or no access)
+        path = next((line[3:] for line in lines if line.startswith("0::")), "/")
+        if path == "/":
+            return False
+        self.cgroup = CGROUP_ROOT / path.lstrip("/")
+        return True
+
+    def sample(self, now_ns):
+        """Counters of the container at now_ns, None if it is not running."""
+        if self.cgroup is None and not self.resolve():
+            return None
+        try:
+            cpu = read_keyed(self.cgroup / "cpu.stat")
+            memory = int((self.cgroup / "memory.current").read_text())
+            io_read, io_write = read_io(self.cgroup / "io.stat")
+            pids = int((self.cgroup / "pids.current").read_text())
+        except FileNotFoundError:
+            # stopped (the cgroup is removed) or restarted with a new main process
+            self.cgroup = None
+            self.last = None
+            return None
+        except (OSError, KeyError, ValueError):
+            # file read while the container was torn down
+            return None
+        cores = None
+        if self.last is not None and now_ns > self.last[0]:
+            cores = round((cpu["usage_usec"] - self.last[1]) * 1000 / (now_ns - self.last[0]), 4)
+        self.last = (now_ns, cpu["usage_usec"])
+        return [
+            cpu["usage_usec"], cpu["user_usec"], cpu["system_usec"], cpu.get("throttled_usec", 0),
+            cores, memory, io_read, io_write, pids,
+            context_switches(self.cgroup), tcp_sockets(self.pid),
+        ]
+
+
+class ResourceSampler:
+    """Samples the cgroup counters of containers on a background thread."""
+
+    def __init__(self, containers=None, interval=INTERVAL, engine=None, log=print):
+        self.engine = engine or DockerEngine()
+        self.containers = [Container(self.engine, ref) for ref in (containers or compose_containers())]
+        self.interval = interval
+        self.log = log  # the load client passes a no-op, its stdout is the results CSV
+        self.samples = []  # (wall ns, monotonic ns, iteration, container, counters)
+        self.iteration = None
+        self.origin_ns = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        if not self.containers:
+            self.log("[WARN] No containers to sample resources of")
+        self.origin_ns = time.monotonic_ns()
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def mark(self, iteration):
+        """Label the following samples with an iteration."""
+        self.iteration = iteration
+
+    def _run(self):
+        interval_ns = int(self.interval * 1e9)
+        next_ns = time.monotonic_ns()
+        unreadable = set()
+        while not self._stop.is_set():
+            now_ns = time.monotonic_ns()
+            wall_ns = time.time_ns()
+            for container in self.containers:
+                counters = container.sample(now_ns)
+                if counters is None:
+                    if container.ref not in unreadable:
+                        # reported once, scenario 1 stops the gateway in every iteration
+                        unreadable.add(container.ref)
+                        self.log(f"[WARN] No cgroup v2 stats for {container.name} (not running or not on this host)")
+                    continue
+                self.samples.append((wall_ns, now_ns, self.iteration, container.name, counters))
+            # fixed sampling grid, samples that fall behind are skipped instead of bunched up
+            next_ns += interval_ns
+            while next_ns <= time.monotonic_ns():
+                next_ns += interval_ns
+            self._stop.wait((next_ns - time.monotonic_ns()) / 1e9)
+
+    def rows(self, origin=None):
+        """Samples as CSV rows, offsets in seconds from origin (monotonic seconds, default: start)."""
+        origin_ns = int(origin * 1e9) if origin is not None else self.origin_ns
+        return [[round(wall_ns / 1e6, 3), round((mono_ns - origin_ns) / 1e9, 4), iteration, name, *counters]
+                for wall_ns, mono_ns, iteration, name, counters in self.samples]
+
+    def write_csv(self, path, origin=None):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(HEADER)
+            writer.writerows(self.rows(origin))
+        return path
@@ -0,0 +1,327 @@
+"""
+Columnar result store shared by all three scenarios.
+
+Measurements are appended as Parquet files to a hive-partitioned dataset
+
+    <root>/dataset/scenario=.../run=.../gateway=.../protocol=.../concurrency=.../part-<id>.parquet
+
+and every run gets a manifest (run parameters, host specs, gateway versions)
+under <root>/runs/<scenario>/<run>/manifest.json. A SQLite catalog
+(<root>/catalog.sqlite) indexes runs and partition files, so readers can
+select the files of a slice without listing or opening the whole dataset.
+
+Usage from the notebooks:
+
+    from common.result_store import ResultStore
+    df = ResultStore("../../results").load(scenario="3-load-test", gateway="tyk", concurrency=64)
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import sqlite3
+import subprocess
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_ROOT = REPO_ROOT / "results"
+PARTITION_KEYS = ["scenario", "run", "gateway", "protocol", "concurrency"]
+
+CATALOG_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    scenario TEXT NOT NULL,
+    run TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    parameters TEXT,
+    host TEXT,
+    gateway_versions TEXT,
+    PRIMARY KEY (scenario, run)
+);
+CREATE TABLE IF NOT EXISTS partitions (
+    path TEXT PRIMARY KEY,
+    scenario TEXT NOT NULL,
+    run TEXT NOT NULL,
+    gateway TEXT NOT NULL,
+    protocol TEXT NOT NULL,
+    concurrency INTEGER NOT NULL,
+    num_rows INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS partitions_slice
+    ON partitions (scenario, gateway, protocol, concurrency, run);
+"""
+
+
+def host_specs():
+    """Describe the machine the experiment runs on."""
+    specs = {
+        "hostname": platform.node(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+    }
+    try:
+        specs["memory_bytes"] = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (ValueError, OSError, AttributeError):
+        pass
+    try:
+        result = subprocess.run(["docker", "version", "--format", "{{.Server.Version}}"],
+                                capture_output=True, text=True, timeout=5)
+        if result.returncode == 0:
+            specs["docker"] = result.stdout.strip()
+    except (OSError, subprocess.TimeoutExpired):
+        pass
+    return specs
+
+
+def gateway_versions(scenario_dir: Path):
+    """Read the gateway image of every gateway's docker-compose.yaml in a scenario directory."""
+    versions = {}
+    for compose in sorted(Path(scenario_dir).glob("*/docker-compose.yaml")):
+        in_gateway = False
+        for line in compose.read_text().splitlines():
+            if re.match(r"^  \S", line):
+                in_gateway = line.strip() == "gateway:"
+            elif in_gateway and line.strip().startswith("image:"):
+                versions[compose.parent.name] = line.split("image:", 1)[1].strip()
+                break
+    return versions
+
+
+class ResultStore:
+    """Appends measurement tables to the partitioned dataset and maintains the catalog."""
+
+    def __init__(self, root=DEFAULT_ROOT):
+        self.root = Path(root)
+        self.dataset_dir = self.root / "dataset"
+        self.dataset_dir.mkdir(parents=True, exist_ok=True)
+        self._catalog = sqlite3.connect(self.root / "catalog.sqlite", timeout=30)
+        self._catalog.executescript(CATALOG_SCHEMA)
+
+    def close(self):
+        self._catalog.close()
+
+    def start_run(self, scenario: str, run=None, parameters=None):
+        """Register a run with its manifest and return the run id."""
+        run = run or time.strftime("%Y%m%d_%H%M%S")
+        manifest = {
+            "scenario": scenario,
+            "run": run,
+            "created_at": time.time(),
+            "parameters": parameters or {},
+            "host": host_specs(),
+            "gateway_versions": gateway_versions(REPO_ROOT / scenario),
+        }
+        run_dir = self.root / "runs" / scenario / run
+        run_dir.mkdir(parents=True, exist_ok=True)
+        manifest_path = run_dir / "manifest.json"
+        if manifest_path.exists():
+            # several clients of one run register the same run, keep all parameters
+            previous = json.loads(manifest_path.read_text())
+            manifest["parameters"] = {**previous["parameters"], **manifest["parameters"]}
+            manifest["created_at"] = previous["created_at"]
+        manifest_path.write_text(json.dumps(manifest, indent=2))
+        with self._catalog:
+            self._catalog.execute(
+                "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?)",
+                (scenario, run, manifest["created_at"], json.dumps(manifest["parameters"]),
+                 json.dumps(manifest["host"]), json.dumps(manifest["gateway_versions"])))
+        return run
+
+    def append(self, table, scenario: str, run: str, gateway: str,
+               protocol="http", concurrency=1):
+        """
+        Append a table (pyarrow.Table, pandas DataFrame or dict of columns) to
+        the partition of the given scenario/run/gateway/protocol/concurrency.
+        """
+        if isinstance(table, dict):
+            table = pa.table(table)
+        elif not isinstance(table, pa.Table):
+            table = pa.Table.from_pandas(table, preserve_index=False)
+        partition = self.dataset_dir.joinpath(
+            f"scenario={scenario}", f"run={run}", f"gateway={gateway}",
+            f"protocol={protocol}", f"concurrency={int(concurrency)}")
+        partition.mkdir(parents=True, exist_ok=True)
+        path = partition / f"part-{uuid.uuid4().hex}.parquet"
+        pq.write_table(table, path, compression="zstd")
+        with self._catalog:
+            self._catalog.execute(
+                "INSERT INTO partitions VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (str(path.relative_to(self.root)), scenario, run, gateway, protocol,
+                 int(concurrency), table.num_rows, time.time()))
+        return path
+
+    def has_partitions(self, scenario: str, run: str):
+        """Whether the catalog already holds data of the run."""
+        return self._catalog.execute(
+            "SELECT 1 FROM partitions WHERE scenario = ? AND run = ? LIMIT 1", (scenario, run)).fetchone() is not None
+
+    def runs(self, scenario=None):
+        """Registered runs as list of dicts (parameters, host and versions decoded)."""
+        query = "SELECT scenario, run, created_at, parameters, host, gateway_versions FROM runs"
+        args = ()
+        if scenario is not None:
+            query += " WHERE scenario = ?"
+            args = (scenario,)
+        return [{
+            "scenario": row[0], "run": row[1], "created_at": row[2],
+            "parameters": json.loads(row[3]), "host": json.loads(row[4]),
+            "gateway_versions": json.loads(row[5]),
+        } for row in self._catalog.execute(query + " ORDER BY created_at", args)]
+
+    def files(self, **partition):
+        """Partition files matching the given partition key values (single value or list)."""
+        clauses = []
+        args = []
+        for key, value in partition.items():
+            if key not in PARTITION_KEYS:
+                raise ValueError(f"Unknown partition key: {key}")
+            if value is None:
+                continue
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            clauses.append(f"{key} IN ({', '.join('?' * len(values))})")
+            args.extend(values)
+        query = "SELECT path FROM partitions"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        return [str(self.root / row[0]) for row in self._catalog.execute(query, args)]
+
+    def dataset(self, **partition):
+        """pyarrow dataset over the partition files selected through the catalog."""
+        return ds.dataset(self.files(**partition), format="parquet",
+                          partitioning="hive", partition_base_dir=str(self.dataset_dir))
+
+    def load(self, columns=None, filter=None, **partition):
+        """
+        Load a slice as pandas DataFrame. Partition keys are resolved through
+        the catalog; `filter` is an optional pyarrow expression pushed down to
+        the Parquet reader, e.g. ds.field("status-code") != 200.
+        """
+        return self.dataset(**partition).to_table(columns=columns, filter=filter).to_pandas()
+
+
+def store_rows(root, scenario: str, run, gateway: str, header, rows,
+               protocol="http", concurrency=1, parameters=None, extra_columns=None):
+    """
+    Convenience for the experiment clients: register the run and append rows
+    (list of lists/tuples in the order of header) plus constant extra columns.
+    """
+    store = ResultStore(root)
+    run = store.start_run(scenario, run, parameters)
+    columns = {name: [row[i] for row in rows] for i, name in enumerate(header)}
+    for name, value in (extra_columns or {}).items():
+        columns[name] = [value] * len(rows)
+    path = store.append(columns, scenario, run, gateway, protocol, concurrency)
+    store.close()
+    return path
+
+
+def constant_columns(table, **columns):
+    """Append string columns with the same value in every row."""
+    for name, value in columns.items():
+        table = table.append_column(name, pa.array([value] * table.num_rows, pa.string()))
+    return table
+
+
+def parse_legacy_name(profile, stem):
+    """
+    Partition and extra columns of a scenario 3 results file from its profile directory and name,
+    None for files that are not per-request results (e.g. the _backends counts).
+
+        fixed, 10-seconds  gateway_protocol_numberOfRequests_concurrency
+        fixed-rate         gateway_protocol_rate_concurrency
+        load-balancing     gateway_algorithm_replicas_concurrency (http)
+    """
+    parts = stem.split("_")
+    if len(parts) != 4:
+        return None
+    if profile in ("fixed", "10-seconds"):
+        gateway, protocol, number_of_requests, concurrency = parts
+        return gateway, protocol, concurrency, {"numberOfRequests": number_of_requests, "rate": ""}
+    if profile == "fixed-rate":
+        gateway, protocol, rate, concurrency = parts
+        return gateway, protocol, concurrency, {"numberOfRequests": "", "rate": rate}
+    if profile == "load-balancing":
+        gateway, algorithm, replicas, concurrency = parts
+        return gateway, "http", concurrency, {"numberOfRequests": "10s", "rate": "",
+                                              "algorithm": algorithm, "replicas": replicas}
+    return None
+
+
+def ingest_legacy_results(store: ResultStore):
+    """
+    Import the CSV results of all three scenarios into the store. Runs that
+    already have data in the catalog (an earlier ingest, or clients that wrote
+    to the store during the run) are skipped, so ingesting again adds nothing.
+    """
+    s1 = REPO_ROOT / "1-restart-after-shutdown" / "results"
+    if store.has_partitions("1-restart-after-shutdown", "legacy"):
+        print("[INFO] Skipping 1-restart-after-shutdown/legacy (already in the store)")
+    else:
+        run = store.start_run("1-restart-after-shutdown", "legacy")
+        for path in sorted(s1.glob("measurements_*.csv")):
+            gateway = path.stem[len("measurements_"):]
+            store.append(pacsv.read_csv(path), "1-restart-after-shutdown", run, gateway)
+
+    s2 = REPO_ROOT / "2-dynamic-reconfiguration" / "results"
+    if store.has_partitions("2-dynamic-reconfiguration", "legacy"):
+        print("[INFO] Skipping 2-dynamic-reconfiguration/legacy (already in the store)")
+    else:
+        run = store.start_run("2-dynamic-reconfiguration", "legacy")
+        for path in sorted(s2.glob("*_dynamic_switch_*.csv")):
+            protocol, gateway = path.stem.split("_dynamic_switch_")
+            convert = pacsv.ConvertOptions(column_types={"response": pa.string()})
+            store.append(pacsv.read_csv(path, convert_options=convert),
+                         "2-dynamic-reconfiguration", run, gateway, protocol)
+
+    s3 = REPO_ROOT / "3-load-test" / "results"
+    for run_dir in sorted(p for p in s3.iterdir() if p.is_dir()):
+        if store.has_partitions("3-load-test", run_dir.name):
+            print(f"[INFO] Skipping 3-load-test/{run_dir.name} (already in the store)")
+            continue
+        files = []
+        for path in sorted(run_dir.glob("*/*.csv")):
+            parsed = parse_legacy_name(path.parent.name, path.stem)
+            if parsed is None:
+                # resource samples, metrics, backend counts, sweep and saturation results
+                continue
+            files.append((path, parsed))
+        if not files:
+            continue
+        run = store.start_run("3-load-test", run_dir.name)
+        for path, (gateway, protocol, concurrency, columns) in files:
+            table = constant_columns(pacsv.read_csv(path), profile=path.parent.name, **columns)
+            store.append(table, "3-load-test", run, gateway, protocol, concurrency)
+            print(f"[INFO] Imported {path.relative_to(REPO_ROOT)} ({table.num_rows} rows)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Result store for all three scenarios")
+    parser.add_argument("--root", default=str(DEFAULT_ROOT), help="Root directory of the store")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("ingest", help="Import the existing CSV results of all scenarios")
+    sub.add_parser("runs", help="List the runs in the catalog")
+    args = parser.parse_args()
+
+    store = ResultStore(args.root)
+    if args.command == "ingest":
+        ingest_legacy_results(store)
+    elif args.command == "runs":
+        for run in store.runs():
+            json.dump(run, sys.stdout)
+            sys.stdout.write("\n")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
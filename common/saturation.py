@@ -0,0 +1,219 @@
+"""
+Saturation point / maximum sustainable throughput per gateway (scenario 3).
+
+Instead of fixed load steps, the offered load is increased until the gateway
+breaks a service level objective: the p99 latency exceeds the SLO (default
+10 ms), more than the allowed share of requests fail, or (open-loop) the
+gateway no longer keeps up with the offered rate. The load is doubled until the
+first breach and the interval between the last passing and the first breaching
+load is then bisected down to the requested precision.
+
+Two search modes:
+
+    rate         open-loop load at a constant rate (requests/sec), latencies
+                 measured from the intended start of every request, so queueing
+                 in front of a saturated gateway counts (--concurrency limits the
+                 requests in flight)
+    concurrency  closed-loop load with an increasing number of connections
+
+    python3 -m common.saturation --gateways nginx haproxy --search rate --slo-p99 10
+    python3 -m common.saturation --search concurrency --tuning tuned
+
+The gateways run on the same stacks as the load test (hand-written, or rendered
+with a tuning profile). Per gateway every measured load is written to
+3-load-test/results/<run>_saturation/saturation/<gateway>_<search>_curve.csv,
+the latency curve up to the knee, and the result to <gateway>_<search>.json; the
+maximum sustainable throughput of all gateways is summarized in saturation.csv.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+from common.gateway_config import SCENARIO_DIR
+from common.orchestrator import Phase, compose, log, stack_subdir, wait_until_ready
+from common.tuning_sweep import WARMUP, run_stats
+
+sys.path.insert(0, str(SCENARIO_DIR / "base"))
+from load_client import RateSchedule, run_load  # noqa: E402
+
+SEARCHES = ["rate", "concurrency"]
+MIN_ACHIEVED = 0.95  # share of the offered rate that has to be served (rate search)
+CURVE_HEADER = ["step", "stage", "load", "requests_per_s", "p50_ms", "p90_ms", "p99_ms", "p99.9_ms",
+                "error_rate", "passed", "breach"]
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+def breach(stats, load, search, slo_p99, max_error_rate):
+    """Reason why a measured load violates the objective, None if it passes."""
+    if stats is None:
+        return "not measured"
+    if stats["error_rate"] > max_error_rate:
+        return f"error rate {stats['error_rate']:.2%} > {max_error_rate:.2%}"
+    if stats["p99_ms"] is None or stats["p99_ms"] > slo_p99:
+        return f"p99 {stats['p99_ms']} ms > {slo_p99:g} ms"
+    if search == "rate" and stats["requests_per_s"] < MIN_ACHIEVED * load:
+        return f"served {stats['requests_per_s']:g} of {load:g} requests/s"
+    return None
+
+
+def find_saturation(measure, start, limit, precision, integer=False):
+    """
+    Double the load from start until measure(load) returns a breach (or limit is
+    reached), then bisect between the last passing and the first breaching load
+    until they are less than precision (relative) apart.
+
+    measure(load) returns (stats, breach reason or None). Returns (highest
+    passing load or None, its stats, first breaching load or None, its reason,
+    curve rows of all measured loads in measurement order).
+    """
+    curve = []
+
+    def probe(load, stage):
+        stats, reason = measure(load)
+        curve.append({"step": len(curve) + 1, "stage": stage, "load": load, **(stats or {}),
+                      "passed": reason is None, "breach": reason or ""})
+        log(f"{stage} {load:g}: {stats} -> {reason or 'ok'}")
+        return stats, reason
+
+    passing = failing = None
+    passing_stats = failing_reason = None
+    load = start
+    while True:
+        stats, reason = probe(load, "ramp")
+        if reason is not None:
+            failing, failing_reason = load, reason
+            break
+        passing, passing_stats = load, stats
+        if load >= limit:
+            return passing, passing_stats, None, None, curve
+        load = min(load * 2, limit)
+    if passing is None:
+        return None, None, failing, failing_reason, curve
+
+    while failing - passing > max(precision * passing, 1 if integer else 0):
+        load = (passing + failing) // 2 if integer else round((passing + failing) / 2, 1)
+        if load in (passing, failing):
+            break
+        stats, reason = probe(load, "bisect")
+        if reason is None:
+            passing, passing_stats = load, stats
+        else:
+            failing, failing_reason = load, reason
+    return passing, passing_stats, failing, failing_reason, curve
+
+
+class Probe:
+    """Measures one offered load against a running gateway."""
+
+    def __init__(self, args):
+        self.args = args
+        port = args.port
+        self.url = f"localhost:{port}" if args.protocol != "http" else f"http://localhost:{port}/"
+
+    def __call__(self, load):
+        args = self.args
+        duration = WARMUP + args.duration
+        if args.search == "rate":
+            rows, errors, _ = run_load(self.url, concurrency=args.concurrency, duration=duration,
+                                       schedule=RateSchedule([(duration, load, load)]), timeout=args.timeout,
+                                       include_errors=True, protocol=args.protocol)
+            # open-loop rows: latency from the intended start of the request
+            stats = run_stats(rows, errors, args.duration, 9, PERCENTILES)
+        else:
+            rows, errors, _ = run_load(self.url, concurrency=load, duration=duration, timeout=args.timeout,
+                                       include_errors=True, protocol=args.protocol)
+            stats = run_stats(rows, errors, args.duration, 0, PERCENTILES)
+        return stats, breach(stats, load, args.search, args.slo_p99, args.max_error_rate)
+
+
+def write_curve(path, curve):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, CURVE_HEADER, restval="")
+        writer.writeheader()
+        writer.writerows(sorted(curve, key=lambda row: row["load"]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find the maximum sustainable throughput of the gateways")
+    parser.add_argument("--gateways", nargs="+", default=["haproxy", "nginx", "traefik", "tyk"])
+    parser.add_argument("--search", default="rate", choices=SEARCHES,
+                        help="Increase the open-loop rate or the closed-loop concurrency")
+    parser.add_argument("--slo-p99", type=float, default=10, help="p99 latency objective in ms")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="Maximum share of failed requests")
+    parser.add_argument("--start", type=float, default=None,
+                        help="First load (default: 500 requests/sec or concurrency 1)")
+    parser.add_argument("--limit", type=float, default=None,
+                        help="Highest load tried (default: 200000 requests/sec or concurrency 1024)")
+    parser.add_argument("--precision", type=float, default=0.05,
+                        help="Stop bisecting when passing and breaching load are this close (relative)")
+    parser.add_argument("--concurrency", type=int, default=256,
+                        help="Maximum requests in flight in the rate search")
+    parser.add_argument("--duration", type=float, default=10, help="Load seconds per measured point")
+    parser.add_argument("--protocol", default="http", choices=["http", "grpc"])
+    parser.add_argument("--tuning", default=None, metavar="PROFILE",
+                        help="Run on stacks rendered from 3-load-test/topology.yaml with this tuning profile")
+    parser.add_argument("--timeout", type=float, default=5, help="Request timeout in seconds")
+    parser.add_argument("--port", default=os.getenv("GATEWAY_PORT", "8080"), help="Host port of the gateway")
+    args = parser.parse_args()
+
+    integer = args.search == "concurrency"
+    start = args.start or (1 if integer else 500)
+    limit = args.limit or (1024 if integer else 200000)
+    if integer:
+        start, limit = int(start), int(limit)
+    results_dir = SCENARIO_DIR / "results" / f"{time.strftime('%Y%m%d_%H%M%S')}_saturation" / "saturation"
+    results_dir.mkdir(parents=True, exist_ok=True)
+
+    summary = []
+    for gateway in args.gateways:
+        phase = Phase("3", gateway, args.protocol, [], subdir=stack_subdir(gateway, args.protocol, args.tuning))
+        env = {**os.environ, "GATEWAY_PORT": str(args.port), "COMPOSE_PROJECT_NAME": f"saturation-{gateway}"}
+        log(f"==== Saturation of {gateway}: {args.search} search, p99 <= {args.slo_p99:g} ms ====")
+        compose(phase, env, "down", "-v")
+        compose(phase, env, "up", "--build", "-d")
+        try:
+            if not wait_until_ready(phase, int(args.port)):
+                log(f"[WARN] {gateway} did not become ready, skipping")
+                continue
+            passing, stats, failing, reason, curve = find_saturation(
+                Probe(args), start, limit, args.precision, integer)
+        finally:
+            compose(phase, env, "down", "-v")
+
+        name = f"{gateway}_{args.search}"
+        write_curve(results_dir / f"{name}_curve.csv", curve)
+        result = {
+            "gateway": gateway,
+            "search": args.search,
+            "protocol": args.protocol,
+            "tuning": args.tuning or "hand-written",
+            "slo_p99_ms": args.slo_p99,
+            "max_error_rate": args.max_error_rate,
+            "max_sustainable_load": passing,
+            "max_sustainable_rps": stats["requests_per_s"] if stats else None,
+            "p99_ms": stats["p99_ms"] if stats else None,
+            "breaching_load": failing,
+            "breach": reason,
+        }
+        (results_dir / f"{name}.json").write_text(json.dumps(result, indent=2) + "\n")
+        summary.append(result)
+        if passing is None:
+            log(f"[WARN] {gateway} breaks the objective already at {start:g}: {reason}")
+
+    if summary:
+        with open(results_dir / "saturation.csv", "w", newline="") as f:
+            writer = csv.DictWriter(f, list(summary[0]))
+            writer.writeheader()
+            writer.writerows(summary)
+    for result in summary:
+        log(f"[OK] {result['gateway']}: {result['max_sustainable_rps']} requests/s "
+            f"(p99 {result['p99_ms']} ms at {result['search']} {result['max_sustainable_load']}), "
+            f"breached at {result['breaching_load']}: {result['breach']}")
+    log(f"✅ Results saved to {results_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,389 @@
+"""
+Soak test: constant load on a gateway for hours with leak and drift detection (scenario 3).
+
+Problems like slow memory growth, a growing connection table, latency drift
+or Tyk's analytics piling up in Redis only show after hours, far beyond the
+10 s runs of the load test. The soak test keeps a constant closed-loop
+(-c) or open-loop (--rate) load on the load test stack of a gateway for
+--duration (e.g. 4h) and aggregates as it goes, so memory stays bounded for any
+duration:
+
+  * the load processes record latencies into HDR histograms per interval
+    (--interval, default 10 s) and hand every finished interval to the main
+    process, which writes one row per interval (requests, errors, p50/p99/p99.9,
+    max) to <gateway>_soak.csv and only keeps a histogram of the whole run
+  * every interval, the memory, open file descriptors, processes and TCP sockets
+    of all containers of the stack (cgroup v2, common/resource_sampler.py) are
+    appended to <gateway>_soak_resources.csv and the gateway's own metrics
+    (common/gateway_metrics.py) to <gateway>_soak_metrics.csv
+
+At the end (also after Ctrl-C) the series after the settling time (--settle)
+are checked for trends with the Theil-Sen slope, which is robust against single
+spikes such as GC pauses: memory, file descriptors and sockets of every
+container growing by more than --leak-threshold per hour are flagged as leaks,
+p50/p99 latency growing by more than --drift-threshold per hour as drift, if the
+last quarter of the run is also above the first one. The trends are written to
+<gateway>_soak_trends.csv.
+
+    python3 -m common.soak --gateways tyk --duration 4h --rate 2000 -c 64
+    python3 -m common.soak --gateways nginx haproxy --duration 8h -c 32 --tuning tuned
+
+Results go to 3-load-test/results/<run>_soak/soak/.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import math
+import multiprocessing
+import os
+import queue
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+
+from common.docker_engine import DockerEngine
+from common.gateway_config import SCENARIO_DIR
+from common.gateway_metrics import FIELDS as METRIC_FIELDS
+from common.gateway_metrics import HEADER as METRICS_HEADER
+from common.gateway_metrics import UnsupportedMetrics, get_scraper
+from common.hdr_histogram import HdrHistogram, IntervalRecorder
+from common.orchestrator import Phase, compose, log, stack_subdir, wait_until_ready
+from common.resource_sampler import Container, open_files
+
+sys.path.insert(0, str(SCENARIO_DIR / "base"))
+from load_client import (RateSchedule, START_DELAY, closed_loop_worker, connection_factory,  # noqa: E402
+                         install_uvloop, open_loop_dispatcher, parse_duration, split_evenly)
+
+LATENCY_HEADER = ["offset_s", "timestamp_ms", "requests", "errors", "error_rate", "requests_per_s",
+                  "p50_ms", "p99_ms", "p99.9_ms", "max_ms"]
+RESOURCE_HEADER = ["offset_s", "timestamp_ms", "container", "memory_bytes", "open_fds", "pids", "tcp_sockets",
+                   "cpu_cores"]
+TREND_HEADER = ["gateway", "series", "container", "kind", "start", "end", "slope_per_hour",
+                "relative_per_hour", "flagged"]
+LEAK_SERIES = ["memory_bytes", "open_fds", "tcp_sockets"]
+DRIFT_SERIES = ["p50_ms", "p99_ms"]
+MAX_TREND_POINTS = 2000  # Theil-Sen is quadratic in the number of points
+
+
+class RollingRecorder(IntervalRecorder):
+    """IntervalRecorder that counts requests and errors per interval and hands finished intervals over."""
+
+    def __init__(self, interval):
+        super().__init__(interval)
+        self.counts = {}  # slot -> [requests, errors]
+
+    def append(self, row):
+        counts = self.counts.setdefault(int(row[7] // self.interval), [0, 0])
+        counts[0] += 1
+        if not 200 <= row[6] < 400:
+            counts[1] += 1
+        super().append(row)
+
+    def pop_before(self, slot):
+        """Remove the intervals before slot: {slot: (requests, errors, encoded histogram or None)}."""
+        done = {}
+        for s in sorted(s for s in self.counts if s < slot):
+            hist = self.histograms.pop(s, None)
+            requests, errors = self.counts.pop(s)
+            done[s] = (requests, errors, hist.encode() if hist else None)
+        # only the per-interval counts are needed, the status totals would grow with the run
+        self.statuses.clear()
+        return done
+
+
+async def soak_workers(spec, results):
+    recorder = RollingRecorder(spec["interval"])
+    errors = Counter()
+    connect = connection_factory(spec)
+    start = spec["start"]
+    await asyncio.sleep(max(0.0, start - time.monotonic()))
+    if spec["schedule"] is not None:
+        load = open_loop_dispatcher(connect, start, spec, recorder, errors, None)
+    else:
+        deadline = start + spec["duration"]
+        load = asyncio.gather(*(closed_loop_worker(connect, start, deadline, None, recorder, errors, True)
+                                for _ in range(spec["concurrency"])))
+    task = asyncio.ensure_future(load)
+    # requests are recorded in the interval they started in, so intervals are only handed
+    # over once no request started in them can still be in flight
+    lag = math.ceil((spec["timeout"] or spec["interval"]) / spec["interval"]) + 1
+    while not task.done():
+        await asyncio.wait({task}, timeout=spec["interval"])
+        current = int((time.monotonic() - start) // spec["interval"])
+        results.put((spec["index"], current - lag, recorder.pop_before(current - lag)))
+    task.result()
+    results.put((spec["index"], None, recorder.pop_before(math.inf)))
+
+
+def soak_process(spec, results):
+    """Entry point of a load process: sends its share of the load and streams finished intervals."""
+    if spec["uvloop"]:
+        install_uvloop()
+    asyncio.run(soak_workers(spec, results))
+
+
+def theil_sen(x, y):
+    """Median of the pairwise slopes (robust linear trend)."""
+    if len(x) > MAX_TREND_POINTS:
+        keep = np.linspace(0, len(x) - 1, MAX_TREND_POINTS).astype(int)
+        x, y = x[keep], y[keep]
+    i, j = np.triu_indices(len(x), k=1)
+    dx = x[j] - x[i]
+    valid = dx != 0
+    return float(np.median((y[j] - y[i])[valid] / dx[valid])) if valid.any() else 0.0
+
+
+def trend(offset_s, values, settle_s):
+    """
+    Trend of a series after the settling time: (start, end, slope per hour,
+    slope per hour relative to the start, last quarter above first quarter),
+    None if fewer than 8 values.
+    """
+    offset_s = np.asarray(offset_s, dtype=float)
+    values = np.asarray(values, dtype=float)
+    keep = (offset_s >= settle_s) & ~np.isnan(values)
+    offset_s, values = offset_s[keep], values[keep]
+    if len(values) < 8:
+        return None
+    hours = offset_s / 3600
+    slope = theil_sen(hours, values)
+    quarter = len(values) // 4
+    first, last = np.median(values[:quarter]), np.median(values[-quarter:])
+    return float(first), float(last), slope, slope / first if first else np.nan, bool(last > first)
+
+
+def detect_trends(gateway, latency_csv, resources_csv, settle_s, leak_threshold, drift_threshold):
+    """Trend rows of the soak results of one gateway (TREND_HEADER), flagged if they exceed the thresholds."""
+    import pandas as pd
+
+    rows = []
+
+    def add(series, container, kind, offsets, values, threshold):
+        result = trend(offsets, values, settle_s)
+        if result is None:
+            return
+        first, last, slope, relative, rising = result
+        rows.append({
+            "gateway": gateway, "series": series, "container": container, "kind": kind,
+            "start": round(first, 3), "end": round(last, 3), "slope_per_hour": round(slope, 3),
+            "relative_per_hour": round(relative, 4),
+            "flagged": bool(rising and relative > threshold),
+        })
+
+    latency = pd.read_csv(latency_csv)
+    for series in DRIFT_SERIES:
+        add(series, "", "drift", latency["offset_s"], latency[series], drift_threshold)
+    resources = pd.read_csv(resources_csv)
+    for container, samples in resources.groupby("container"):
+        for series in LEAK_SERIES:
+            add(series, container, "leak", samples["offset_s"], samples[series], leak_threshold)
+    return rows
+
+
+class Soak:
+    """Runs the load processes against one gateway and writes the interval rows as they complete."""
+
+    def __init__(self, gateway, args, phase, env, results_dir):
+        self.gateway = gateway
+        self.args = args
+        self.interval = parse_duration(args.interval)
+        self.duration = parse_duration(args.duration)
+        self.paths = {name: results_dir / f"{gateway}_{name}.csv"
+                      for name in ("soak", "soak_resources", "soak_metrics")}
+        engine = DockerEngine()
+        self.containers = [Container(engine, ref) for ref in compose(phase, env, "ps", "-q").stdout.split()]
+        try:
+            self.scraper = get_scraper(gateway)
+        except UnsupportedMetrics as exc:
+            log(f"[INFO] {exc}, not scraping metrics")
+            self.scraper = None
+        self.total = HdrHistogram()
+        self.requests = self.errors = 0
+        self.pending = {}  # slot -> [requests, errors, histogram]
+
+    def run(self):
+        args = self.args
+        processes = max(1, min(os.cpu_count() or 1, args.c))
+        start = time.monotonic() + START_DELAY
+        self.start_wall = time.time() + START_DELAY
+        results = multiprocessing.Queue()
+        schedule = RateSchedule([(self.duration, float(args.rate), float(args.rate))]) if args.rate else None
+        workers = [multiprocessing.Process(target=soak_process, args=({
+            "url": f"http://localhost:{args.port}/",
+            "concurrency": c,
+            "duration": self.duration,
+            "start": start,
+            "timeout": args.timeout or None,
+            "keep_alive": True,
+            "uvloop": True,
+            "protocol": "http",
+            "include_errors": True,
+            "schedule": schedule.segments if schedule else None,
+            "interval": self.interval,
+            "stride": processes,
+            "index": i,
+        }, results), daemon=True) for i, c in enumerate(split_evenly(args.c, processes))]
+        for worker in workers:
+            worker.start()
+
+        watermarks = [-1] * processes
+        files = {name: open(path, "w", newline="") for name, path in self.paths.items()}
+        writers = {name: csv.writer(f) for name, f in files.items()}
+        writers["soak"].writerow(LATENCY_HEADER)
+        writers["soak_resources"].writerow(RESOURCE_HEADER)
+        writers["soak_metrics"].writerow(METRICS_HEADER)
+        next_sample = start
+        last_report = start
+        try:
+            while any(w is not None for w in watermarks) and any(p.is_alive() for p in workers) \
+                    or not results.empty():
+                try:
+                    index, watermark, done = results.get(timeout=max(0.0, next_sample - time.monotonic()))
+                    self.collect(done)
+                    watermarks[index] = watermark
+                    finished = min((w for w in watermarks if w is not None), default=math.inf)
+                    self.write_intervals(writers["soak"], finished)
+                except queue.Empty:
+                    pass
+                now = time.monotonic()
+                if now >= next_sample:
+                    self.sample(writers["soak_resources"], writers["soak_metrics"], now - start)
+                    next_sample += self.interval
+                    for f in files.values():
+                        f.flush()
+                if now - last_report >= 600:
+                    last_report = now
+                    log(f"{self.gateway}: {(now - start) / 3600:.2f} h, {self.requests} requests, "
+                        f"{self.errors} errors, p99 {self.total.value_at_percentile(99) / 1000:.3f} ms")
+            self.write_intervals(writers["soak"], math.inf)
+        finally:
+            for worker in workers:
+                if worker.is_alive():
+                    worker.terminate()
+            for f in files.values():
+                f.close()
+        return self.paths
+
+    def collect(self, done):
+        for slot, (requests, errors, encoded) in done.items():
+            entry = self.pending.setdefault(slot, [0, 0, HdrHistogram()])
+            entry[0] += requests
+            entry[1] += errors
+            if encoded:
+                entry[2].add(HdrHistogram.decode(encoded))
+
+    def write_intervals(self, writer, finished):
+        """Write and drop the intervals before `finished` that all load processes have handed over."""
+        for slot in sorted(s for s in self.pending if s < finished):
+            requests, errors, hist = self.pending.pop(slot)
+            self.requests += requests
+            self.errors += errors
+            self.total.add(hist)
+            offset = slot * self.interval
+
+            def ms(value):
+                return round(value / 1000, 3) if hist.total_count else ""
+
+            writer.writerow([
+                round(offset, 3), round((self.start_wall + offset) * 1000, 3), requests, errors,
+                round(errors / requests, 5) if requests else "", round(requests / self.interval, 1),
+                ms(hist.value_at_percentile(50)), ms(hist.value_at_percentile(99)),
+                ms(hist.value_at_percentile(99.9)), ms(hist.max),
+            ])
+
+    def sample(self, resources, metrics, offset):
+        timestamp_ms = round(time.time() * 1000, 3)
+        for container in self.containers:
+            counters = container.sample(time.monotonic_ns())
+            if counters is None:
+                continue
+            # cpu_cores, memory, pids and tcp sockets of resource_sampler.HEADER
+            resources.writerow([round(offset, 3), timestamp_ms, container.name, counters[5],
+                                open_files(container.cgroup), counters[8], counters[10], counters[4]])
+        if self.scraper is not None:
+            try:
+                fields = self.scraper.scrape()
+            except (OSError, ValueError, IndexError, KeyError):
+                return
+            metrics.writerow([timestamp_ms, round(offset, 3), "", self.gateway,
+                              *(fields[f] for f in METRIC_FIELDS)])
+
+    def summary(self):
+        return {
+            "gateway": self.gateway,
+            "duration_s": self.duration,
+            "requests": self.requests,
+            "errors": self.errors,
+            **{f"p{p}_ms": round(self.total.value_at_percentile(p) / 1000, 3) if self.total.total_count else None
+               for p in (50, 99, 99.9)},
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Soak test the gateways with leak and drift detection")
+    parser.add_argument("--gateways", nargs="+", default=["haproxy", "nginx", "traefik", "tyk"])
+    parser.add_argument("--duration", default="1h", help="Load duration per gateway, e.g. 30m, 4h")
+    parser.add_argument("-c", type=int, default=64, help="Connections (closed loop) or maximum requests in flight")
+    parser.add_argument("--rate", type=float, default=None, help="Open-loop load at this rate in requests/sec")
+    parser.add_argument("--interval", default="10s", help="Aggregation and sampling interval")
+    parser.add_argument("--settle", default="5m", help="Start of the run excluded from the trend detection")
+    parser.add_argument("--leak-threshold", type=float, default=0.05,
+                        help="Flag memory, file descriptors or sockets growing by more than this share per hour")
+    parser.add_argument("--drift-threshold", type=float, default=0.1,
+                        help="Flag p50/p99 latency growing by more than this share per hour")
+    parser.add_argument("--tuning", default=None, metavar="PROFILE",
+                        help="Run on stacks rendered from 3-load-test/topology.yaml with this tuning profile")
+    parser.add_argument("--timeout", type=float, default=20, help="Request timeout in seconds")
+    parser.add_argument("--port", default=os.getenv("GATEWAY_PORT", "8080"), help="Host port of the gateway")
+    args = parser.parse_args()
+
+    results_dir = SCENARIO_DIR / "results" / f"{time.strftime('%Y%m%d_%H%M%S')}_soak" / "soak"
+    results_dir.mkdir(parents=True, exist_ok=True)
+    flagged = []
+    interrupted = False
+    for gateway in args.gateways:
+        phase = Phase("3", gateway, "http", [], subdir=stack_subdir(gateway, "http", args.tuning))
+        env = {**os.environ, "GATEWAY_PORT": str(args.port), "COMPOSE_PROJECT_NAME": f"soak-{gateway}"}
+        log(f"==== Soak test of {gateway} for {args.duration} ====")
+        compose(phase, env, "down", "-v")
+        compose(phase, env, "up", "--build", "-d")
+        try:
+            if not wait_until_ready(phase, int(args.port)):
+                log(f"[WARN] {gateway} did not become ready, skipping")
+                continue
+            soak = Soak(gateway, args, phase, env, results_dir)
+            try:
+                paths = soak.run()
+            except KeyboardInterrupt:
+                # the intervals written so far are still analyzed
+                log(f"[WARN] Soak test of {gateway} interrupted")
+                paths = soak.paths
+                interrupted = True
+        finally:
+            compose(phase, env, "down", "-v")
+
+        trends = detect_trends(gateway, paths["soak"], paths["soak_resources"], parse_duration(args.settle),
+                               args.leak_threshold, args.drift_threshold)
+        with open(results_dir / f"{gateway}_soak_trends.csv", "w", newline="") as f:
+            writer = csv.DictWriter(f, TREND_HEADER)
+            writer.writeheader()
+            writer.writerows(trends)
+        (results_dir / f"{gateway}_soak.json").write_text(json.dumps(soak.summary(), indent=2) + "\n")
+        for row in trends:
+            if row["flagged"]:
+                flagged.append(row)
+                log(f"[WARN] {gateway}: {row['kind']} of {row['series']} {row['container']}".rstrip()
+                    + f" ({row['start']} -> {row['end']}, {row['relative_per_hour']:+.1%}/h)")
+        log(f"[OK] {gateway}: {soak.summary()}")
+        if interrupted:
+            break
+
+    log(f"{len(flagged)} leaks or drifts flagged" if flagged else "No leaks or drifts flagged")
+    log(f"✅ Results saved to {results_dir}")
+
+
+if __name__ == "__main__":
+    main()
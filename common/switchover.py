@@ -0,0 +1,195 @@
+"""
+Continuous high-rate switchover measurement for dynamic reconfiguration.
+
+`streams` concurrent request streams, each on its own connection (HTTP
+keep-alive connection or gRPC channel), send requests at `rate / streams` per
+second with staggered send times, so together they sample the gateway every
+`1 / rate` seconds. Every response is tagged with the backend that answered it
+(echo-a, echo-b, ... taken from the echo service's reply) and with its send and
+completion time (time.monotonic_ns), so the switch can be evaluated exactly
+afterwards, including the requests that were in flight during the reload:
+
+    with SwitchoverLoad("http://localhost:8080/", rate=1000, streams=8) as load:
+        time.sleep(3)
+        switch_ns = adapter.apply()  # time the reload was triggered
+        time.sleep(3)
+    metrics = evaluate_switch(load.samples, switch_ns)
+
+gRPC (protocol="grpc", url "host:port") sends Echo.Ping calls and needs grpcio
+and the generated Echo stubs (package `proto`) on the import path.
+"""
+import asyncio
+import re
+import threading
+import time
+
+from common.async_http import HttpConnection, Target
+from common.prober import error_class
+
+BACKEND = re.compile(r"echo-\w+", re.IGNORECASE)
+
+
+def backend_name(text):
+    """Backend named in an echo reply ("response from echo-A" / "echo-A: ping") -> "echo-a"."""
+    match = BACKEND.search(text)
+    return match.group(0).lower() if match else None
+
+
+class Sample:
+    __slots__ = ("sent_ns", "done_ns", "backend", "error")
+
+    def __init__(self, sent_ns, done_ns, backend, error):
+        self.sent_ns = sent_ns
+        self.done_ns = done_ns
+        self.backend = backend
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+class HttpStream:
+    def __init__(self, url, timeout):
+        self.conn = HttpConnection(Target(url), timeout=timeout)
+
+    async def send(self):
+        resp = await self.conn.request()
+        if resp.status != 200:
+            return None, f"http_{resp.status}"
+        return backend_name(resp.body.decode(errors="replace")), None
+
+    def close(self):
+        self.conn.close()
+
+
+class GrpcStream:
+    def __init__(self, url, timeout):
+        import grpc
+        import proto.echo_pb2 as echo_pb2
+        import proto.echo_pb2_grpc as echo_pb2_grpc
+
+        self.channel = grpc.aio.insecure_channel(url.split("://", 1)[-1].rstrip("/"))
+        self.stub = echo_pb2_grpc.EchoStub(self.channel)
+        self.request = echo_pb2.EchoRequest(message="ping")
+        self.timeout = timeout
+        self.rpc_error = grpc.aio.AioRpcError
+
+    async def send(self):
+        try:
+            reply = await self.stub.Ping(self.request, timeout=self.timeout)
+        except self.rpc_error as exc:
+            return None, f"grpc_{exc.code().name.lower()}"
+        return backend_name(reply.message), None
+
+    async def aclose(self):
+        await self.channel.close()
+
+
+class SwitchoverLoad:
+    """Staggered concurrent request streams at a total rate, until stopped."""
+
+    def __init__(self, url, rate=1000, streams=8, timeout=1.0, protocol="http"):
+        self.url = url
+        self.rate = rate
+        self.streams = streams
+        self.timeout = timeout
+        self.protocol = protocol
+        self.samples = []
+        self.clock_offset_ns = time.time_ns() - time.monotonic_ns()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        self._thread = threading.Thread(target=asyncio.run, args=(self._run(),), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop sending and wait for the outstanding requests."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def wall_ms(self, ns):
+        """Convert a monotonic timestamp to milliseconds since the epoch."""
+        return (ns + self.clock_offset_ns) / 1e6
+
+    async def _run(self):
+        start = time.monotonic_ns()
+        step = int(self.streams * 1e9 / self.rate)
+        await asyncio.gather(*(self._stream(start + step * k // self.streams, step)
+                               for k in range(self.streams)))
+
+    async def _stream(self, first_ns, step):
+        if self.protocol == "grpc":
+            stream = GrpcStream(self.url, self.timeout)
+        else:
+            stream = HttpStream(self.url, self.timeout)
+        next_ns = first_ns
+        while not self._stop.is_set():
+            now = time.monotonic_ns()
+            if now < next_ns:
+                await asyncio.sleep((next_ns - now) / 1e9)
+            elif now - next_ns > step:
+                # a slow request overran its slots, continue with the next slot in the grid
+                next_ns += (now - next_ns) // step * step
+            sent = time.monotonic_ns()
+            try:
+                backend, error = await stream.send()
+            except Exception as exc:
+                backend, error = None, error_class(exc)
+            self.samples.append(Sample(sent, time.monotonic_ns(), backend, error))
+            next_ns += step
+        if self.protocol == "grpc":
+            await stream.aclose()
+        else:
+            stream.close()
+
+
+def evaluate_switch(samples, switch_ns):
+    """
+    Switchover metrics of one reload triggered at switch_ns (all durations in ms
+    from the trigger, by send time of the requests, None if not observed):
+
+      old_backend / new_backend  backend before the switch / the other one answering after it
+      first_new_ms      first request answered by the new backend
+      last_old_ms       last request answered by the old backend
+      mixed_window_ms   time both backends answered (last old - first new, 0 if none)
+      requests / errors requests sent after the trigger and how many of them failed
+      in_flight / in_flight_errors  requests sent before and completed after the trigger
+    """
+    ordered = sorted(samples, key=lambda s: s.sent_ns)
+    before = [s for s in ordered if s.sent_ns < switch_ns]
+    after = [s for s in ordered if s.sent_ns >= switch_ns]
+    old = next((s.backend for s in reversed(before) if s.ok and s.backend), None)
+    new = next((s.backend for s in after if s.ok and s.backend and s.backend != old), None)
+    first_new = next((s for s in after if s.ok and s.backend == new), None) if new else None
+    last_old = next((s for s in reversed(after) if s.ok and s.backend == old), None)
+    in_flight = [s for s in before if s.done_ns >= switch_ns]
+    errors = [s.error for s in after if not s.ok]
+
+    def since_switch(sample):
+        return round((sample.sent_ns - switch_ns) / 1e6, 3) if sample else None
+
+    mixed = 0.0
+    if first_new and last_old and last_old.sent_ns > first_new.sent_ns:
+        mixed = round((last_old.sent_ns - first_new.sent_ns) / 1e6, 3)
+    return {
+        "old_backend": old,
+        "new_backend": new,
+        "first_new_ms": since_switch(first_new),
+        "last_old_ms": since_switch(last_old),
+        "mixed_window_ms": mixed,
+        "requests": len(after),
+        "errors": len(errors),
+        "error_types": ";".join(sorted(set(errors))),
+        "in_flight": len(in_flight),
+        "in_flight_errors": sum(1 for s in in_flight if not s.ok),
+    }
@@ -0,0 +1,195 @@
+"""
+Gateway tuning sweep with successive halving (scenario 3).
+
+Every combination of the knob values listed per gateway under `sweep` in
+3-load-test/topology.yaml (on top of a tuning profile) is rendered into a stack
+(common/gateway_config.py), started and loaded with a closed-loop HTTP load at
+a fixed concurrency. Successive halving spends the load time where it matters:
+all candidates get a short run, the best 1/eta of them continue with an eta
+times longer run, until one configuration is left, which is finally measured
+for the full duration. Candidates are ranked by throughput (successful
+requests/sec) or p99 latency; runs with more than 1% failed requests rank last.
+
+    python3 -m common.tuning_sweep --gateways nginx haproxy --objective throughput
+    python3 -m common.tuning_sweep --gateways tyk --objective p99 --tuning tuned
+
+Per gateway every evaluated run is written to
+3-load-test/results/<run>_sweep/tuning-sweep/<gateway>_sweep.csv and the winning
+knob values to <gateway>_best.json.
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+
+from common.gateway_config import SCENARIO_DIR, Stack, load_topology, render, write_stack
+from common.orchestrator import Phase, compose, log, wait_until_ready
+
+sys.path.insert(0, str(SCENARIO_DIR / "base"))
+from load_client import run_load  # noqa: E402
+
+OBJECTIVES = ["throughput", "p99"]
+MAX_ERROR_RATE = 0.01
+WARMUP = 1.0  # seconds of every run that are not evaluated (connection setup)
+
+
+def candidates(space):
+    """All combinations of the knob values: {"workers": [1, 2], ...} -> [{"workers": 1}, ...]."""
+    knobs = sorted(space)
+    return [dict(zip(knobs, values)) for values in itertools.product(*(space[k] for k in knobs))]
+
+
+def label(config):
+    return " ".join(f"{knob}={value}" for knob, value in config.items()) or "defaults"
+
+
+def percentile(values, p):
+    return values[min(len(values) - 1, int(len(values) * p / 100))] if values else None
+
+
+def run_stats(rows, errors, duration, latency_index=0, percentiles=(50, 99), include_errors=True):
+    """
+    Throughput, error rate and latency percentiles (p<p>_ms) of the rows after
+    the warmup. latency_index selects the latency column of the load client
+    rows (9: open-loop latency from the intended start). With include_errors
+    (as passed to run_load) failed requests are status 0 rows and errors is
+    not counted again; otherwise the errors of the whole run are added.
+    """
+    measured = [r for r in rows if r[7] >= WARMUP]
+    latencies = sorted(r[latency_index] * 1000 for r in measured if r[6])
+    ok = sum(1 for r in measured if 200 <= r[6] < 400)
+    failed = len(measured) - ok
+    if not include_errors:
+        failed += sum(errors.values())
+    return {
+        "requests_per_s": round(ok / duration, 1),
+        **{f"p{p}_ms": round(percentile(latencies, p), 3) if latencies else None for p in percentiles},
+        "error_rate": round(failed / (ok + failed), 4) if ok + failed else 1.0,
+    }
+
+
+def score(stats, objective):
+    """Sort key, lower is better."""
+    if stats is None or stats["error_rate"] > MAX_ERROR_RATE or stats["p99_ms"] is None:
+        return (1, 0)
+    if objective == "throughput":
+        return (0, -stats["requests_per_s"])
+    return (0, stats["p99_ms"])
+
+
+class Evaluator:
+    """Starts the stack of a configuration and measures it for a given duration."""
+
+    def __init__(self, gateway, base_tuning, args):
+        self.gateway = gateway
+        self.base_tuning = base_tuning
+        self.args = args
+        self.port = int(args.port)
+
+    def __call__(self, config, duration):
+        stack = Stack("http", tuning={**self.base_tuning, **config}, name=f"{self.gateway}-sweep")
+        out = write_stack(render(self.gateway, stack), SCENARIO_DIR / self.gateway / "generated" / "sweep")
+        phase = Phase("3", self.gateway, "http", [], subdir=out.relative_to(SCENARIO_DIR / self.gateway))
+        env = {**os.environ, "GATEWAY_PORT": str(self.port), "COMPOSE_PROJECT_NAME": f"sweep-{self.gateway}"}
+        compose(phase, env, "down", "-v")
+        compose(phase, env, "up", "--build", "-d")
+        try:
+            if not wait_until_ready(phase, self.port):
+                log(f"[WARN] {self.gateway} with {label(config)} did not become ready")
+                return None
+            rows, errors, _ = run_load(f"http://localhost:{self.port}/", concurrency=self.args.concurrency,
+                                       duration=WARMUP + duration, timeout=self.args.timeout,
+                                       include_errors=True)
+            return run_stats(rows, errors, duration)
+        finally:
+            compose(phase, env, "down", "-v")
+
+
+def successive_halving(configs, evaluate, objective, min_duration, max_duration, eta):
+    """
+    Evaluate all configs for min_duration, keep the best len/eta, multiply the
+    duration by eta and repeat until one is left; the winner is measured for
+    max_duration. Returns (winner, stats of the final run, history rows).
+    """
+    history = []
+    duration = min_duration
+    rung = 0
+    while True:
+        results = []
+        for config in configs:
+            stats = evaluate(config, duration)
+            results.append((score(stats, objective), config, stats))
+            log(f"rung {rung} ({duration:g} s) {label(config)}: {stats}")
+        results.sort(key=lambda r: r[0])
+        keep = max(1, len(results) // eta)
+        for rank, (_, config, stats) in enumerate(results):
+            history.append({"rung": rung, "duration_s": duration, "rank": rank + 1, "kept": rank < keep,
+                            **config, **(stats or {})})
+        configs = [config for _, config, _ in results[:keep]]
+        if len(configs) == 1 and duration >= max_duration:
+            return configs[0], results[0][2], history
+        rung += 1
+        # the last survivor is measured once more for the full duration
+        duration = max_duration if len(configs) == 1 else min(duration * eta, max_duration)
+
+
+def write_history(path, history, knobs):
+    header = ["rung", "duration_s", "rank", "kept", *knobs,
+              "requests_per_s", "p50_ms", "p99_ms", "error_rate"]
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, header, restval="")
+        writer.writeheader()
+        writer.writerows(history)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Successive-halving sweep over gateway tuning knobs")
+    parser.add_argument("--gateways", nargs="+", default=None,
+                        help="Gateways to tune (default: all gateways with a sweep in the topology)")
+    parser.add_argument("--objective", default="throughput", choices=OBJECTIVES,
+                        help="Maximize successful requests/sec or minimize the p99 latency")
+    parser.add_argument("--tuning", default="default",
+                        help="Tuning profile the swept knobs are applied on top of")
+    parser.add_argument("--topology", default=None, help="Topology YAML file (default: 3-load-test/topology.yaml)")
+    parser.add_argument("--concurrency", type=int, default=64, help="Concurrency of the load")
+    parser.add_argument("--min-duration", type=float, default=2, help="Load seconds per candidate in the first rung")
+    parser.add_argument("--max-duration", type=float, default=10, help="Load seconds of the final run")
+    parser.add_argument("--eta", type=int, default=2, help="Keep the best 1/eta candidates per rung")
+    parser.add_argument("--timeout", type=float, default=5, help="Request timeout in seconds")
+    parser.add_argument("--port", default=os.getenv("GATEWAY_PORT", "8080"), help="Host port of the gateway")
+    args = parser.parse_args()
+    if args.eta < 2:
+        parser.error("--eta must be at least 2")
+
+    topology = load_topology(args.topology) if args.topology else load_topology()
+    sweep = topology.get("sweep", {})
+    base_tuning = topology["tuning"][args.tuning] or {}
+    results_dir = SCENARIO_DIR / "results" / f"{time.strftime('%Y%m%d_%H%M%S')}_sweep" / "tuning-sweep"
+    results_dir.mkdir(parents=True, exist_ok=True)
+
+    best = {}
+    for gateway in args.gateways or list(sweep):
+        if gateway not in sweep:
+            log(f"[INFO] No sweep for {gateway} in the topology, skipping")
+            continue
+        configs = candidates(sweep[gateway])
+        log(f"==== Tuning {gateway}: {len(configs)} configurations, objective {args.objective} ====")
+        winner, stats, history = successive_halving(
+            configs, Evaluator(gateway, base_tuning, args), args.objective,
+            args.min_duration, args.max_duration, args.eta)
+        write_history(results_dir / f"{gateway}_sweep.csv", history, sorted(sweep[gateway]))
+        (results_dir / f"{gateway}_best.json").write_text(json.dumps(
+            {"gateway": gateway, "objective": args.objective, "tuning": args.tuning,
+             "knobs": winner, **(stats or {})}, indent=2) + "\n")
+        best[gateway] = (winner, stats)
+
+    for gateway, (winner, stats) in best.items():
+        log(f"[OK] {gateway}: {label(winner)} -> {stats}")
+    log(f"✅ Results saved to {results_dir}")
+
+
+if __name__ == "__main__":
+    main()
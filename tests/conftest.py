@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# the tests import the shared modules as common.<module>, like the clients do
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
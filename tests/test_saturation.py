@@ -0,0 +1,19 @@
+from collections import Counter
+
+from common.saturation import breach
+from common.tuning_sweep import WARMUP, run_stats
+
+
+def stats(ok, failed):
+    rows = ([(0.001, 0, 0, 0, 0, 0, 200, WARMUP + 1, WARMUP + 1, 0.001)] * ok
+            + [(0.001, 0, 0, 0, 0, 0, 0, WARMUP + 1, WARMUP + 1, 0.001)] * failed)
+    return run_stats(rows, Counter({"ConnectionResetError": failed}), 1, 9, (50, 90, 99, 99.9))
+
+
+def test_error_rate_below_limit_passes():
+    # 0.9% failed requests, below a 1% limit even though they also show up in the Counter
+    assert breach(stats(991, 9), 1000, "rate", slo_p99=10, max_error_rate=0.01) is None
+
+
+def test_error_rate_above_limit_breaches():
+    assert breach(stats(980, 20), 1000, "rate", slo_p99=10, max_error_rate=0.01).startswith("error rate 2.00%")
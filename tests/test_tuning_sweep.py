@@ -0,0 +1,26 @@
+from collections import Counter
+
+from common.tuning_sweep import WARMUP, run_stats
+
+
+def rows(ok, failed, offset=WARMUP + 1):
+    """Load client rows (include_errors=True): failed requests are status 0 rows."""
+    return ([(0.001, 0, 0, 0, 0, 0, 200, offset)] * ok
+            + [(0.001, 0, 0, 0, 0, 0, 0, offset)] * failed)
+
+
+def test_failed_rows_are_counted_once():
+    stats = run_stats(rows(990, 10), Counter({"ConnectionResetError": 10}), 10)
+    assert stats["error_rate"] == 0.01
+    assert stats["requests_per_s"] == 99.0
+
+
+def test_warmup_failures_are_not_counted():
+    warmup = rows(0, 5, offset=WARMUP / 2)
+    stats = run_stats(warmup + rows(990, 10), Counter({"ConnectionResetError": 15}), 10)
+    assert stats["error_rate"] == 0.01
+
+
+def test_errors_added_without_failed_rows():
+    stats = run_stats(rows(990, 0), Counter({"ConnectionResetError": 10}), 10, include_errors=False)
+    assert stats["error_rate"] == 0.01